@@ -0,0 +1,125 @@
+"""Baseline schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17 09:00:00.000000
+
+Databases created before migrations existed (init_db / create_all) already
+have these tables: mark them with `alembic stamp 0001` and upgrade from there.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def _timestamps():
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "user",
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("full_name", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+        sa.Column("is_superuser", sa.Boolean(), nullable=True),
+        *_timestamps(),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_user_email", "user", ["email"], unique=True)
+    op.create_index("ix_user_id", "user", ["id"])
+
+    op.create_table(
+        "client",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("phone", sa.String(), nullable=True),
+        sa.Column("address", sa.String(), nullable=True),
+        sa.Column("company", sa.String(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_client_id", "client", ["id"])
+    op.create_index("ix_client_name", "client", ["name"])
+
+    op.create_table(
+        "invoice",
+        sa.Column("number", sa.String(), nullable=False),
+        sa.Column(
+            "status",
+            sa.Enum("DRAFT", "PENDING", "PAID", "OVERDUE", "CANCELLED", name="invoicestatus"),
+            nullable=False,
+        ),
+        sa.Column("issued_date", sa.Date(), nullable=False),
+        sa.Column("due_date", sa.Date(), nullable=False),
+        sa.Column("subtotal", sa.Float(), nullable=False),
+        sa.Column("tax", sa.Float(), nullable=True),
+        sa.Column("discount", sa.Float(), nullable=True),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("client_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["client_id"], ["client.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_invoice_id", "invoice", ["id"])
+    op.create_index("ix_invoice_number", "invoice", ["number"])
+
+    op.create_table(
+        "invoiceitem",
+        sa.Column("description", sa.String(), nullable=False),
+        sa.Column("quantity", sa.Float(), nullable=False),
+        sa.Column("unit_price", sa.Float(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("invoice_id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["invoice_id"], ["invoice.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_invoiceitem_id", "invoiceitem", ["id"])
+
+    op.create_table(
+        "payment",
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column(
+            "method",
+            sa.Enum("CREDIT_CARD", "BANK_TRANSFER", "CASH", "CHECK", "OTHER", name="paymentmethod"),
+            nullable=False,
+        ),
+        sa.Column("reference", sa.String(), nullable=True),
+        sa.Column("notes", sa.Text(), nullable=True),
+        sa.Column("invoice_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["invoice_id"], ["invoice.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_payment_id", "payment", ["id"])
+
+
+def downgrade():
+    op.drop_table("payment")
+    op.drop_table("invoiceitem")
+    op.drop_table("invoice")
+    op.drop_table("client")
+    op.drop_table("user")
+    sa.Enum(name="paymentmethod").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="invoicestatus").drop(op.get_bind(), checkfirst=True)
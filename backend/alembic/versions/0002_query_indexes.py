@@ -0,0 +1,50 @@
+"""Indexes for the list, payment-total and item-load queries
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 09:30:00.000000
+
+Every list filters by user_id; the invoice list also by status or
+client_id, and payment totals and item loads look rows up by invoice_id,
+which had no index. On PostgreSQL the indexes are built CONCURRENTLY so
+writes aren't blocked on large tables. IF NOT EXISTS keeps the upgrade safe
+on databases created with create_all after the models gained them.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Keyset pagination on (sort key, id) within a user
+    ("ix_client_user_id_created_at", "client", ["user_id", "created_at", "id"]),
+    ("ix_client_user_id_name", "client", ["user_id", "name", "id"]),
+    ("ix_invoice_user_id_created_at", "invoice", ["user_id", "created_at", "id"]),
+    ("ix_payment_user_id_created_at", "payment", ["user_id", "created_at", "id"]),
+    # Invoice list filters
+    ("ix_invoice_user_id_status_due_date", "invoice", ["user_id", "status", "due_date"]),
+    ("ix_invoice_user_id_client_id", "invoice", ["user_id", "client_id"]),
+    # Foreign keys looked up by payment totals and item loads
+    ("ix_payment_invoice_id", "payment", ["invoice_id"]),
+    ("ix_invoiceitem_invoice_id", "invoiceitem", ["invoice_id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, if_exists=True, postgresql_concurrently=True
+            )
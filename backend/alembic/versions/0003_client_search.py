@@ -0,0 +1,70 @@
+"""Indexed client search
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 11:00:00.000000
+
+pg_trgm GIN indexes on client name and email on PostgreSQL (Supabase ships
+the extension); an FTS5 trigram table kept in sync by triggers on SQLite.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+TRIGRAM_INDEXES = [
+    ("ix_client_name_trgm", "name"),
+    ("ix_client_email_trgm", "email"),
+]
+
+CLIENT_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS client_fts USING fts5("
+    "name, email, content='client', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS client_fts_insert AFTER INSERT ON client BEGIN "
+    "INSERT INTO client_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS client_fts_delete AFTER DELETE ON client BEGIN "
+    "INSERT INTO client_fts(client_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS client_fts_update AFTER UPDATE OF name, email ON client BEGIN "
+    "INSERT INTO client_fts(client_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); "
+    "INSERT INTO client_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        with op.get_context().autocommit_block():
+            for name, column in TRIGRAM_INDEXES:
+                op.create_index(
+                    name, "client", [column],
+                    if_not_exists=True,
+                    postgresql_using="gin",
+                    postgresql_ops={column: "gin_trgm_ops"},
+                    postgresql_concurrently=True,
+                )
+    elif dialect == "sqlite":
+        for statement in CLIENT_FTS_DDL:
+            op.execute(statement)
+        # Index the clients that already exist
+        op.execute("INSERT INTO client_fts(client_fts) VALUES ('rebuild')")
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        with op.get_context().autocommit_block():
+            for name, _ in TRIGRAM_INDEXES:
+                op.drop_index(
+                    name, table_name="client", if_exists=True, postgresql_concurrently=True
+                )
+    elif dialect == "sqlite":
+        for trigger in ("client_fts_insert", "client_fts_delete", "client_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS client_fts")
@@ -0,0 +1,38 @@
+"""Invoice amount_paid and balance_due
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 13:00:00.000000
+
+Backfills both from existing payments; `python manage.py repair-balances`
+does the same later and also settles invoice status.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "invoice", sa.Column("amount_paid", sa.Float(), server_default="0", nullable=False)
+    )
+    op.add_column(
+        "invoice", sa.Column("balance_due", sa.Float(), server_default="0", nullable=False)
+    )
+    op.execute(
+        "UPDATE invoice SET amount_paid = COALESCE("
+        "(SELECT SUM(payment.amount) FROM payment WHERE payment.invoice_id = invoice.id), 0)"
+    )
+    op.execute("UPDATE invoice SET balance_due = total - amount_paid")
+
+
+def downgrade():
+    with op.batch_alter_table("invoice") as batch_op:
+        batch_op.drop_column("balance_due")
+        batch_op.drop_column("amount_paid")
@@ -0,0 +1,98 @@
+"""Dashboard report rollups
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 14:00:00.000000
+
+Fills the rollups from existing invoices and payments; `python manage.py
+rebuild-reports` does the same at any later point.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# The enum types were created with the invoice and payment tables
+invoice_status = postgresql.ENUM(
+    "DRAFT", "PENDING", "PAID", "OVERDUE", "CANCELLED", name="invoicestatus", create_type=False
+)
+payment_method = postgresql.ENUM(
+    "CREDIT_CARD", "BANK_TRANSFER", "CASH", "CHECK", "OTHER", name="paymentmethod", create_type=False
+)
+
+
+def upgrade():
+    op.create_table(
+        "report_monthly_total",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("invoiced", sa.Float(), nullable=False),
+        sa.Column("received", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "report_status_total",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+        sa.Column("status", invoice_status, primary_key=True),
+        sa.Column("invoices", sa.Integer(), nullable=False),
+        sa.Column("total", sa.Float(), nullable=False),
+        sa.Column("balance_due", sa.Float(), nullable=False),
+    )
+    op.create_table(
+        "report_client_total",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+        sa.Column("client_id", sa.Integer(), sa.ForeignKey("client.id"), primary_key=True),
+        sa.Column("invoices", sa.Integer(), nullable=False),
+        sa.Column("invoiced", sa.Float(), nullable=False),
+        sa.Column("paid", sa.Float(), nullable=False),
+        sa.Column("balance_due", sa.Float(), nullable=False),
+    )
+    op.create_index(
+        "ix_report_client_total_user_id_paid", "report_client_total", ["user_id", "paid"]
+    )
+    op.create_table(
+        "report_payment_method_total",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("user.id"), primary_key=True),
+        sa.Column("method", payment_method, primary_key=True),
+        sa.Column("payments", sa.Integer(), nullable=False),
+        sa.Column("amount", sa.Float(), nullable=False),
+    )
+
+    if op.get_bind().dialect.name == "postgresql":
+        month = "CAST(date_trunc('month', {}) AS DATE)"
+    else:
+        month = "date({}, 'start of month')"
+    op.execute(
+        "INSERT INTO report_monthly_total (user_id, month, invoiced, received) "
+        "SELECT user_id, month, SUM(invoiced), SUM(received) FROM ("
+        f"SELECT user_id, {month.format('issued_date')} AS month, total AS invoiced, 0.0 AS received FROM invoice "
+        f"UNION ALL SELECT user_id, {month.format('date')}, 0.0, amount FROM payment"
+        ") AS amounts GROUP BY user_id, month"
+    )
+    op.execute(
+        "INSERT INTO report_status_total (user_id, status, invoices, total, balance_due) "
+        "SELECT user_id, status, COUNT(*), SUM(total), SUM(balance_due) "
+        "FROM invoice GROUP BY user_id, status"
+    )
+    op.execute(
+        "INSERT INTO report_client_total (user_id, client_id, invoices, invoiced, paid, balance_due) "
+        "SELECT user_id, client_id, COUNT(*), SUM(total), SUM(amount_paid), SUM(balance_due) "
+        "FROM invoice GROUP BY user_id, client_id"
+    )
+    op.execute(
+        "INSERT INTO report_payment_method_total (user_id, method, payments, amount) "
+        "SELECT user_id, method, COUNT(*), SUM(amount) FROM payment GROUP BY user_id, method"
+    )
+
+
+def downgrade():
+    op.drop_table("report_payment_method_total")
+    op.drop_index("ix_report_client_total_user_id_paid", table_name="report_client_total")
+    op.drop_table("report_client_total")
+    op.drop_table("report_status_total")
+    op.drop_table("report_monthly_total")
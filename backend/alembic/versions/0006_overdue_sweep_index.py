@@ -0,0 +1,39 @@
+"""Index for the overdue sweep
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 18:00:00.000000
+
+The sweep looks for pending invoices past their due date across all users,
+which the per-user status index can't serve. Built CONCURRENTLY on
+PostgreSQL, as in 0002.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_invoice_status_due_date",
+            "invoice",
+            ["status", "due_date", "id"],
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_invoice_status_due_date",
+            table_name="invoice",
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
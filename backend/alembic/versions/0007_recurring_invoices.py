@@ -0,0 +1,90 @@
+"""Recurring invoices and invoice settings
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 19:00:00.000000
+
+Backs `python manage.py generate-recurring`, which replaces
+scripts/generate_recurring_invoices.js. Invoices remember the template and
+period they were generated for, unique together.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+
+def _timestamps():
+    return [
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(), nullable=False),
+    ]
+
+
+def upgrade():
+    op.create_table(
+        "recurringinvoice",
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column(
+            "frequency",
+            sa.Enum("WEEKLY", "MONTHLY", "QUARTERLY", "YEARLY", name="recurringfrequency"),
+            nullable=False,
+        ),
+        sa.Column("next_date", sa.Date(), nullable=False),
+        sa.Column("last_sent", sa.Date(), nullable=True),
+        sa.Column("template", sa.JSON(), nullable=False),
+        sa.Column("active", sa.Boolean(), nullable=False),
+        sa.Column("client_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["client_id"], ["client.id"]),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_recurringinvoice_id", "recurringinvoice", ["id"])
+    op.create_index("ix_recurringinvoice_user_id", "recurringinvoice", ["user_id"])
+    op.create_index(
+        "ix_recurringinvoice_active_next_date", "recurringinvoice", ["active", "next_date", "id"]
+    )
+    op.create_table(
+        "invoicesettings",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("invoice_prefix", sa.String(), nullable=False),
+        sa.Column("next_invoice_number", sa.Integer(), nullable=False),
+        sa.Column("default_due_days", sa.Integer(), nullable=False),
+        *_timestamps(),
+        sa.ForeignKeyConstraint(["user_id"], ["user.id"]),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("user_id"),
+    )
+    op.create_index("ix_invoicesettings_id", "invoicesettings", ["id"])
+    with op.batch_alter_table("invoice") as batch_op:
+        batch_op.add_column(sa.Column("recurring_invoice_id", sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column("recurring_period", sa.Date(), nullable=True))
+        batch_op.create_foreign_key(
+            "fk_invoice_recurring_invoice_id",
+            "recurringinvoice",
+            ["recurring_invoice_id"],
+            ["id"],
+            ondelete="SET NULL",
+        )
+        batch_op.create_unique_constraint(
+            "uq_invoice_recurring_period", ["recurring_invoice_id", "recurring_period"]
+        )
+
+
+def downgrade():
+    with op.batch_alter_table("invoice") as batch_op:
+        batch_op.drop_constraint("uq_invoice_recurring_period", type_="unique")
+        batch_op.drop_constraint("fk_invoice_recurring_invoice_id", type_="foreignkey")
+        batch_op.drop_column("recurring_period")
+        batch_op.drop_column("recurring_invoice_id")
+    op.drop_table("invoicesettings")
+    op.drop_table("recurringinvoice")
+    sa.Enum(name="recurringfrequency").drop(op.get_bind(), checkfirst=True)
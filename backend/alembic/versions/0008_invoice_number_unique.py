@@ -0,0 +1,54 @@
+"""Unique invoice numbers per user
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 20:00:00.000000
+
+This rewrites invoice numbers: numbers used more than once by a user keep
+their first invoice, and the others get "-<invoice id>" appended. A renamed
+number can itself be in use already (INV-1 of invoice 42 becomes INV-1-42,
+which someone may have typed in), so renaming repeats until no duplicates
+are left, before the index is built. On PostgreSQL the index is built
+CONCURRENTLY, as in 0002, and then attached as the constraint.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Each pass renames every duplicate but the first; a clash of a renamed
+    # number makes it a duplicate again for the next pass
+    while op.get_bind().execute(sa.text(
+        "UPDATE invoice SET number = number || '-' || id WHERE id NOT IN "
+        "(SELECT MIN(id) FROM invoice GROUP BY user_id, number)"
+    )).rowcount:
+        pass
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "uq_invoice_user_id_number",
+                "invoice",
+                ["user_id", "number"],
+                unique=True,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+        op.execute(
+            "ALTER TABLE invoice ADD CONSTRAINT uq_invoice_user_id_number "
+            "UNIQUE USING INDEX uq_invoice_user_id_number"
+        )
+    else:
+        with op.batch_alter_table("invoice") as batch_op:
+            batch_op.create_unique_constraint("uq_invoice_user_id_number", ["user_id", "number"])
+
+
+def downgrade():
+    with op.batch_alter_table("invoice") as batch_op:
+        batch_op.drop_constraint("uq_invoice_user_id_number", type_="unique")
@@ -0,0 +1,44 @@
+"""Indexes for the remaining list sort keys
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18 09:00:00.000000
+
+0002 covered keyset pagination by created_at and client name only; the
+invoice list also sorts by issued_date, due_date and total, and the
+payment list by date and amount, which sorted every row of the user.
+Built as in 0002.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # Keyset pagination on (sort key, id) within a user
+    ("ix_invoice_user_id_issued_date", "invoice", ["user_id", "issued_date", "id"]),
+    ("ix_invoice_user_id_due_date", "invoice", ["user_id", "due_date", "id"]),
+    ("ix_invoice_user_id_total", "invoice", ["user_id", "total", "id"]),
+    ("ix_payment_user_id_date", "payment", ["user_id", "date", "id"]),
+    ("ix_payment_user_id_amount", "payment", ["user_id", "amount", "id"]),
+]
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name, table, columns, if_not_exists=True, postgresql_concurrently=True
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, if_exists=True, postgresql_concurrently=True
+            )
@@ -0,0 +1,31 @@
+"""Day of the month recurring templates are anchored on
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18 12:00:00.000000
+
+Monthly, quarterly and yearly periods were computed from the previous,
+already clamped next_date, so a schedule on the 31st drifted to the 28th
+after February. Templates remember their day now; existing ones are
+anchored on the day of their next_date the next time they run, so one that
+already drifted stays on its current day until its anchor_day is set.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("recurringinvoice") as batch_op:
+        batch_op.add_column(sa.Column("anchor_day", sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table("recurringinvoice") as batch_op:
+        batch_op.drop_column("anchor_day")
@@ -1,40 +1,35 @@
+import secrets
+import time
 from typing import Optional
-import httpx
 from fastapi import Depends, HTTPException, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
 from app.core.config import settings
-from app.db.session import get_db
+from app.core.metrics import record_auth
+from app.db.session import DBSession, get_db, run_db
 from app.models.user import User
+from app.services.supabase_auth import get_supabase_user
+from app.services.users import (
+    cache_user,
+    get_cached_user,
+    load_user_record,
+    user_from_record,
+)
 
 # Use HTTPBearer for Supabase JWT tokens
 security = HTTPBearer()
 
-async def get_supabase_user(token: str) -> dict:
-    """
-    Verify a Supabase JWT token and get user information
-    """
-    url = f"{settings.SUPABASE_URL}/auth/v1/user"
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "apikey": settings.SUPABASE_ANON_KEY
-    }
-
-    async with httpx.AsyncClient() as client:
-        response = await client.get(url, headers=headers)
-        if response.status_code == 200:
-            return response.json()
-        return None
-
 async def get_current_user(
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ) -> User:
     """
     Get the current authenticated user using Supabase Auth
     """
     token = credentials.credentials
+    started = time.perf_counter()
     supabase_user = await get_supabase_user(token)
+    record_auth(time.perf_counter() - started)
 
     if not supabase_user:
         raise HTTPException(
@@ -43,23 +38,11 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    # Get user from our database
-    user = db.query(User).filter(User.id == supabase_user["id"]).first()
-
-    # If user doesn't exist in our database but exists in Supabase,
-    # create a new user record
-    if not user:
-        user = User(
-            id=supabase_user["id"],
-            email=supabase_user["email"],
-            full_name=supabase_user.get("user_metadata", {}).get("full_name", ""),
-            hashed_password="",  # We don't store the password, Supabase handles that
-            is_active=True,
-            is_superuser=False,
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+    user = get_cached_user(supabase_user["id"])
+    if user is None:
+        record = await run_db(db, load_user_record, supabase_user)
+        cache_user(record)
+        user = user_from_record(record)
 
     if not user.is_active:
         raise HTTPException(
@@ -69,7 +52,7 @@ async def get_current_user(
 
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """
     Get the current active user
     """
@@ -80,7 +63,7 @@ def get_current_active_user(current_user: User = Depends(get_current_user)) -> U
         )
     return current_user
 
-def get_current_active_superuser(current_user: User = Depends(get_current_user)) -> User:
+async def get_current_active_superuser(current_user: User = Depends(get_current_user)) -> User:
     """
     Get the current active superuser
     """
@@ -99,3 +82,26 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """
     user = db.query(User).filter(User.email == email).first()
     return user
+
+async def require_metrics_access(request: Request, db: DBSession = Depends(get_db)) -> None:
+    """
+    Guard internal metrics endpoints: they take METRICS_TOKEN when one is
+    configured, and otherwise only a superuser's access token
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
+    if settings.METRICS_TOKEN and secrets.compare_digest(
+        token.encode(), settings.METRICS_TOKEN.encode()
+    ):
+        return
+    credentials = HTTPAuthorizationCredentials(scheme=scheme, credentials=token)
+    user = await get_current_user(db, credentials)
+    if not user.is_superuser:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions",
+        )
@@ -0,0 +1,23 @@
+from typing import AsyncIterator, Callable
+from fastapi import Request
+from app.core import budgets
+from app.core.metrics import UNMATCHED_ROUTE
+
+
+def statement_budget(limit: int) -> Callable[..., AsyncIterator[None]]:
+    """
+    Dependency holding an endpoint to limit SQL statements per request,
+    serialization of the response included; add it to the route's
+    dependencies
+    """
+    async def dependency(request: Request) -> AsyncIterator[None]:
+        # Async so the budget is set in the request's own context, and
+        # torn down after the response has been sent
+        budget = budgets.start(limit)
+        try:
+            yield
+        finally:
+            route = request.scope.get("route")
+            budgets.finish(budget, request.method, route.path if route is not None else UNMATCHED_ROUTE)
+
+    return dependency
@@ -0,0 +1,98 @@
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+from fastapi import HTTPException, Request, Response, status
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, TypeAdapter
+from app.api.dependencies.conditional import is_fresh
+from app.core.response_cache import response_cache
+
+# Response header telling whether the body came from the response cache
+CACHE_HEADER = "X-Cache"
+
+# Headers Response sets again from the body
+_BODY_HEADERS = ("content-length", "content-type")
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(schema: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+# Query parameter defaults of each cached route, by its unique_id
+_defaults: Dict[str, Dict[str, Optional[str]]] = {}
+
+
+def _params(request: Request, route: APIRoute) -> List[Tuple[str, str]]:
+    """
+    The query parameters the route declares, without those set to their
+    default, so equivalent URLs share an entry
+    """
+    defaults = _defaults.get(route.unique_id)
+    if defaults is None:
+        defaults = _defaults[route.unique_id] = {
+            param.alias: None if param.required or param.default is None else str(param.default)
+            for param in route.dependant.query_params
+        }
+    return [
+        (name, value)
+        for name, value in request.query_params.multi_items()
+        if name in defaults and value != defaults[name]
+    ]
+
+
+async def cached_list(
+    request: Request,
+    response: Response,
+    user_id: int,
+    schema: Type[BaseModel],
+    read: Callable[[], Awaitable[Any]],
+) -> Any:
+    """
+    Serve a list of the user's rows from the response cache, or await
+    read() and cache what it returns
+
+    read() returns the rows, serialized here as a list of schema, or a
+    Response of its own; the headers set on response (ETag, X-Next-Cursor)
+    are cached with the body. A hit matching If-None-Match answers 304.
+    """
+    if not response_cache.enabled:
+        return await read()
+    route = request.scope["route"]
+    key = await response_cache.key(user_id, route.path, _params(request, route))
+    if key is None:
+        return await read()
+
+    cached = await response_cache.get(key)
+    if cached is not None:
+        body, headers = cached
+        headers[CACHE_HEADER] = "HIT"
+        tag = headers.get("etag")
+        if tag and is_fresh(request, tag):
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+
+    result = await read()
+    if not isinstance(result, Response):
+        adapter = _list_adapter(schema)
+        result = Response(
+            adapter.dump_json(adapter.validate_python(result)),
+            media_type="application/json",
+            headers=dict(response.headers),
+        )
+    headers = {name: value for name, value in result.headers.items() if name not in _BODY_HEADERS}
+    await response_cache.set(key, result.body, headers)
+    result.headers[CACHE_HEADER] = "MISS"
+    return result
+
+
+@asynccontextmanager
+async def invalidates_responses(user_id: int) -> AsyncIterator[None]:
+    """
+    Invalidate the user's cached responses once the write in the block is
+    done, committed or not, and before its response is sent
+    """
+    try:
+        yield
+    finally:
+        await response_cache.invalidate(user_id)
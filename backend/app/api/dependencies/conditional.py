@@ -0,0 +1,74 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime
+from typing import Any, Callable, Dict, TypeVar
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy.orm import Session
+from app.db.session import DBSession, run_db
+from app.services.versions import Version
+
+T = TypeVar("T")
+
+# Let clients keep responses but revalidate them before each reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def etag(request: Request, user_id: int, version: Version) -> str:
+    """
+    Weak ETag of a response: the version of its rows, for this user and URL,
+    so every page, filter and sort order gets its own
+    """
+    updated_at = version.updated_at.isoformat() if version.updated_at else ""
+    key = f"{user_id}|{request.url.path}?{request.url.query}|{updated_at}|{version.count}"
+    return 'W/"' + hashlib.blake2b(key.encode(), digest_size=16).hexdigest() + '"'
+
+
+def is_fresh(request: Request, tag: str) -> bool:
+    """
+    Whether If-None-Match names tag, compared weakly
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = tag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+def validators(tag: str, version: Version) -> Dict[str, str]:
+    headers = {"ETag": tag, "Cache-Control": CACHE_CONTROL}
+    if version.updated_at:
+        updated_at = version.updated_at.replace(tzinfo=timezone.utc)
+        headers["Last-Modified"] = format_datetime(updated_at, usegmt=True)
+    return headers
+
+
+async def conditional_read(
+    request: Request,
+    response: Response,
+    db: DBSession,
+    user_id: int,
+    version: Callable[[Session, int], Version],
+    read: Callable[[Session, int], T],
+) -> T:
+    """
+    Return read(session, user_id) with validators, or answer 304 Not Modified
+    without calling it when If-None-Match carries the current ETag
+
+    version(session, user_id) is a cheap aggregate over the rows read() would
+    load; both run in one run_db call.
+    """
+    def run(session: Session) -> Any:
+        current = version(session, user_id)
+        tag = etag(request, user_id, current)
+        if current.count and is_fresh(request, tag):
+            return current, tag, None, False
+        return current, tag, read(session, user_id), True
+
+    current, tag, result, modified = await run_db(db, run)
+    headers = validators(tag, current)
+    if not modified:
+        raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return result
@@ -0,0 +1,22 @@
+from typing import Any, Sequence, Type
+from fastapi import Response
+from pydantic import BaseModel
+from app.schemas.sparse import sparse_adapter
+
+FIELDS_DESCRIPTION = "Comma-separated fields to return; id is always included"
+
+
+def sparse_response(
+    response: Response,
+    schema: Type[BaseModel],
+    names: Sequence[str],
+    content: Any,
+    many: bool = False,
+) -> Response:
+    """
+    Serialize content with only the named fields of schema, keeping the
+    headers already set on response
+    """
+    adapter = sparse_adapter(schema, tuple(names), many)
+    body = adapter.dump_json(adapter.validate_python(content))
+    return Response(body, media_type="application/json", headers=dict(response.headers))
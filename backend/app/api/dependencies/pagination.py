@@ -0,0 +1,15 @@
+from typing import Any, List
+from fastapi import Response
+from app.services.pagination import Page
+
+# Response header carrying the cursor of the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def page_items(response: Response, page: Page) -> List[Any]:
+    """
+    Publish the page's next cursor as a header and return its rows
+    """
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
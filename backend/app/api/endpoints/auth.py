@@ -1,8 +1,8 @@
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
 from app.api.dependencies.auth import get_current_user
-from app.db.session import get_db
+from app.api.dependencies.budgets import statement_budget
+from app.db.session import DBSession, get_db
 from app.models.user import User
 from app.schemas.user import User as UserSchema
 
@@ -46,9 +46,9 @@ async def logout_proxy():
         "message": "Logout is handled by Supabase Auth on the frontend"
     }
 
-@router.get("/me", response_model=UserSchema)
+@router.get("/me", response_model=UserSchema, dependencies=[Depends(statement_budget(3))])
 async def get_current_user_info(
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
     """
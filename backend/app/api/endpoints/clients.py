@@ -1,83 +1,140 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from functools import partial
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
 from app.api.dependencies.auth import get_current_active_user
-from app.db.session import get_db
-from app.models.client import Client
+from app.api.dependencies.budgets import statement_budget
+from app.api.dependencies.cache import cached_list, invalidates_responses
+from app.api.dependencies.conditional import conditional_read
+from app.api.dependencies.fields import FIELDS_DESCRIPTION, sparse_response
+from app.api.dependencies.pagination import page_items
+from app.db.session import DBSession, get_db, run_db
 from app.models.user import User
 from app.schemas.client import Client as ClientSchema, ClientCreate, ClientUpdate
+from app.services import clients as clients_service
+from app.services.fields import parse_fields
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[ClientSchema])
-def read_clients(
-    db: Session = Depends(get_db),
+@router.get("", response_model=List[ClientSchema], dependencies=[Depends(statement_budget(5))])
+async def read_clients(
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: Literal["created_at", "name"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
     search: str = Query(None, description="Search by name or email"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve clients for the current user
+
+    Pass the X-Next-Cursor response header back as cursor to get the next
+    page by keyset instead of skip. Send the ETag back as If-None-Match to
+    get a 304 if none of the matching clients changed.
     """
-    query = db.query(Client).filter(Client.user_id == current_user.id)
-    
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            (Client.name.ilike(search_term)) | (Client.email.ilike(search_term))
+    columns = parse_fields(fields, clients_service.FIELD_COLUMNS)
+
+    async def read() -> Any:
+        page = await conditional_read(
+            request,
+            response,
+            db,
+            current_user.id,
+            partial(clients_service.clients_version, search=search),
+            partial(
+                clients_service.list_clients,
+                skip=skip,
+                limit=limit,
+                search=search,
+                sort=sort,
+                order=order,
+                cursor=cursor,
+                fields=columns,
+            ),
         )
-    
-    clients = query.offset(skip).limit(limit).all()
-    return clients
+        items = page_items(response, page)
+        if columns is None:
+            return items
+        return sparse_response(response, ClientSchema, columns, items, many=True)
 
+    return await cached_list(request, response, current_user.id, ClientSchema, read)
 
-@router.post("", response_model=ClientSchema)
-def create_client(
+
+@router.post("", response_model=ClientSchema, dependencies=[Depends(statement_budget(5))])
+async def create_client(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     client_in: ClientCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Create new client
     """
-    client = Client(
-        **client_in.dict(),
-        user_id=current_user.id,
+    async with invalidates_responses(current_user.id):
+        return await run_db(db, clients_service.create_client, current_user.id, client_in)
+
+
+@router.get(
+    "/search", response_model=List[ClientSchema], dependencies=[Depends(statement_budget(4))]
+)
+async def search_clients(
+    *,
+    db: DBSession = Depends(get_db),
+    q: str = Query(..., min_length=1, description="Part of a name or email"),
+    mode: Literal["search", "prefix"] = "search",
+    limit: int = Query(10, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Search clients by name or email, best matches first
+
+    Use mode=prefix for autocomplete.
+    """
+    return await run_db(
+        db, clients_service.search_clients, current_user.id, q, mode=mode, limit=limit
     )
-    db.add(client)
-    db.commit()
-    db.refresh(client)
-    return client
 
 
-@router.get("/{client_id}", response_model=ClientSchema)
-def read_client(
+@router.get(
+    "/{client_id}", response_model=ClientSchema, dependencies=[Depends(statement_budget(5))]
+)
+async def read_client(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db),
     client_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get client by ID
+    Get client by ID, or 304 if it matches If-None-Match
     """
-    client = db.query(Client).filter(
-        Client.id == client_id, Client.user_id == current_user.id
-    ).first()
-    if not client:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Client not found",
-        )
-    return client
+    columns = parse_fields(fields, clients_service.FIELD_COLUMNS)
+    client = await conditional_read(
+        request,
+        response,
+        db,
+        current_user.id,
+        partial(clients_service.client_version, client_id=client_id),
+        partial(clients_service.get_client, client_id=client_id, fields=columns),
+    )
+    if columns is None:
+        return client
+    return sparse_response(response, ClientSchema, columns, client)
 
 
-@router.put("/{client_id}", response_model=ClientSchema)
-def update_client(
+@router.put(
+    "/{client_id}", response_model=ClientSchema, dependencies=[Depends(statement_budget(6))]
+)
+async def update_client(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     client_id: int,
     client_in: ClientUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -85,44 +142,23 @@ def update_client(
     """
     Update client
     """
-    client = db.query(Client).filter(
-        Client.id == client_id, Client.user_id == current_user.id
-    ).first()
-    if not client:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Client not found",
+    async with invalidates_responses(current_user.id):
+        return await run_db(
+            db, clients_service.update_client, current_user.id, client_id, client_in
         )
-    
-    update_data = client_in.dict(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(client, field, value)
-    
-    db.add(client)
-    db.commit()
-    db.refresh(client)
-    return client
-
-
-@router.delete("/{client_id}", response_model=ClientSchema)
-def delete_client(
+
+
+@router.delete(
+    "/{client_id}", response_model=ClientSchema, dependencies=[Depends(statement_budget(16))]
+)
+async def delete_client(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     client_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Delete client
     """
-    client = db.query(Client).filter(
-        Client.id == client_id, Client.user_id == current_user.id
-    ).first()
-    if not client:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Client not found",
-        )
-    
-    db.delete(client)
-    db.commit()
-    return client
+    async with invalidates_responses(current_user.id):
+        return await run_db(db, clients_service.delete_client, current_user.id, client_id)
@@ -0,0 +1,40 @@
+from datetime import date
+from typing import Literal
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
+from app.api.dependencies.auth import get_current_active_user
+from app.models.invoice import InvoiceStatus
+from app.models.user import User
+from app.services import exports as exports_service
+
+router = APIRouter()
+
+
+@router.get("/{entity}")
+async def export(
+    entity: Literal["invoices", "items", "payments"],
+    format: Literal["csv", "ndjson", "xlsx"] = "csv",
+    status: InvoiceStatus = Query(None, description="Only rows of invoices with this status"),
+    client_id: int = Query(None, description="Only rows of this client's invoices"),
+    invoice_id: int = Query(None, description="Only rows of this invoice"),
+    current_user: User = Depends(get_current_active_user),
+) -> StreamingResponse:
+    """
+    Download all of the current user's invoices, invoice items or payments
+
+    The file is streamed as rows are read, however many there are.
+    """
+    media_type, extension = exports_service.FORMATS[format]
+    filename = f"{entity}-{date.today().isoformat()}.{extension}"
+    return StreamingResponse(
+        exports_service.stream_export(
+            entity,
+            format,
+            current_user.id,
+            status=status,
+            client_id=client_id,
+            invoice_id=invoice_id,
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
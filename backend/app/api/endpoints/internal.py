@@ -0,0 +1,50 @@
+from typing import Any
+from fastapi import APIRouter, Depends
+from app.api.dependencies.auth import require_metrics_access
+from app.core import http
+from app.core.response_cache import response_cache
+from app.core.sweeper import sweeper_stats
+from app.db import session
+from app.services.supabase_auth import claims_cache
+from app.services.users import user_cache
+
+router = APIRouter(dependencies=[Depends(require_metrics_access)])
+
+
+@router.get("/http-pool")
+async def read_http_pool_stats() -> Any:
+    """
+    Connection pool statistics of the shared outbound HTTP client
+    """
+    return http.pool_stats()
+
+
+@router.get("/db-pool")
+async def read_db_pool_stats() -> Any:
+    """
+    Checkout wait times, usage and timeouts of the database connection pools
+    """
+    stats = {"sync": session.pool_metrics.snapshot(session.engine.pool)}
+    if session.async_engine is not None:
+        stats["async"] = session.async_pool_metrics.snapshot(session.async_engine.sync_engine.pool)
+    return stats
+
+
+@router.get("/caches")
+async def read_cache_stats() -> Any:
+    """
+    Size and hit ratio of the in-process caches
+    """
+    return {
+        "auth_claims": claims_cache.stats(),
+        "users": user_cache.stats(),
+        "responses": response_cache.stats(),
+    }
+
+
+@router.get("/overdue-sweeper")
+async def read_overdue_sweeper_stats() -> Any:
+    """
+    Runs of the overdue sweep and how many invoices it marked
+    """
+    return sweeper_stats()
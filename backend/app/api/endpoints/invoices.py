@@ -1,92 +1,161 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session, joinedload
+from functools import partial
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import APIRouter, Body, Depends, Query, Request, Response
 from app.api.dependencies.auth import get_current_active_user
-from app.db.session import get_db
-from app.models.invoice import Invoice, InvoiceStatus
-from app.models.invoice_item import InvoiceItem
+from app.api.dependencies.budgets import statement_budget
+from app.api.dependencies.cache import cached_list, invalidates_responses
+from app.api.dependencies.conditional import conditional_read
+from app.api.dependencies.fields import FIELDS_DESCRIPTION, sparse_response
+from app.api.dependencies.pagination import page_items
+from app.db.session import DBSession, get_db, run_db
+from app.models.invoice import InvoiceStatus
 from app.models.user import User
-from app.schemas.invoice import Invoice as InvoiceSchema, InvoiceCreate, InvoiceUpdate
+from app.schemas.invoice import (
+    Invoice as InvoiceSchema,
+    InvoiceBulkResult,
+    InvoiceCreate,
+    InvoiceUpdate,
+)
+from app.services import invoices as invoices_service
+from app.services.fields import parse_fields
 
 router = APIRouter()
 
+# Relationships embedded in invoices read without an include parameter
+INCLUDE_DEFAULT = "items"
+INCLUDE_DESCRIPTION = (
+    "Comma-separated relationships to embed: items, payments, client; empty for none"
+)
 
-@router.get("", response_model=List[InvoiceSchema])
-def read_invoices(
-    db: Session = Depends(get_db),
+
+@router.get("", response_model=List[InvoiceSchema], dependencies=[Depends(statement_budget(10))])
+async def read_invoices(
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: Literal["created_at", "issued_date", "due_date", "number", "total"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
     status: InvoiceStatus = Query(None, description="Filter by status"),
     client_id: int = Query(None, description="Filter by client"),
+    include: str = Query(INCLUDE_DEFAULT, description=INCLUDE_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve invoices for the current user
+
+    Pass the X-Next-Cursor response header back as cursor to get the next
+    page by keyset instead of skip. Send the ETag back as If-None-Match to
+    get a 304 if none of the matching invoices changed.
     """
-    query = db.query(Invoice).filter(Invoice.user_id == current_user.id)
-    
-    if status:
-        query = query.filter(Invoice.status == status)
-    
-    if client_id:
-        query = query.filter(Invoice.client_id == client_id)
-    
-    invoices = query.options(joinedload(Invoice.items)).offset(skip).limit(limit).all()
-    return invoices
-
-
-@router.post("", response_model=InvoiceSchema)
-def create_invoice(
+    names = invoices_service.parse_include(include)
+    columns = parse_fields(fields, invoices_service.FIELD_COLUMNS)
+
+    async def read() -> Any:
+        page = await conditional_read(
+            request,
+            response,
+            db,
+            current_user.id,
+            partial(
+                invoices_service.invoices_version, status=status, client_id=client_id, include=names
+            ),
+            partial(
+                invoices_service.list_invoices,
+                skip=skip,
+                limit=limit,
+                status=status,
+                client_id=client_id,
+                sort=sort,
+                order=order,
+                cursor=cursor,
+                include=names,
+                fields=columns,
+            ),
+        )
+        items = page_items(response, page)
+        if columns is None:
+            return items
+        return sparse_response(response, InvoiceSchema, columns + names, items, many=True)
+
+    return await cached_list(request, response, current_user.id, InvoiceSchema, read)
+
+
+@router.post("", response_model=InvoiceSchema, dependencies=[Depends(statement_budget(14))])
+async def create_invoice(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     invoice_in: InvoiceCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Create new invoice
     """
-    # Create invoice
-    invoice_data = invoice_in.dict(exclude={"items"})
-    invoice = Invoice(**invoice_data, user_id=current_user.id)
-    db.add(invoice)
-    db.flush()  # Get the invoice ID without committing
-    
-    # Create invoice items
-    for item_data in invoice_in.items:
-        item = InvoiceItem(**item_data.dict(), invoice_id=invoice.id)
-        db.add(item)
-    
-    db.commit()
-    db.refresh(invoice)
-    return invoice
-
-
-@router.get("/{invoice_id}", response_model=InvoiceSchema)
-def read_invoice(
+    async with invalidates_responses(current_user.id):
+        return await run_db(db, invoices_service.create_invoice, current_user.id, invoice_in)
+
+
+@router.post("/bulk", response_model=InvoiceBulkResult)
+async def create_invoices_bulk(
     *,
-    db: Session = Depends(get_db),
-    invoice_id: int,
+    db: DBSession = Depends(get_db),
+    invoices_in: List[Dict[str, Any]] = Body(..., description="InvoiceCreate payloads"),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get invoice by ID
+    Create many invoices at once
+
+    Each row is validated on its own: rejected rows are listed in errors by
+    their index and every other row is created.
     """
-    invoice = db.query(Invoice).filter(
-        Invoice.id == invoice_id, Invoice.user_id == current_user.id
-    ).options(joinedload(Invoice.items)).first()
-    
-    if not invoice:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice not found",
+    async with invalidates_responses(current_user.id):
+        return await run_db(
+            db, invoices_service.bulk_create_invoices, current_user.id, invoices_in
         )
-    return invoice
 
 
-@router.put("/{invoice_id}", response_model=InvoiceSchema)
-def update_invoice(
+@router.get(
+    "/{invoice_id}", response_model=InvoiceSchema, dependencies=[Depends(statement_budget(10))]
+)
+async def read_invoice(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db),
+    invoice_id: int,
+    include: str = Query(INCLUDE_DEFAULT, description=INCLUDE_DESCRIPTION),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get invoice by ID, or 304 if it matches If-None-Match
+    """
+    names = invoices_service.parse_include(include)
+    columns = parse_fields(fields, invoices_service.FIELD_COLUMNS)
+    invoice = await conditional_read(
+        request,
+        response,
+        db,
+        current_user.id,
+        partial(invoices_service.invoice_version, invoice_id=invoice_id, include=names),
+        partial(
+            invoices_service.get_invoice, invoice_id=invoice_id, include=names, fields=columns
+        ),
+    )
+    if columns is None:
+        return invoice
+    return sparse_response(response, InvoiceSchema, columns + names, invoice)
+
+
+@router.put(
+    "/{invoice_id}", response_model=InvoiceSchema, dependencies=[Depends(statement_budget(12))]
+)
+async def update_invoice(
+    *,
+    db: DBSession = Depends(get_db),
     invoice_id: int,
     invoice_in: InvoiceUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -94,57 +163,23 @@ def update_invoice(
     """
     Update invoice
     """
-    invoice = db.query(Invoice).filter(
-        Invoice.id == invoice_id, Invoice.user_id == current_user.id
-    ).first()
-    
-    if not invoice:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice not found",
+    async with invalidates_responses(current_user.id):
+        return await run_db(
+            db, invoices_service.update_invoice, current_user.id, invoice_id, invoice_in
         )
-    
-    # Update invoice fields
-    update_data = invoice_in.dict(exclude={"items"}, exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(invoice, field, value)
-    
-    # Update items if provided
-    if invoice_in.items is not None:
-        # Delete existing items
-        db.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice.id).delete()
-        
-        # Create new items
-        for item_data in invoice_in.items:
-            item = InvoiceItem(**item_data.dict(), invoice_id=invoice.id)
-            db.add(item)
-    
-    db.add(invoice)
-    db.commit()
-    db.refresh(invoice)
-    return invoice
-
-
-@router.delete("/{invoice_id}", response_model=InvoiceSchema)
-def delete_invoice(
+
+
+@router.delete(
+    "/{invoice_id}", response_model=InvoiceSchema, dependencies=[Depends(statement_budget(13))]
+)
+async def delete_invoice(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     invoice_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Delete invoice
     """
-    invoice = db.query(Invoice).filter(
-        Invoice.id == invoice_id, Invoice.user_id == current_user.id
-    ).first()
-    
-    if not invoice:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice not found",
-        )
-    
-    db.delete(invoice)
-    db.commit()
-    return invoice
+    async with invalidates_responses(current_user.id):
+        return await run_db(db, invoices_service.delete_invoice, current_user.id, invoice_id)
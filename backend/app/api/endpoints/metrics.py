@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Response
+from app.api.dependencies.auth import require_metrics_access
+from app.core.metrics import metrics
+
+router = APIRouter(dependencies=[Depends(require_metrics_access)])
+
+# Content type of the Prometheus text exposition format (Starlette adds the charset)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+@router.get("", response_class=Response)
+async def read_metrics() -> Response:
+    """
+    Per-route latency histograms, status codes, SQL statements and time, and
+    upstream auth time of this process, for Prometheus to scrape
+    """
+    return Response(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -1,103 +1,119 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from functools import partial
+from typing import Any, List, Literal, Optional
+from fastapi import APIRouter, Depends, Query, Request, Response
 from app.api.dependencies.auth import get_current_active_user
-from app.db.session import get_db
-from app.models.payment import Payment
-from app.models.invoice import Invoice, InvoiceStatus
+from app.api.dependencies.budgets import statement_budget
+from app.api.dependencies.cache import cached_list, invalidates_responses
+from app.api.dependencies.conditional import conditional_read
+from app.api.dependencies.fields import FIELDS_DESCRIPTION, sparse_response
+from app.api.dependencies.pagination import page_items
+from app.db.session import DBSession, get_db, run_db
 from app.models.user import User
 from app.schemas.payment import Payment as PaymentSchema, PaymentCreate, PaymentUpdate
+from app.services import payments as payments_service
+from app.services.fields import parse_fields
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[PaymentSchema])
-def read_payments(
-    db: Session = Depends(get_db),
+@router.get("", response_model=List[PaymentSchema], dependencies=[Depends(statement_budget(5))])
+async def read_payments(
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: Literal["created_at", "date", "amount"] = "created_at",
+    order: Literal["asc", "desc"] = "asc",
     invoice_id: int = Query(None, description="Filter by invoice"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve payments for the current user
+
+    Pass the X-Next-Cursor response header back as cursor to get the next
+    page by keyset instead of skip. Send the ETag back as If-None-Match to
+    get a 304 if none of the matching payments changed.
     """
-    query = db.query(Payment).filter(Payment.user_id == current_user.id)
-    
-    if invoice_id:
-        query = query.filter(Payment.invoice_id == invoice_id)
-    
-    payments = query.offset(skip).limit(limit).all()
-    return payments
+    columns = parse_fields(fields, payments_service.FIELD_COLUMNS)
+
+    async def read() -> Any:
+        page = await conditional_read(
+            request,
+            response,
+            db,
+            current_user.id,
+            partial(payments_service.payments_version, invoice_id=invoice_id),
+            partial(
+                payments_service.list_payments,
+                skip=skip,
+                limit=limit,
+                invoice_id=invoice_id,
+                sort=sort,
+                order=order,
+                cursor=cursor,
+                fields=columns,
+            ),
+        )
+        items = page_items(response, page)
+        if columns is None:
+            return items
+        return sparse_response(response, PaymentSchema, columns, items, many=True)
+
+    return await cached_list(request, response, current_user.id, PaymentSchema, read)
 
 
-@router.post("", response_model=PaymentSchema)
-def create_payment(
+@router.post("", response_model=PaymentSchema, dependencies=[Depends(statement_budget(12))])
+async def create_payment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     payment_in: PaymentCreate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Create new payment
     """
-    # Check if invoice exists and belongs to user
-    invoice = db.query(Invoice).filter(
-        Invoice.id == payment_in.invoice_id, Invoice.user_id == current_user.id
-    ).first()
-    
-    if not invoice:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Invoice not found",
-        )
-    
-    # Create payment
-    payment = Payment(**payment_in.dict(), user_id=current_user.id)
-    db.add(payment)
-    
-    # Update invoice status if payment covers the total
-    total_paid = db.query(Payment).filter(
-        Payment.invoice_id == invoice.id
-    ).with_entities(db.func.sum(Payment.amount)).scalar() or 0
-    
-    total_paid += payment_in.amount
-    
-    if total_paid >= invoice.total:
-        invoice.status = InvoiceStatus.PAID
-        db.add(invoice)
-    
-    db.commit()
-    db.refresh(payment)
-    return payment
+    async with invalidates_responses(current_user.id):
+        return await run_db(db, payments_service.create_payment, current_user.id, payment_in)
 
 
-@router.get("/{payment_id}", response_model=PaymentSchema)
-def read_payment(
+@router.get(
+    "/{payment_id}", response_model=PaymentSchema, dependencies=[Depends(statement_budget(5))]
+)
+async def read_payment(
     *,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: DBSession = Depends(get_db),
     payment_id: int,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
-    Get payment by ID
+    Get payment by ID, or 304 if it matches If-None-Match
     """
-    payment = db.query(Payment).filter(
-        Payment.id == payment_id, Payment.user_id == current_user.id
-    ).first()
-    
-    if not payment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Payment not found",
-        )
-    return payment
+    columns = parse_fields(fields, payments_service.FIELD_COLUMNS)
+    payment = await conditional_read(
+        request,
+        response,
+        db,
+        current_user.id,
+        partial(payments_service.payment_version, payment_id=payment_id),
+        partial(payments_service.get_payment, payment_id=payment_id, fields=columns),
+    )
+    if columns is None:
+        return payment
+    return sparse_response(response, PaymentSchema, columns, payment)
 
 
-@router.put("/{payment_id}", response_model=PaymentSchema)
-def update_payment(
+@router.put(
+    "/{payment_id}", response_model=PaymentSchema, dependencies=[Depends(statement_budget(12))]
+)
+async def update_payment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     payment_id: int,
     payment_in: PaymentUpdate,
     current_user: User = Depends(get_current_active_user),
@@ -105,76 +121,23 @@ def update_payment(
     """
     Update payment
     """
-    payment = db.query(Payment).filter(
-        Payment.id == payment_id, Payment.user_id == current_user.id
-    ).first()
-    
-    if not payment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Payment not found",
+    async with invalidates_responses(current_user.id):
+        return await run_db(
+            db, payments_service.update_payment, current_user.id, payment_id, payment_in
         )
-    
-    # Update payment fields
-    update_data = payment_in.dict(exclude_unset=True)
-    
-    # If invoice_id is being changed, verify the new invoice exists and belongs to user
-    if "invoice_id" in update_data and update_data["invoice_id"] != payment.invoice_id:
-        invoice = db.query(Invoice).filter(
-            Invoice.id == update_data["invoice_id"], Invoice.user_id == current_user.id
-        ).first()
-        
-        if not invoice:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Invoice not found",
-            )
-    
-    for field, value in update_data.items():
-        setattr(payment, field, value)
-    
-    db.add(payment)
-    db.commit()
-    db.refresh(payment)
-    return payment
 
 
-@router.delete("/{payment_id}", response_model=PaymentSchema)
-def delete_payment(
+@router.delete(
+    "/{payment_id}", response_model=PaymentSchema, dependencies=[Depends(statement_budget(11))]
+)
+async def delete_payment(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     payment_id: int,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Delete payment
     """
-    payment = db.query(Payment).filter(
-        Payment.id == payment_id, Payment.user_id == current_user.id
-    ).first()
-    
-    if not payment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Payment not found",
-        )
-    
-    # Get the invoice to update its status after payment deletion
-    invoice_id = payment.invoice_id
-    
-    db.delete(payment)
-    db.commit()
-    
-    # Update invoice status after payment deletion
-    invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
-    if invoice:
-        total_paid = db.query(Payment).filter(
-            Payment.invoice_id == invoice.id
-        ).with_entities(db.func.sum(Payment.amount)).scalar() or 0
-        
-        if total_paid < invoice.total and invoice.status == InvoiceStatus.PAID:
-            invoice.status = InvoiceStatus.PENDING
-            db.add(invoice)
-            db.commit()
-    
-    return payment
+    async with invalidates_responses(current_user.id):
+        return await run_db(db, payments_service.delete_payment, current_user.id, payment_id)
@@ -0,0 +1,32 @@
+from typing import Any
+from fastapi import APIRouter, Depends, Query
+from app.api.dependencies.auth import get_current_active_user
+from app.api.dependencies.budgets import statement_budget
+from app.db.session import DBSession, get_db, run_db
+from app.models.user import User
+from app.schemas.report import ReportSummary
+from app.services import reports as reports_service
+
+router = APIRouter()
+
+
+@router.get("/summary", response_model=ReportSummary, dependencies=[Depends(statement_budget(7))])
+async def read_summary(
+    db: DBSession = Depends(get_db),
+    months: int = Query(12, ge=1, le=60, description="Months of revenue to return, ending with this one"),
+    top_clients: int = Query(5, ge=1, le=50, description="Clients to return, by amount paid"),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Dashboard summary for the current user
+
+    Read from rollups kept up to date by every invoice and payment write, so
+    the cost doesn't grow with the number of invoices.
+    """
+    return await run_db(
+        db,
+        reports_service.get_summary,
+        current_user.id,
+        months=months,
+        top_clients=top_clients,
+    )
@@ -1,17 +1,17 @@
 from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends
 from app.api.dependencies.auth import get_current_active_user, get_current_active_superuser
-from app.core.security import get_password_hash
-from app.db.session import get_db
+from app.api.dependencies.budgets import statement_budget
+from app.db.session import DBSession, get_db, run_db
 from app.models.user import User
 from app.schemas.user import User as UserSchema, UserCreate, UserUpdate
+from app.services import users as users_service
 
 router = APIRouter()
 
 
-@router.get("/me", response_model=UserSchema)
-def read_user_me(
+@router.get("/me", response_model=UserSchema, dependencies=[Depends(statement_budget(3))])
+async def read_user_me(
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -20,41 +20,22 @@ def read_user_me(
     return current_user
 
 
-@router.put("/me", response_model=UserSchema)
-def update_user_me(
+@router.put("/me", response_model=UserSchema, dependencies=[Depends(statement_budget(5))])
+async def update_user_me(
     *,
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
     user_in: UserUpdate,
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Update current user
     """
-    if user_in.email is not None:
-        # Check if email is already taken
-        user = db.query(User).filter(User.email == user_in.email).first()
-        if user and user.id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email already registered",
-            )
-        current_user.email = user_in.email
-    
-    if user_in.full_name is not None:
-        current_user.full_name = user_in.full_name
-    
-    if user_in.password is not None:
-        current_user.hashed_password = get_password_hash(user_in.password)
-    
-    db.add(current_user)
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    return await run_db(db, users_service.update_user, current_user, user_in)
 
 
-@router.get("", response_model=List[UserSchema])
-def read_users(
-    db: Session = Depends(get_db),
+@router.get("", response_model=List[UserSchema], dependencies=[Depends(statement_budget(4))])
+async def read_users(
+    db: DBSession = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     current_user: User = Depends(get_current_active_superuser),
@@ -62,28 +43,16 @@ def read_users(
     """
     Retrieve users (superuser only)
     """
-    users = db.query(User).offset(skip).limit(limit).all()
-    return users
+    return await run_db(db, users_service.list_users, skip=skip, limit=limit)
 
 
-@router.get("/{user_id}", response_model=UserSchema)
-def read_user_by_id(
+@router.get("/{user_id}", response_model=UserSchema, dependencies=[Depends(statement_budget(4))])
+async def read_user_by_id(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db),
+    db: DBSession = Depends(get_db),
 ) -> Any:
     """
     Get a specific user by id
     """
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found",
-        )
-    if user.id != current_user.id and not current_user.is_superuser:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not enough permissions",
-        )
-    return user
+    return await run_db(db, users_service.get_user, current_user, user_id)
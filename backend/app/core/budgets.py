@@ -0,0 +1,123 @@
+import logging
+import re
+from collections import Counter
+from contextvars import ContextVar
+from typing import Any, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Distinct statements listed in a budget report, most frequent first
+REPORT_FINGERPRINTS = 5
+
+# Bound parameters of every supported driver: ?, $1, %s and %(name)s
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|%s")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_ROWS = re.compile(r"\(\.\.\.\)(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+class StatementBudgetExceeded(Exception):
+    """A request ran more SQL statements than its endpoint allows (strict mode)"""
+
+
+class LazyLoadInRequest(Exception):
+    """A relationship was lazy loaded while serving a budgeted request (strict mode)"""
+
+
+def fingerprint(statement: str) -> str:
+    """
+    A statement with its literals and parameters replaced, so the queries
+    of an N+1 loop all come out the same
+    """
+    statement = _SPACE.sub(" ", statement).strip()
+    statement = _LITERAL.sub("?", _PLACEHOLDER.sub("?", statement))
+    return _ROWS.sub("(...)", _LIST.sub("...", statement).replace("(?)", "(...)"))
+
+
+class StatementBudget:
+    """The statements one request may run, and the ones it ran so far"""
+
+    __slots__ = ("limit", "statements", "lazy_loads")
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.statements: List[str] = []
+        self.lazy_loads: List[str] = []
+
+    @property
+    def exceeded(self) -> bool:
+        return len(self.statements) > self.limit
+
+    def report(self) -> str:
+        """
+        The statement count against the limit, with the most repeated
+        statement fingerprints and any lazy loads
+        """
+        counts = Counter(fingerprint(statement) for statement in self.statements)
+        lines = [f"{len(self.statements)} SQL statements, budget {self.limit}"]
+        lines += [f"  {count} x {text}" for text, count in counts.most_common(REPORT_FINGERPRINTS)]
+        lines += [f"  lazy load of {name}" for name in self.lazy_loads]
+        return "\n".join(lines)
+
+
+# Budget of the request being handled, set by its endpoint's statement_budget
+# dependency; the threadpool and run_sync both carry it over
+_current: ContextVar[Optional[StatementBudget]] = ContextVar("statement_budget", default=None)
+
+
+def start(limit: int) -> StatementBudget:
+    """
+    Hold the current request to limit statements
+    """
+    budget = StatementBudget(limit)
+    _current.set(budget)
+    return budget
+
+
+def finish(budget: StatementBudget, method: str, route: str) -> None:
+    """
+    Log a warning if the request went over its budget or lazy loaded
+    """
+    if settings.STATEMENT_BUDGET_MODE != "off" and (budget.exceeded or budget.lazy_loads):
+        logger.warning("%s %s ran %s", method, route, budget.report())
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    budget = _current.get()
+    if budget is None or settings.STATEMENT_BUDGET_MODE == "off":
+        return
+    budget.statements.append(statement)
+    if settings.STATEMENT_BUDGET_MODE == "strict" and budget.exceeded:
+        raise StatementBudgetExceeded(budget.report())
+
+
+def _do_orm_execute(state: ORMExecuteState) -> None:
+    budget = _current.get()
+    if budget is None or settings.STATEMENT_BUDGET_MODE == "off":
+        return
+    if not state.is_select or state.lazy_loaded_from is None:
+        return
+    parent = state.lazy_loaded_from.class_.__name__
+    mapper = state.bind_arguments.get("mapper")
+    name = f"{mapper.class_.__name__} from {parent}" if mapper is not None else parent
+    budget.lazy_loads.append(name)
+    if settings.STATEMENT_BUDGET_MODE == "strict":
+        raise LazyLoadInRequest(f"Lazy load of {name}; load it with the query instead")
+
+
+def track_budgets(engine: Any) -> None:
+    """
+    Check the statements of a (sync) engine, and lazy loads by any session,
+    against the budget of the request that runs them
+    """
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    if not event.contains(Session, "do_orm_execute", _do_orm_execute):
+        event.listen(Session, "do_orm_execute", _do_orm_execute)
@@ -1,5 +1,5 @@
-from typing import List
-from pydantic_settings import BaseSettings
+from typing import List, Literal, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
 import os
 
 
@@ -11,11 +11,88 @@ class Settings(BaseSettings):
 
     # Database settings
     DATABASE_URL: str
+    # Serve requests through asyncpg/aiosqlite instead of the threadpool;
+    # ASYNC_DATABASE_URL defaults to DATABASE_URL with the async driver
+    DATABASE_ASYNC: bool = False
+    ASYNC_DATABASE_URL: Optional[str] = None
+
+    # Connection pool; "pgbouncer" disables prepared statement caching for
+    # transaction-mode poolers such as Supabase's port 6543
+    DB_POOL_PROFILE: str = "default"
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    # Recycle before Supabase's pooler drops idle connections; -1 disables
+    DB_POOL_RECYCLE: int = 300
+    DB_POOL_PRE_PING: bool = True
 
     # Supabase settings
     SUPABASE_URL: str
     SUPABASE_ANON_KEY: str
 
+    # Supabase token verification
+    # "local" checks the signature with SUPABASE_JWT_SECRET or the project JWKS
+    # and falls back to the remote call; "remote" always asks /auth/v1/user
+    AUTH_VERIFY_MODE: str = "local"
+    SUPABASE_JWT_SECRET: Optional[str] = None
+    SUPABASE_JWKS_URL: Optional[str] = None
+    SUPABASE_JWKS_CACHE_SECONDS: int = 600
+    SUPABASE_JWT_AUDIENCE: str = "authenticated"
+    AUTH_CLAIMS_CACHE_SIZE: int = 10000
+    AUTH_CLAIMS_CACHE_TTL_SECONDS: int = 60
+
+    # Authenticated user records, including is_active/is_superuser
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+
+    # POST /api/invoices/bulk: rows per request, invoices per INSERT
+    BULK_INVOICE_MAX_ROWS: int = 20000
+    BULK_INVOICE_CHUNK_SIZE: int = 500
+
+    # GET /api/export: rows per server-side cursor fetch and encoded chunk
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Background sweep marking pending invoices past their due date overdue;
+    # 0 disables it (run `python manage.py mark-overdue` from cron instead)
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 3600
+    OVERDUE_SWEEP_BATCH_SIZE: int = 500
+
+    # `python manage.py generate-recurring`: due templates per transaction
+    RECURRING_BATCH_SIZE: int = 500
+
+    # Server-Timing header (auth, db and total time) on every response;
+    # the same figures are aggregated per route at /api/metrics
+    SERVER_TIMING: bool = True
+
+    # Endpoints with a statement_budget: "warn" logs the statements of
+    # requests that go over it or lazy load, "strict" (for tests) raises
+    STATEMENT_BUDGET_MODE: Literal["off", "warn", "strict"] = "warn"
+
+    # Serialized responses of the invoice, client and payment lists, per user;
+    # "memory" caches them in each process, a redis:// URL in Redis shared by
+    # every worker, "off" disables it. Writes through the API invalidate the
+    # user's entries; other changes show within the TTL
+    RESPONSE_CACHE: str = "memory"
+    RESPONSE_CACHE_TTL_SECONDS: int = 30
+    RESPONSE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RESPONSE_CACHE_MAX_ENTRY_BYTES: int = 1024 * 1024
+
+    # Outbound HTTP client shared by Supabase and any other upstream calls
+    HTTP_MAX_CONNECTIONS: int = 100
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    HTTP_TIMEOUT_SECONDS: float = 10.0
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    HTTP_POOL_TIMEOUT_SECONDS: float = 5.0
+    HTTP2_ENABLED: bool = False
+    HTTP_RETRIES: int = 2
+    HTTP_RETRY_BACKOFF_SECONDS: float = 0.1
+    HTTP_RETRY_BACKOFF_MAX_SECONDS: float = 2.0
+
+    # Bearer token for the internal metrics endpoints, for scrapers; without
+    # it they only accept a superuser's access token
+    METRICS_TOKEN: Optional[str] = None
+
     # JWT settings
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
@@ -24,9 +101,7 @@ class Settings(BaseSettings):
     # CORS settings - default values
     CORS_ORIGINS_STR: str = "http://localhost:5174,http://localhost:3000"
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    model_config = SettingsConfigDict(env_file=".env", case_sensitive=True)
 
     @property
     def CORS_ORIGINS(self) -> List[str]:
@@ -34,5 +109,10 @@ class Settings(BaseSettings):
         origins_str = self.CORS_ORIGINS_STR
         return [origin.strip() for origin in origins_str.split(",")]
 
+    @property
+    def JWKS_URL(self) -> str:
+        """JWKS endpoint used for local verification of asymmetric tokens"""
+        return self.SUPABASE_JWKS_URL or f"{self.SUPABASE_URL}/auth/v1/.well-known/jwks.json"
+
 
 settings = Settings()
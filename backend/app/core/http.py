@@ -0,0 +1,132 @@
+import asyncio
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+# Status codes worth retrying for idempotent requests
+RETRY_STATUS_CODES = {502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+_client: Optional[httpx.AsyncClient] = None
+_counters = {"requests": 0, "retries": 0, "errors": 0}
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Create the pooled client used for all outbound calls
+    """
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS,
+        ),
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS,
+            pool=settings.HTTP_POOL_TIMEOUT_SECONDS,
+        ),
+        http2=settings.HTTP2_ENABLED,
+    )
+
+
+async def start_http_client() -> httpx.AsyncClient:
+    """
+    Open the shared client; called from the app lifespan
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    """
+    Close the shared client and its pooled connections
+    """
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared client, creating it on first use outside the app lifespan
+    (scripts and benchmarks)
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+def _backoff(attempt: int) -> float:
+    return min(
+        settings.HTTP_RETRY_BACKOFF_SECONDS * (2 ** attempt),
+        settings.HTTP_RETRY_BACKOFF_MAX_SECONDS,
+    )
+
+
+async def request(method: str, url: str, **kwargs: Any) -> httpx.Response:
+    """
+    Send a request through the shared client, retrying with exponential
+    backoff on connection failures and, for idempotent methods, on 502/503/504
+    """
+    client = get_http_client()
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    attempts = settings.HTTP_RETRIES + 1
+
+    for attempt in range(attempts):
+        last_attempt = attempt == attempts - 1
+        _counters["requests"] += 1
+        try:
+            response = await client.request(method, url, **kwargs)
+        except (httpx.ConnectError, httpx.ConnectTimeout):
+            # The request never reached the server, so any method may be retried
+            _counters["errors"] += 1
+            if last_attempt:
+                raise
+        except httpx.HTTPError:
+            _counters["errors"] += 1
+            raise
+        else:
+            if last_attempt or not idempotent or response.status_code not in RETRY_STATUS_CODES:
+                return response
+            await response.aclose()
+
+        _counters["retries"] += 1
+        await asyncio.sleep(_backoff(attempt))
+
+    raise RuntimeError("unreachable")
+
+
+def pool_stats() -> Dict[str, Any]:
+    """
+    Report pool sizing and usage of the shared client
+    """
+    stats: Dict[str, Any] = {
+        "http2": settings.HTTP2_ENABLED,
+        "max_connections": settings.HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "open": _client is not None and not _client.is_closed,
+        "connections": 0,
+        "idle_connections": 0,
+        "active_connections": 0,
+        "waiting_requests": 0,
+        **_counters,
+    }
+    # httpcore doesn't publish pool statistics, so read them from the pool
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    if pool is not None:
+        connections = list(pool.connections)
+        idle = sum(1 for connection in connections if connection.is_idle())
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = idle
+        stats["active_connections"] = len(connections) - idle
+        stats["waiting_requests"] = sum(
+            1 for status in getattr(pool, "_requests", []) if status.connection is None
+        )
+    return stats
@@ -0,0 +1,211 @@
+import bisect
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# Upper bounds, in seconds, of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Route label of requests that matched no route
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestTimings:
+    """SQL and upstream auth time spent by one request so far"""
+
+    __slots__ = ("sql_statements", "sql_seconds", "auth_seconds")
+
+    def __init__(self):
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.auth_seconds = 0.0
+
+    def server_timing(self, total: float) -> str:
+        """
+        Server-Timing header value, durations in milliseconds
+        """
+        return (
+            f"auth;dur={self.auth_seconds * 1000:.1f}, "
+            f'db;dur={self.sql_seconds * 1000:.1f};desc="{self.sql_statements} queries", '
+            f"app;dur={total * 1000:.1f}"
+        )
+
+
+# Timings of the request being handled; the threadpool and run_sync both
+# carry it over to the code running the queries
+_current: ContextVar[Optional[RequestTimings]] = ContextVar("request_timings", default=None)
+
+
+class RouteMetrics:
+    """Latency histogram and totals of one method and route template"""
+
+    def __init__(self):
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.requests = 0
+        self.seconds = 0.0
+        self.statuses: Dict[int, int] = {}
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.auth_seconds = 0.0
+
+
+class Metrics:
+    """
+    Per-route request metrics of this process, rendered in the Prometheus
+    text format
+
+    Only updated from the event loop, so no lock is needed.
+    """
+
+    def __init__(self):
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+
+    def observe(
+        self, method: str, route: str, status: int, seconds: float, timings: RequestTimings
+    ) -> None:
+        entry = self._routes.get((method, route))
+        if entry is None:
+            entry = self._routes[(method, route)] = RouteMetrics()
+        bucket = bisect.bisect_left(LATENCY_BUCKETS, seconds)
+        if bucket < len(LATENCY_BUCKETS):
+            entry.buckets[bucket] += 1
+        entry.requests += 1
+        entry.seconds += seconds
+        entry.statuses[status] = entry.statuses.get(status, 0) + 1
+        entry.sql_statements += timings.sql_statements
+        entry.sql_seconds += timings.sql_seconds
+        entry.auth_seconds += timings.auth_seconds
+
+    def render(self) -> str:
+        """
+        The metrics as a Prometheus text exposition
+        """
+        routes = sorted(self._routes.items())
+        lines: List[str] = [
+            "# HELP http_request_duration_seconds Request latency by route template",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), entry in routes:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            bucket = "http_request_duration_seconds_bucket"
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, entry.buckets):
+                cumulative += count
+                lines.append(f'{bucket}{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{bucket}{{{labels},le="+Inf"}} {entry.requests}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {entry.seconds}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {entry.requests}")
+
+        lines += [
+            "# HELP http_requests_total Requests by route template and status code",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route), entry in routes:
+            for status, count in sorted(entry.statuses.items()):
+                lines.append(
+                    f'http_requests_total{{method="{method}",route="{_escape(route)}",'
+                    f'status="{status}"}} {count}'
+                )
+
+        for name, attribute, help_text in (
+            ("http_request_sql_statements_total", "sql_statements", "SQL statements run by requests"),
+            ("http_request_sql_seconds_total", "sql_seconds", "Time requests spent in SQL"),
+            ("http_request_auth_seconds_total", "auth_seconds", "Time requests spent verifying tokens"),
+        ):
+            lines += [f"# HELP {name} {help_text}, by route template", f"# TYPE {name} counter"]
+            for (method, route), entry in routes:
+                lines.append(
+                    f'{name}{{method="{method}",route="{_escape(route)}"}} {getattr(entry, attribute)}'
+                )
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Metrics()
+
+
+def record_auth(seconds: float) -> None:
+    """
+    Add upstream auth time to the current request
+    """
+    timings = _current.get()
+    if timings is not None:
+        timings.auth_seconds += seconds
+
+
+def _before_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    if _current.get() is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(
+    conn: Any, cursor: Any, statement: str, parameters: Any, context: Any, executemany: bool
+) -> None:
+    timings = _current.get()
+    started = getattr(context, "_metrics_started", None)
+    if timings is not None and started is not None:
+        timings.sql_statements += 1
+        timings.sql_seconds += time.perf_counter() - started
+
+
+def track_queries(engine: Any) -> None:
+    """
+    Count the statements of a (sync) engine and time them against the
+    request that runs them
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class MetricsMiddleware:
+    """
+    Time every HTTP request, record it under its route template and add a
+    Server-Timing header with its auth, SQL and total time
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if settings.SERVER_TIMING:
+                    MutableHeaders(scope=message).append(
+                        "Server-Timing", timings.server_timing(time.perf_counter() - started)
+                    )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            metrics.observe(
+                scope["method"],
+                route.path if route is not None else UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - started,
+                timings,
+            )
@@ -0,0 +1,282 @@
+import abc
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+from urllib.parse import urlencode
+
+import orjson
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Generation of every user's responses, bumped by writes outside the routers
+ALL = "all"
+
+# A generation is forgotten after this many TTLs without a bump, by when the
+# entries made under it, and under the 0 it falls back to, have expired
+GENERATION_TTLS = 2
+
+
+class ResponseCacheBackend(abc.ABC):
+    """
+    Storage of cached responses and of the generations their keys carry
+
+    A generation is 0 until bumped; a bump sets it to a value it never had,
+    so entries keyed by an older one are never read again.
+    """
+
+    @abc.abstractmethod
+    async def generations(self, *names: str) -> Tuple[int, ...]:
+        """
+        Current generation of each name
+        """
+
+    @abc.abstractmethod
+    async def bump(self, name: str) -> None:
+        """
+        Move name to a generation it never had
+        """
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """
+        Value stored under key, or None if missing or expired
+        """
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: bytes) -> None:
+        """
+        Store value under key for the backend's TTL
+        """
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(ResponseCacheBackend):
+    """
+    Responses cached in this process, up to max_bytes, least recently used
+    evicted first
+
+    Only used from the event loop, so no lock is needed.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.size = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # Name -> (bumped at, generation), least recently bumped first
+        self._generations: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+        self._counter = 0
+
+    async def generations(self, *names: str) -> Tuple[int, ...]:
+        return tuple(self._generations.get(name, (0.0, 0))[1] for name in names)
+
+    async def bump(self, name: str) -> None:
+        now = time.monotonic()
+        while self._generations:
+            bumped_at = next(iter(self._generations.values()))[0]
+            if bumped_at > now - self.ttl * GENERATION_TTLS:
+                break
+            self._generations.popitem(last=False)
+        self._counter += 1
+        self._generations[name] = (now, self._counter)
+        self._generations.move_to_end(name)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.size -= len(value)
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size -= len(previous[1])
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": "memory",
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+        }
+
+
+class RedisBackend(ResponseCacheBackend):
+    """
+    Responses cached in Redis, shared by every worker; its maxmemory policy
+    bounds the size
+    """
+
+    def __init__(self, url: str, ttl: float, prefix: str = "responses:"):
+        # Optional dependency, only needed for a shared cache
+        import redis.asyncio as redis
+
+        self.url = url
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = redis.from_url(url)
+
+    async def generations(self, *names: str) -> Tuple[int, ...]:
+        values = await self._redis.mget([f"{self.prefix}generation:{name}" for name in names])
+        return tuple(int(value) if value is not None else 0 for value in values)
+
+    async def bump(self, name: str) -> None:
+        value = await self._redis.incr(f"{self.prefix}counter")
+        await self._redis.set(
+            f"{self.prefix}generation:{name}", value, px=int(self.ttl * GENERATION_TTLS * 1000)
+        )
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._redis.get(self.prefix + key)
+
+    async def set(self, key: str, value: bytes) -> None:
+        await self._redis.set(self.prefix + key, value, px=int(self.ttl * 1000))
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+class ResponseCache:
+    """
+    Serialized responses keyed by user, route and query parameters, with
+    hit and miss counts
+
+    Keys carry the user's generation and the global one, so a bump of
+    either invalidates them all at once. A backend that can't be reached
+    is logged and counted, and the request is served uncached.
+    """
+
+    def __init__(self, backend: Optional[ResponseCacheBackend], max_entry_bytes: int):
+        self.backend = backend
+        self.max_entry_bytes = max_entry_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.too_large = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _failed(self, action: str) -> None:
+        self.errors += 1
+        logger.warning("Response cache %s failed", action, exc_info=True)
+
+    async def key(
+        self, user_id: int, route: str, params: Sequence[Tuple[str, str]]
+    ) -> Optional[str]:
+        """
+        Key of a response of route for the user, or None if the backend is
+        unavailable
+        """
+        try:
+            epoch, generation = await self.backend.generations(ALL, f"user:{user_id}")
+        except Exception:
+            self._failed("lookup")
+            return None
+        return f"{user_id}:{epoch}.{generation}:{route}?{urlencode(sorted(params))}"
+
+    async def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, str]]]:
+        """
+        Body and headers cached under key
+        """
+        try:
+            value = await self.backend.get(key)
+        except Exception:
+            self._failed("lookup")
+            value = None
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        headers, _, body = value.partition(b"\n")
+        return body, orjson.loads(headers)
+
+    async def set(self, key: str, body: bytes, headers: Dict[str, str]) -> None:
+        """
+        Cache a response body with its headers, unless it is too large
+        """
+        if len(body) > self.max_entry_bytes:
+            self.too_large += 1
+            return
+        try:
+            await self.backend.set(key, orjson.dumps(headers) + b"\n" + body)
+        except Exception:
+            self._failed("store")
+            return
+        self.stores += 1
+
+    async def invalidate(self, user_id: Optional[int] = None) -> None:
+        """
+        Invalidate the user's cached responses, or every user's
+        """
+        if self.backend is None:
+            return
+        try:
+            await self.backend.bump(ALL if user_id is None else f"user:{user_id}")
+        except Exception:
+            self._failed("invalidation")
+            return
+        self.invalidations += 1
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Hit ratio and counts, with the backend's own statistics
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "stores": self.stores,
+            "too_large": self.too_large,
+            "invalidations": self.invalidations,
+            "errors": self.errors,
+            **(self.backend.stats() if self.backend is not None else {}),
+        }
+
+
+def _backend() -> Optional[ResponseCacheBackend]:
+    ttl = settings.RESPONSE_CACHE_TTL_SECONDS
+    if settings.RESPONSE_CACHE == "off" or ttl <= 0:
+        return None
+    if settings.RESPONSE_CACHE == "memory":
+        return MemoryBackend(settings.RESPONSE_CACHE_MAX_BYTES, ttl)
+    return RedisBackend(settings.RESPONSE_CACHE, ttl)
+
+
+response_cache = ResponseCache(_backend(), settings.RESPONSE_CACHE_MAX_ENTRY_BYTES)
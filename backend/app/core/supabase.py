@@ -1,5 +1,37 @@
+from functools import lru_cache
+from typing import Any, Optional
+
+import httpx
 from supabase import create_client, Client
+from app.core import http
 from app.core.config import settings
 
-# Create a Supabase client using the official Python client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+
+@lru_cache
+def get_supabase() -> Client:
+    """
+    Get the official Python client, created on first use
+
+    It manages its own HTTP sessions, so it is only built when something
+    needs it rather than on import.
+    """
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_ANON_KEY)
+
+
+async def supabase_request(
+    method: str,
+    path: str,
+    token: Optional[str] = None,
+    **kwargs: Any,
+) -> httpx.Response:
+    """
+    Call a Supabase endpoint (e.g. "/auth/v1/user") through the shared
+    pooled HTTP client
+
+    The official client opens its own connections, so backend calls on the
+    request path should go through here instead.
+    """
+    headers = {"apikey": settings.SUPABASE_ANON_KEY, **kwargs.pop("headers", {})}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return await http.request(method, f"{settings.SUPABASE_URL}{path}", headers=headers, **kwargs)
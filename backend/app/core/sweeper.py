@@ -0,0 +1,84 @@
+import asyncio
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.db.session import AsyncSessionLocal, SessionLocal, run_db
+from app.services.invoices import mark_overdue
+
+_task: Optional[asyncio.Task] = None
+_stats: Dict[str, Any] = {
+    "runs": 0,
+    "marked": 0,
+    "errors": 0,
+    "last_run_at": None,
+    "last_marked": 0,
+    "last_duration_ms": None,
+    "last_error": None,
+}
+
+
+async def sweep_overdue() -> int:
+    """
+    Run one overdue sweep on a session of its own; returns how many invoices
+    it marked
+    """
+    db = AsyncSessionLocal() if AsyncSessionLocal is not None else SessionLocal()
+    started = time.perf_counter()
+    marked = await run_db(db, mark_overdue)
+    if marked:
+        # Their users aren't known here; start every user's lists over
+        await response_cache.invalidate()
+    _stats["runs"] += 1
+    _stats["marked"] += len(marked)
+    _stats["last_run_at"] = time.time()
+    # Counts only: the ids span every tenant
+    _stats["last_marked"] = len(marked)
+    _stats["last_duration_ms"] = (time.perf_counter() - started) * 1000
+    return len(marked)
+
+
+async def _run(interval: float) -> None:
+    while True:
+        try:
+            await sweep_overdue()
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            # Keep sweeping; the next run retries whatever this one missed
+            _stats["errors"] += 1
+            _stats["last_error"] = repr(exc)
+        await asyncio.sleep(interval)
+
+
+async def start_overdue_sweeper() -> None:
+    """
+    Sweep now and then every OVERDUE_SWEEP_INTERVAL_SECONDS; called from the
+    app lifespan
+    """
+    global _task
+    interval = settings.OVERDUE_SWEEP_INTERVAL_SECONDS
+    if interval > 0 and _task is None:
+        _task = asyncio.create_task(_run(interval))
+
+
+async def stop_overdue_sweeper() -> None:
+    """
+    Cancel the sweep task, waiting for a sweep in progress to stop
+    """
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+def sweeper_stats() -> Dict[str, Any]:
+    """
+    Runs, invoices marked and the outcome of the last sweep
+    """
+    return {**_stats, "enabled": _task is not None}
@@ -0,0 +1,59 @@
+import csv
+import io
+from typing import Any, Dict, List, Sequence
+from sqlalchemy import Table, insert
+from sqlalchemy.engine import Connection
+
+# NULL in the CSV fed to COPY; its default, an empty field, would also turn
+# empty strings into NULL
+NULL = "\\N"
+
+
+def _copy(connection: Connection, table: Table, rows: Sequence[Dict[str, Any]]) -> bool:
+    """
+    COPY rows into table as CSV; False if the driver can't (only psycopg2 can)
+    """
+    cursor = connection.connection.cursor()
+    if not hasattr(cursor, "copy_expert"):
+        cursor.close()
+        return False
+
+    columns = [table.c[name] for name in rows[0]]
+    # Types that change values on the way in (Enum stores member names)
+    processors = [column.type.bind_processor(connection.dialect) for column in columns]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        values = []
+        for column, processor in zip(columns, processors):
+            value = row[column.name]
+            if value is not None and processor is not None:
+                value = processor(value)
+            values.append(NULL if value is None else value)
+        writer.writerow(values)
+    buffer.seek(0)
+
+    names = ", ".join(connection.dialect.identifier_preparer.quote(column.name) for column in columns)
+    name = connection.dialect.identifier_preparer.format_table(table)
+    try:
+        cursor.copy_expert(
+            f"COPY {name} ({names}) FROM STDIN WITH (FORMAT csv, NULL '{NULL}')", buffer
+        )
+    finally:
+        cursor.close()
+    return True
+
+
+def load_rows(connection: Connection, table: Table, rows: List[Dict[str, Any]]) -> None:
+    """
+    Insert rows, all with the same keys, into table: with COPY on
+    PostgreSQL and an executemany INSERT elsewhere
+
+    COPY skips SQLAlchemy's column defaults, so rows must carry every value
+    that has one.
+    """
+    if not rows:
+        return
+    if connection.dialect.name == "postgresql" and _copy(connection, table, rows):
+        return
+    connection.execute(insert(table), rows)
@@ -1,21 +1,126 @@
+from typing import Any, AsyncIterator, Callable, TypeVar, Union
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from app.core.budgets import track_budgets
 from app.core.config import settings
+from app.core.metrics import track_queries
+from app.db.pool import PoolMetrics, engine_options
+
+T = TypeVar("T")
+
+# Async drivers used when DATABASE_ASYNC is enabled
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Derive the async driver URL from a sync DATABASE_URL
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    url = url.set(drivername=ASYNC_DRIVERS.get(backend, url.drivername))
+    if backend == "postgresql" and "sslmode" in url.query:
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(url.query)
+        query["ssl"] = query.pop("sslmode")
+        url = url.set(query=query)
+    return url.render_as_string(hide_password=False)
+
+
+# Checkout statistics, published by /api/internal/db-pool
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
 
 # Create SQLAlchemy engine
-engine = create_engine(settings.DATABASE_URL)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, pool_metrics))
+track_queries(engine)
+track_budgets(engine)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine and sessions, only created when the async data path is enabled
+async_engine = None
+AsyncSessionLocal = None
+if settings.DATABASE_ASYNC:
+    _async_url = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(
+        _async_url, **engine_options(_async_url, async_pool_metrics, is_async=True)
+    )
+    track_queries(async_engine.sync_engine)
+    track_budgets(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        async_engine, autoflush=False, expire_on_commit=False
+    )
+
+
+async def dispose_engines() -> None:
+    """
+    Close the pooled connections of both engines; called from the app
+    lifespan on shutdown, as aiosqlite's connection threads keep the
+    process alive otherwise
+    """
+    if async_engine is not None:
+        await async_engine.dispose()
+    engine.dispose()
+
+
 # Create Base class
 Base = declarative_base()
 
+DBSession = Union[Session, AsyncSession]
+
+
 # Dependency to get DB session
-def get_db():
+async def get_db() -> AsyncIterator[DBSession]:
+    """
+    Yield the request's session: an AsyncSession when DATABASE_ASYNC is set,
+    otherwise a sync Session. Use run_db to query it.
+    """
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
+        # run_db already released the connection, so this doesn't block
         db.close()
+
+
+def _run_and_release(db: Session, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
+
+async def run_db(db: DBSession, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Call fn(session, *args, **kwargs) without blocking the event loop
+
+    fn is plain sync SQLAlchemy code. With an AsyncSession it runs on the
+    async driver through run_sync; with a sync Session it runs in the
+    threadpool.
+
+    Each call is its own unit of work: the session is closed afterwards so
+    the connection goes back to the pool before the request awaits anything
+    else (otherwise threads waiting for a connection can starve the requests
+    holding one). Returned objects are detached, so fn must load everything
+    the response needs.
+    """
+    if isinstance(db, AsyncSession):
+        try:
+            return await db.run_sync(fn, *args, **kwargs)
+        finally:
+            await db.close()
+    return await run_in_threadpool(_run_and_release, db, fn, *args, **kwargs)
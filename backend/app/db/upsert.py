@@ -0,0 +1,16 @@
+from typing import Any
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+# Dialects with INSERT ... ON CONFLICT
+INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def dialect_insert(db: Session) -> Any:
+    """
+    The session dialect's insert(), which has on_conflict_do_nothing/_update
+    """
+    return INSERT_BY_DIALECT[db.get_bind().dialect.name]
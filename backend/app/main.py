@@ -1,12 +1,40 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.core.config import settings
-from app.api.endpoints import auth, users, clients, invoices, payments
+from app.core.http import close_http_client, start_http_client
+from app.core.metrics import MetricsMiddleware
+from app.core.response_cache import response_cache
+from app.core.sweeper import start_overdue_sweeper, stop_overdue_sweeper
+from app.db.session import dispose_engines
+from app.api.dependencies.pagination import NEXT_CURSOR_HEADER
+from app.api.endpoints import auth, users, clients, invoices, payments, reports, export, internal, metrics
+from app.services.errors import ServiceError
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Open shared resources on startup and release them on shutdown
+    """
+    await start_http_client()
+    await start_overdue_sweeper()
+    yield
+    await stop_overdue_sweeper()
+    await close_http_client()
+    await response_cache.close()
+    await dispose_engines()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
     version=settings.APP_VERSION,
     description="InvoiceAI API - A smart invoice management system",
+    lifespan=lifespan,
+    # Responses are already JSON-ready dicts from pydantic-core; orjson encodes
+    # them several times faster than the stdlib encoder
+    default_response_class=ORJSONResponse,
 )
 
 # Set up CORS
@@ -16,14 +44,29 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
 
+# Outermost, so its timings cover CORS and error handling too
+app.add_middleware(MetricsMiddleware)
+
+@app.exception_handler(ServiceError)
+async def service_error_handler(request: Request, exc: ServiceError):
+    """
+    Report service errors like the HTTPExceptions the routers used to raise
+    """
+    return ORJSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
+
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(clients.router, prefix="/api/clients", tags=["Clients"])
 app.include_router(invoices.router, prefix="/api/invoices", tags=["Invoices"])
 app.include_router(payments.router, prefix="/api/payments", tags=["Payments"])
+app.include_router(reports.router, prefix="/api/reports", tags=["Reports"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
+app.include_router(internal.router, prefix="/api/internal", tags=["Internal"])
+app.include_router(metrics.router, prefix="/api/metrics", tags=["Internal"])
 
 @app.get("/api/health", tags=["Health"])
 async def health_check():
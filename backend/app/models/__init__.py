@@ -2,4 +2,7 @@ from app.models.user import User
 from app.models.client import Client
 from app.models.invoice import Invoice, InvoiceStatus
 from app.models.invoice_item import InvoiceItem
+from app.models.invoice_settings import InvoiceSettings
 from app.models.payment import Payment, PaymentMethod
+from app.models.recurring_invoice import RecurringFrequency, RecurringInvoice
+from app.models.report import ClientTotal, MonthlyTotal, PaymentMethodTotal, StatusTotal
@@ -1,12 +1,43 @@
-from sqlalchemy import Column, String, Text, ForeignKey
+from sqlalchemy import DDL, Column, Index, String, Text, ForeignKey, event
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 from app.db.session import Base
 
+# FTS5 trigram index over client names and emails, kept in sync by triggers;
+# SQLite's stand-in for the pg_trgm indexes below
+CLIENT_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS client_fts USING fts5("
+    "name, email, content='client', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS client_fts_insert AFTER INSERT ON client BEGIN "
+    "INSERT INTO client_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+    "CREATE TRIGGER IF NOT EXISTS client_fts_delete AFTER DELETE ON client BEGIN "
+    "INSERT INTO client_fts(client_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); END",
+    "CREATE TRIGGER IF NOT EXISTS client_fts_update AFTER UPDATE OF name, email ON client BEGIN "
+    "INSERT INTO client_fts(client_fts, rowid, name, email) "
+    "VALUES ('delete', old.id, old.name, old.email); "
+    "INSERT INTO client_fts(rowid, name, email) VALUES (new.id, new.name, new.email); END",
+]
+
 
 class Client(Base, BaseModel):
     """Client model for storing client information"""
-    
+
+    # Keyset pagination on (sort key, id) within a user, and trigram
+    # indexes for substring and fuzzy search on PostgreSQL
+    __table_args__ = (
+        Index("ix_client_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_client_user_id_name", "user_id", "name", "id"),
+        Index(
+            "ix_client_name_trgm", "name",
+            postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_client_email_trgm", "email",
+            postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
     name = Column(String, nullable=False, index=True)
     email = Column(String, nullable=False)
     phone = Column(String)
@@ -18,3 +49,20 @@ class Client(Base, BaseModel):
     user_id = Column(ForeignKey("user.id"), nullable=False)
     user = relationship("User", back_populates="clients")
     invoices = relationship("Invoice", back_populates="client", cascade="all, delete-orphan")
+    recurring_invoices = relationship(
+        "RecurringInvoice", back_populates="client", cascade="all, delete-orphan"
+    )
+
+
+event.listen(
+    Client.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+for statement in CLIENT_FTS_DDL:
+    event.listen(Client.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    Client.__table__,
+    "after_drop",
+    DDL("DROP TABLE IF EXISTS client_fts").execute_if(dialect="sqlite"),
+)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Date, ForeignKey, Text, Enum
+from sqlalchemy import Column, Index, String, Float, Date, ForeignKey, Text, Enum, UniqueConstraint
 from sqlalchemy.orm import relationship
 import enum
 from app.models.base import BaseModel
@@ -15,7 +15,27 @@ class InvoiceStatus(str, enum.Enum):
 
 class Invoice(Base, BaseModel):
     """Invoice model for storing invoice information"""
-    
+
+    # Keyset pagination on (sort key, id) within a user, plus the status
+    # and client filters of the invoice list
+    __table_args__ = (
+        Index("ix_invoice_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_invoice_user_id_issued_date", "user_id", "issued_date", "id"),
+        Index("ix_invoice_user_id_due_date", "user_id", "due_date", "id"),
+        Index("ix_invoice_user_id_total", "user_id", "total", "id"),
+        Index("ix_invoice_user_id_status_due_date", "user_id", "status", "due_date"),
+        Index("ix_invoice_user_id_client_id", "user_id", "client_id"),
+        # Pending invoices past due, across users, for the overdue sweep
+        Index("ix_invoice_status_due_date", "status", "due_date", "id"),
+        # Numbers are unique per user; also serves sorting the list by number
+        UniqueConstraint("user_id", "number", name="uq_invoice_user_id_number"),
+        # One invoice per recurring template and period, so the generator
+        # can be re-run or run concurrently
+        UniqueConstraint(
+            "recurring_invoice_id", "recurring_period", name="uq_invoice_recurring_period"
+        ),
+    )
+
     number = Column(String, nullable=False, index=True)
     status = Column(Enum(InvoiceStatus), default=InvoiceStatus.DRAFT, nullable=False)
     issued_date = Column(Date, nullable=False)
@@ -24,6 +44,9 @@ class Invoice(Base, BaseModel):
     tax = Column(Float, default=0.0)
     discount = Column(Float, default=0.0)
     total = Column(Float, nullable=False)
+    # Kept in step with payments by app.services.payments
+    amount_paid = Column(Float, default=0.0, server_default="0", nullable=False)
+    balance_due = Column(Float, default=0.0, server_default="0", nullable=False)
     notes = Column(Text)
     
     # Relationships
@@ -31,5 +54,8 @@ class Invoice(Base, BaseModel):
     client = relationship("Client", back_populates="invoices")
     user_id = Column(ForeignKey("user.id"), nullable=False)
     user = relationship("User", back_populates="invoices")
+    # The template and period (its next_date) a generated invoice was made for
+    recurring_invoice_id = Column(ForeignKey("recurringinvoice.id", ondelete="SET NULL"))
+    recurring_period = Column(Date)
     items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="invoice", cascade="all, delete-orphan")
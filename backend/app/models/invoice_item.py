@@ -13,5 +13,5 @@ class InvoiceItem(Base, BaseModel):
     amount = Column(Float, nullable=False)
     
     # Relationships
-    invoice_id = Column(ForeignKey("invoice.id"), nullable=False)
+    invoice_id = Column(ForeignKey("invoice.id"), nullable=False, index=True)
     invoice = relationship("Invoice", back_populates="items")
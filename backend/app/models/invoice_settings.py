@@ -0,0 +1,14 @@
+from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy.orm import relationship
+from app.models.base import BaseModel
+from app.db.session import Base
+
+
+class InvoiceSettings(Base, BaseModel):
+    """Per-user invoice numbering and defaults"""
+
+    user_id = Column(ForeignKey("user.id"), unique=True, nullable=False)
+    user = relationship("User", back_populates="invoice_settings")
+    invoice_prefix = Column(String, default="INV-", nullable=False)
+    next_invoice_number = Column(Integer, default=1001, nullable=False)
+    default_due_days = Column(Integer, default=30, nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, Date, ForeignKey, Text, Enum
+from sqlalchemy import Column, Index, String, Float, Date, ForeignKey, Text, Enum
 from sqlalchemy.orm import relationship
 import enum
 from app.models.base import BaseModel
@@ -15,7 +15,14 @@ class PaymentMethod(str, enum.Enum):
 
 class Payment(Base, BaseModel):
     """Payment model for storing payment information"""
-    
+
+    # Keyset pagination on (sort key, id) within a user
+    __table_args__ = (
+        Index("ix_payment_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_payment_user_id_date", "user_id", "date", "id"),
+        Index("ix_payment_user_id_amount", "user_id", "amount", "id"),
+    )
+
     amount = Column(Float, nullable=False)
     date = Column(Date, nullable=False)
     method = Column(Enum(PaymentMethod), nullable=False)
@@ -23,7 +30,7 @@ class Payment(Base, BaseModel):
     notes = Column(Text)
     
     # Relationships
-    invoice_id = Column(ForeignKey("invoice.id"), nullable=False)
+    invoice_id = Column(ForeignKey("invoice.id"), nullable=False, index=True)
     invoice = relationship("Invoice", back_populates="payments")
     user_id = Column(ForeignKey("user.id"), nullable=False)
     user = relationship("User", back_populates="payments")
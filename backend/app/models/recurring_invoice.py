@@ -0,0 +1,39 @@
+from sqlalchemy import JSON, Boolean, Column, Date, Enum, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship
+import enum
+from app.models.base import BaseModel
+from app.db.session import Base
+
+
+class RecurringFrequency(str, enum.Enum):
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    QUARTERLY = "quarterly"
+    YEARLY = "yearly"
+
+
+class RecurringInvoice(Base, BaseModel):
+    """Template an invoice is generated from every period"""
+
+    # Active templates due by a date, across users, for the generator
+    __table_args__ = (
+        Index("ix_recurringinvoice_active_next_date", "active", "next_date", "id"),
+    )
+
+    name = Column(String, nullable=False)
+    frequency = Column(Enum(RecurringFrequency), nullable=False)
+    next_date = Column(Date, nullable=False)
+    # Day of the month periods fall on, clamped in shorter months; the day
+    # of next_date until the first period is generated
+    anchor_day = Column(Integer)
+    last_sent = Column(Date)
+    # subtotal, tax, discount, total, notes and items (description,
+    # quantity, unit_price, amount) of the invoices to generate
+    template = Column(JSON, nullable=False)
+    active = Column(Boolean, default=True, nullable=False)
+
+    # Relationships
+    client_id = Column(ForeignKey("client.id"), nullable=False)
+    client = relationship("Client", back_populates="recurring_invoices")
+    user_id = Column(ForeignKey("user.id"), nullable=False, index=True)
+    user = relationship("User", back_populates="recurring_invoices")
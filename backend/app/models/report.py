@@ -0,0 +1,59 @@
+from sqlalchemy import Column, Date, Enum, Float, ForeignKey, Index, Integer
+from app.db.session import Base
+from app.models.invoice import InvoiceStatus
+from app.models.payment import PaymentMethod
+
+# Per-user rollups behind GET /api/reports/summary. app.services.reports
+# keeps them in step with every invoice and payment write and can rebuild
+# them from scratch.
+
+
+class MonthlyTotal(Base):
+    """Amounts invoiced (by issue date) and received (by payment date) per month"""
+
+    __tablename__ = "report_monthly_total"
+
+    user_id = Column(ForeignKey("user.id"), primary_key=True)
+    month = Column(Date, primary_key=True)
+    invoiced = Column(Float, default=0.0, nullable=False)
+    received = Column(Float, default=0.0, nullable=False)
+
+
+class StatusTotal(Base):
+    """Invoice count, total and balance due per invoice status"""
+
+    __tablename__ = "report_status_total"
+
+    user_id = Column(ForeignKey("user.id"), primary_key=True)
+    status = Column(Enum(InvoiceStatus), primary_key=True)
+    invoices = Column(Integer, default=0, nullable=False)
+    total = Column(Float, default=0.0, nullable=False)
+    balance_due = Column(Float, default=0.0, nullable=False)
+
+
+class ClientTotal(Base):
+    """Invoice count, amounts invoiced, paid and due per client"""
+
+    __tablename__ = "report_client_total"
+    __table_args__ = (
+        # Top clients by amount paid
+        Index("ix_report_client_total_user_id_paid", "user_id", "paid"),
+    )
+
+    user_id = Column(ForeignKey("user.id"), primary_key=True)
+    client_id = Column(ForeignKey("client.id"), primary_key=True)
+    invoices = Column(Integer, default=0, nullable=False)
+    invoiced = Column(Float, default=0.0, nullable=False)
+    paid = Column(Float, default=0.0, nullable=False)
+    balance_due = Column(Float, default=0.0, nullable=False)
+
+
+class PaymentMethodTotal(Base):
+    """Payment count and amount per payment method"""
+
+    __tablename__ = "report_payment_method_total"
+
+    user_id = Column(ForeignKey("user.id"), primary_key=True)
+    method = Column(Enum(PaymentMethod), primary_key=True)
+    payments = Column(Integer, default=0, nullable=False)
+    amount = Column(Float, default=0.0, nullable=False)
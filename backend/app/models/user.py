@@ -17,3 +17,9 @@ class User(Base, BaseModel):
     clients = relationship("Client", back_populates="user", cascade="all, delete-orphan")
     invoices = relationship("Invoice", back_populates="user", cascade="all, delete-orphan")
     payments = relationship("Payment", back_populates="user", cascade="all, delete-orphan")
+    recurring_invoices = relationship(
+        "RecurringInvoice", back_populates="user", cascade="all, delete-orphan"
+    )
+    invoice_settings = relationship(
+        "InvoiceSettings", back_populates="user", uselist=False, cascade="all, delete-orphan"
+    )
@@ -1,7 +1,10 @@
-from typing import Optional, List
-from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional, List
+from pydantic import BaseModel, ConfigDict, Field, model_serializer, model_validator
 from datetime import date, datetime
+from sqlalchemy import inspect
 from app.models.invoice import InvoiceStatus
+from app.schemas.client import Client
+from app.schemas.payment import Payment
 
 
 class InvoiceItemBase(BaseModel):
@@ -20,6 +23,11 @@ class InvoiceItemCreate(InvoiceItemBase):
     amount: float = Field(..., gt=0)
 
 
+class InvoiceItemUpsert(InvoiceItemCreate):
+    """Invoice item in an invoice update: existing items keep their id"""
+    id: Optional[int] = None
+
+
 class InvoiceItemUpdate(InvoiceItemBase):
     """Invoice item update schema"""
     pass
@@ -30,8 +38,7 @@ class InvoiceItemInDBBase(InvoiceItemBase):
     id: int
     invoice_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class InvoiceItem(InvoiceItemInDBBase):
@@ -55,7 +62,8 @@ class InvoiceBase(BaseModel):
 
 class InvoiceCreate(InvoiceBase):
     """Invoice creation schema"""
-    number: str
+    # Left out, the next number from the user's invoice settings is used
+    number: Optional[str] = None
     issued_date: date
     due_date: date
     subtotal: float = Field(..., ge=0)
@@ -68,20 +76,65 @@ class InvoiceCreate(InvoiceBase):
 
 class InvoiceUpdate(InvoiceBase):
     """Invoice update schema"""
-    items: Optional[List[InvoiceItemCreate]] = None
+    items: Optional[List[InvoiceItemUpsert]] = None
 
 
 class InvoiceInDBBase(InvoiceBase):
     """Base invoice schema for DB representation"""
     id: int
+    amount_paid: float = 0
+    balance_due: float = 0
     created_at: datetime
     updated_at: datetime
     user_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+# Invoice fields filled from relationships, present only when loaded
+EMBEDDED = frozenset({"items", "payments", "client"})
 
 
 class Invoice(InvoiceInDBBase):
-    """Invoice schema for API response"""
+    """Invoice schema for API response, with the relationships that were loaded"""
     items: List[InvoiceItem] = []
+    payments: List[Payment] = []
+    client: Optional[Client] = None
+
+    @model_validator(mode="before")
+    @classmethod
+    def _skip_unloaded(cls, data: Any) -> Any:
+        # Reading a relationship that wasn't loaded would lazy load it, which
+        # fails once the session is closed; leave it out instead
+        state = inspect(data, raiseerr=False)
+        if state is None or state.unloaded.isdisjoint(EMBEDDED):
+            return data
+        return {
+            name: getattr(data, name) for name in cls.model_fields if name not in state.unloaded
+        }
+
+    # Unannotated: a return type would stand in for the model in OpenAPI
+    @model_serializer(mode="wrap")
+    def _omit_unloaded(self, handler: Any):
+        data = handler(self)
+        for name in EMBEDDED.difference(self.model_fields_set):
+            data.pop(name, None)
+        return data
+
+
+class InvoiceBulkCreated(BaseModel):
+    """An invoice created by a bulk request, by position in the request"""
+    index: int
+    id: int
+
+
+class InvoiceBulkError(BaseModel):
+    """A row of a bulk request that was rejected, by position in the request"""
+    index: int
+    errors: List[Dict[str, Any]]
+
+
+class InvoiceBulkResult(BaseModel):
+    """Outcome of a bulk request"""
+    created: List[InvoiceBulkCreated]
+    errors: List[InvoiceBulkError]
@@ -1,13 +1,13 @@
 from typing import Optional
-from pydantic import BaseModel, Field
-from datetime import date, datetime
+from pydantic import BaseModel, ConfigDict, Field
+from datetime import date as Date, datetime
 from app.models.payment import PaymentMethod
 
 
 class PaymentBase(BaseModel):
     """Base payment schema"""
     amount: Optional[float] = None
-    date: Optional[date] = None
+    date: Optional[Date] = None
     method: Optional[PaymentMethod] = None
     reference: Optional[str] = None
     notes: Optional[str] = None
@@ -17,7 +17,7 @@ class PaymentBase(BaseModel):
 class PaymentCreate(PaymentBase):
     """Payment creation schema"""
     amount: float = Field(..., gt=0)
-    date: date
+    date: Date
     method: PaymentMethod
     invoice_id: int
 
@@ -34,8 +34,7 @@ class PaymentInDBBase(PaymentBase):
     updated_at: datetime
     user_id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class Payment(PaymentInDBBase):
@@ -0,0 +1,45 @@
+from typing import List
+from pydantic import BaseModel
+from datetime import date
+from app.models.invoice import InvoiceStatus
+from app.models.payment import PaymentMethod
+
+
+class MonthSummary(BaseModel):
+    """Amounts invoiced and received in a month"""
+    month: date
+    invoiced: float
+    received: float
+
+
+class StatusSummary(BaseModel):
+    """Invoices, their total and what is still due, for one status"""
+    status: InvoiceStatus
+    invoices: int
+    total: float
+    balance_due: float
+
+
+class ClientSummary(BaseModel):
+    """What a client was invoiced, has paid and still owes"""
+    client_id: int
+    name: str
+    invoices: int
+    invoiced: float
+    paid: float
+    balance_due: float
+
+
+class PaymentMethodSummary(BaseModel):
+    """Payments received with one method"""
+    method: PaymentMethod
+    payments: int
+    amount: float
+
+
+class ReportSummary(BaseModel):
+    """Dashboard summary"""
+    revenue_by_month: List[MonthSummary]
+    outstanding_by_status: List[StatusSummary]
+    top_clients: List[ClientSummary]
+    payment_methods: List[PaymentMethodSummary]
@@ -0,0 +1,16 @@
+from functools import lru_cache
+from typing import Any, List, Tuple, Type
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+
+
+@lru_cache(maxsize=256)
+def sparse_adapter(schema: Type[BaseModel], names: Tuple[str, ...], many: bool = False) -> TypeAdapter:
+    """
+    Validator and serializer of a model with only the named fields of
+    schema, or of a list of them
+    """
+    fields = {name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in names}
+    model: Any = create_model(
+        f"{schema.__name__}Fields", __config__=ConfigDict(from_attributes=True), **fields
+    )
+    return TypeAdapter(List[model] if many else model)
@@ -0,0 +1,227 @@
+from typing import Any, List, Optional, Sequence
+from sqlalchemy import and_, column, delete, func, literal_column, or_, select, table
+from sqlalchemy.orm import Session
+from app.models.client import Client
+from app.models.invoice import Invoice
+from app.models.invoice_item import InvoiceItem
+from app.models.payment import Payment
+from app.models.recurring_invoice import RecurringInvoice
+from app.models.report import ClientTotal
+from app.schemas.client import Client as ClientSchema, ClientCreate, ClientUpdate
+from app.services import reports
+from app.services.errors import NotFoundError
+from app.services.fields import field_columns, load_fields
+from app.services.pagination import Page, paginate
+from app.services.versions import Version, query_version
+
+# Sort keys accepted by list_clients
+SORT_COLUMNS = {
+    "created_at": Client.created_at,
+    "name": Client.name,
+}
+
+# Columns behind the fields of the client response, for fields=
+FIELD_COLUMNS = field_columns(ClientSchema, Client)
+
+# SQLite's FTS5 trigram index (see app.models.client); FTS5 can only look up
+# terms of at least three characters, shorter ones fall back to LIKE
+client_fts = table("client_fts", column("rowid"), column("rank"))
+MIN_TRIGRAM_TERM = 3
+
+
+def _like_pattern(term: str, prefix: bool = False) -> str:
+    escaped = term.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return f"{escaped}%" if prefix else f"%{escaped}%"
+
+
+def _fts_match(term: str) -> Any:
+    phrase = '"' + term.replace('"', '""') + '"'
+    return literal_column("client_fts").match(phrase)
+
+
+def _uses_fts(db: Session, term: str) -> bool:
+    return db.get_bind().dialect.name == "sqlite" and len(term) >= MIN_TRIGRAM_TERM
+
+
+def _contains(db: Session, term: str) -> Any:
+    """
+    Filter for clients whose name or email contains term, case-insensitively
+    """
+    if _uses_fts(db, term):
+        return Client.id.in_(select(client_fts.c.rowid).where(_fts_match(term)))
+    # On PostgreSQL the pg_trgm indexes serve ILIKE '%term%'
+    pattern = _like_pattern(term)
+    return or_(Client.name.ilike(pattern, escape="/"), Client.email.ilike(pattern, escape="/"))
+
+
+def _clients_query(db: Session, user_id: int, search: Optional[str] = None) -> Any:
+    query = db.query(Client).filter(Client.user_id == user_id)
+
+    if search:
+        query = query.filter(_contains(db, search))
+    return query
+
+
+def list_clients(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    search: Optional[str] = None,
+    sort: str = "created_at",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Page:
+    """
+    Retrieve a page of clients for a user, with only the columns of fields
+    loaded when given
+    """
+    query = _clients_query(db, user_id, search)
+    if fields:
+        query = query.options(load_fields(FIELD_COLUMNS, fields, SORT_COLUMNS.get(sort, Client.id)))
+    return paginate(query, Client, SORT_COLUMNS, sort, order, skip, limit, cursor)
+
+
+def clients_version(db: Session, user_id: int, search: Optional[str] = None) -> Version:
+    """
+    Version of the clients list_clients pages through
+    """
+    return query_version(_clients_query(db, user_id, search), Client)
+
+
+def search_clients(
+    db: Session,
+    user_id: int,
+    term: str,
+    mode: str = "search",
+    limit: int = 10,
+) -> List[Client]:
+    """
+    Find a user's clients by name or email, best matches first
+
+    "search" ranks substring matches by trigram similarity on PostgreSQL,
+    where it also finds misspellings, and by bm25 on SQLite. "prefix" is for
+    autocomplete: names or emails starting with term, in name order.
+    """
+    query = db.query(Client).filter(Client.user_id == user_id)
+    dialect = db.get_bind().dialect.name
+
+    if mode == "prefix":
+        pattern = _like_pattern(term, prefix=True)
+        matches = or_(Client.name.ilike(pattern, escape="/"), Client.email.ilike(pattern, escape="/"))
+        if _uses_fts(db, term):
+            matches = and_(_contains(db, term), matches)
+        query = query.filter(matches).order_by(Client.name, Client.id)
+    elif dialect == "postgresql":
+        similarity = func.greatest(
+            func.similarity(Client.name, term), func.similarity(Client.email, term)
+        )
+        query = query.filter(
+            or_(
+                _contains(db, term),
+                Client.name.bool_op("%")(term),
+                Client.email.bool_op("%")(term),
+            )
+        ).order_by(similarity.desc(), Client.id)
+    elif _uses_fts(db, term):
+        query = query.join(client_fts, client_fts.c.rowid == Client.id).filter(
+            _fts_match(term)
+        ).order_by(client_fts.c.rank, Client.id)
+    else:
+        query = query.filter(_contains(db, term)).order_by(Client.name, Client.id)
+
+    return query.limit(limit).all()
+
+
+def get_client(
+    db: Session, user_id: int, client_id: int, fields: Optional[Sequence[str]] = None
+) -> Client:
+    """
+    Get a client by ID, with only the columns of fields loaded when given
+    """
+    query = db.query(Client).filter(Client.id == client_id, Client.user_id == user_id)
+    if fields:
+        query = query.options(load_fields(FIELD_COLUMNS, fields))
+    client = query.first()
+    if not client:
+        raise NotFoundError("Client not found")
+    return client
+
+
+def client_version(db: Session, user_id: int, client_id: int) -> Version:
+    """
+    Version of a client
+    """
+    return query_version(
+        db.query(Client).filter(Client.id == client_id, Client.user_id == user_id), Client
+    )
+
+
+def create_client(db: Session, user_id: int, client_in: ClientCreate) -> Client:
+    """
+    Create a new client
+    """
+    client = Client(
+        **client_in.model_dump(),
+        user_id=user_id,
+    )
+    db.add(client)
+    db.commit()
+    db.refresh(client)
+    return client
+
+
+def update_client(
+    db: Session, user_id: int, client_id: int, client_in: ClientUpdate
+) -> Client:
+    """
+    Update a client
+    """
+    client = get_client(db, user_id, client_id)
+
+    update_data = client_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(client, field, value)
+
+    db.add(client)
+    db.commit()
+    db.refresh(client)
+    return client
+
+
+def delete_client(db: Session, user_id: int, client_id: int) -> Client:
+    """
+    Delete a client with its invoices and their payments
+    """
+    client = get_client(db, user_id, client_id)
+    # The invoices and payments go with the client, so take them out of the rollups
+    invoices = db.execute(
+        select(*reports.INVOICE_FIGURES).where(Invoice.client_id == client.id)
+    )
+    payments = db.execute(
+        select(*reports.PAYMENT_FIGURES)
+        .join(Invoice, Invoice.id == Payment.invoice_id)
+        .where(Invoice.client_id == client.id)
+    )
+    reports.record(
+        db,
+        invoices_removed=[reports.InvoiceFigures(*row) for row in invoices],
+        payments_removed=[reports.PaymentFigures(*row) for row in payments],
+    )
+    # A statement per table rather than the ORM cascade, which would load
+    # every invoice and then its items and payments one invoice at a time
+    invoice_ids = select(Invoice.id).where(Invoice.client_id == client.id)
+    for statement in (
+        delete(InvoiceItem).where(InvoiceItem.invoice_id.in_(invoice_ids)),
+        delete(Payment).where(Payment.invoice_id.in_(invoice_ids)),
+        delete(Invoice).where(Invoice.client_id == client.id),
+        delete(RecurringInvoice).where(RecurringInvoice.client_id == client.id),
+        delete(ClientTotal).where(ClientTotal.client_id == client.id),
+        delete(Client).where(Client.id == client.id),
+    ):
+        db.execute(statement.execution_options(synchronize_session=False))
+    # Keep the loaded client to return it; the commit would expire it
+    db.expunge(client)
+    db.commit()
+    return client
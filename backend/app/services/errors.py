@@ -0,0 +1,29 @@
+from fastapi import status
+
+
+class ServiceError(Exception):
+    """Base error raised by services; turned into an HTTP error in app.main"""
+
+    status_code = status.HTTP_400_BAD_REQUEST
+
+    def __init__(self, detail: str):
+        super().__init__(detail)
+        self.detail = detail
+
+
+class NotFoundError(ServiceError):
+    """The requested row doesn't exist or belongs to another user"""
+
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+class BadRequestError(ServiceError):
+    """The request conflicts with existing data"""
+
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+class ForbiddenError(ServiceError):
+    """The current user isn't allowed to see the row"""
+
+    status_code = status.HTTP_403_FORBIDDEN
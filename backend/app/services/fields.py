@@ -0,0 +1,35 @@
+from typing import Any, Dict, Optional, Sequence, Tuple, Type
+from pydantic import BaseModel
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+from app.services.errors import BadRequestError
+
+
+def field_columns(schema: Type[BaseModel], model: Any) -> Dict[str, Any]:
+    """
+    Columns of model behind the fields of a response schema, by field name
+    """
+    columns = inspect(model).column_attrs
+    return {name: getattr(model, name) for name in schema.model_fields if name in columns}
+
+
+def parse_fields(fields: Optional[str], columns: Dict[str, Any]) -> Optional[Tuple[str, ...]]:
+    """
+    Field names of a fields parameter such as "number,status,total", in
+    schema order and always with id; None when fields wasn't given
+    """
+    if fields is None:
+        return None
+    names = {"id", *(name.strip() for name in fields.split(",") if name.strip())}
+    unknown = sorted(names.difference(columns))
+    if unknown:
+        raise BadRequestError(f"Unsupported fields: {', '.join(unknown)}")
+    return tuple(name for name in columns if name in names)
+
+
+def load_fields(columns: Dict[str, Any], fields: Sequence[str], *required: Any) -> Any:
+    """
+    Loader option that selects only the columns of fields, plus required ones
+    the query itself needs, such as its sort key
+    """
+    return load_only(*[columns[name] for name in fields], *required)
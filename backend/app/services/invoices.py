@@ -0,0 +1,513 @@
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+from pydantic import ValidationError
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import Session, selectinload
+from app.core.config import settings
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.invoice_item import InvoiceItem
+from app.models.payment import Payment
+from app.schemas.invoice import Invoice as InvoiceSchema, InvoiceCreate, InvoiceItemUpsert, InvoiceUpdate
+from app.services import reports
+from app.services.errors import BadRequestError, NotFoundError
+from app.services.fields import field_columns, load_fields
+from app.services.numbering import reserve_block
+from app.services.pagination import Page, paginate
+from app.services.versions import Version, combine_versions, query_version
+
+# Sort keys accepted by list_invoices
+SORT_COLUMNS = {
+    "created_at": Invoice.created_at,
+    "issued_date": Invoice.issued_date,
+    "due_date": Invoice.due_date,
+    "number": Invoice.number,
+    "total": Invoice.total,
+}
+
+# Relationships list_invoices and get_invoice can embed, by include name
+INCLUDES = {
+    "items": Invoice.items,
+    "payments": Invoice.payments,
+    "client": Invoice.client,
+}
+
+# Columns behind the fields of the invoice response, for fields=
+FIELD_COLUMNS = field_columns(InvoiceSchema, Invoice)
+
+
+def parse_include(include: str) -> Tuple[str, ...]:
+    """
+    Relationship names of an include parameter such as "items,client"
+    """
+    names = tuple(dict.fromkeys(name.strip() for name in include.split(",") if name.strip()))
+    unknown = [name for name in names if name not in INCLUDES]
+    if unknown:
+        raise BadRequestError(f"Unsupported include: {', '.join(unknown)}")
+    return names
+
+
+def _load_options(
+    include: Sequence[str], fields: Optional[Sequence[str]], *required: Any
+) -> List[Any]:
+    # One SELECT ... IN per relationship for all the invoices loaded, rather
+    # than a JOIN that repeats each invoice once per related row
+    options = [selectinload(INCLUDES[name]) for name in include]
+    if fields:
+        # The client is looked up by the invoice's client_id
+        if "client" in include:
+            required += (Invoice.client_id,)
+        options.append(load_fields(FIELD_COLUMNS, fields, *required))
+    return options
+
+
+def _include_versions(db: Session, user_id: int, query: Any, include: Sequence[str]) -> List[Version]:
+    """
+    Versions of the related rows include embeds in the invoices of query;
+    item changes already bump their invoice's updated_at
+    """
+    invoice_ids = query.with_entities(Invoice.id)
+    versions = []
+    if "payments" in include:
+        versions.append(query_version(
+            db.query(Payment).filter(
+                Payment.user_id == user_id, Payment.invoice_id.in_(invoice_ids)
+            ),
+            Payment,
+        ))
+    if "client" in include:
+        versions.append(query_version(
+            db.query(Client).filter(
+                Client.user_id == user_id, Client.id.in_(query.with_entities(Invoice.client_id))
+            ),
+            Client,
+        ))
+    return versions
+
+
+def _invoices_query(
+    db: Session,
+    user_id: int,
+    status: Optional[InvoiceStatus] = None,
+    client_id: Optional[int] = None,
+) -> Any:
+    query = db.query(Invoice).filter(Invoice.user_id == user_id)
+
+    if status:
+        query = query.filter(Invoice.status == status)
+
+    if client_id:
+        query = query.filter(Invoice.client_id == client_id)
+    return query
+
+
+def list_invoices(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[InvoiceStatus] = None,
+    client_id: Optional[int] = None,
+    sort: str = "created_at",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    include: Sequence[str] = ("items",),
+    fields: Optional[Sequence[str]] = None,
+) -> Page:
+    """
+    Retrieve a page of invoices for a user, with the relationships named in
+    include loaded, and only the columns of fields when given
+    """
+    query = _invoices_query(db, user_id, status, client_id).options(
+        *_load_options(include, fields, SORT_COLUMNS.get(sort, Invoice.id))
+    )
+    return paginate(query, Invoice, SORT_COLUMNS, sort, order, skip, limit, cursor)
+
+
+def invoices_version(
+    db: Session,
+    user_id: int,
+    status: Optional[InvoiceStatus] = None,
+    client_id: Optional[int] = None,
+    include: Sequence[str] = ("items",),
+) -> Version:
+    """
+    Version of the invoices list_invoices pages through, and of what include
+    embeds in them
+    """
+    query = _invoices_query(db, user_id, status, client_id)
+    return combine_versions(
+        query_version(query, Invoice), *_include_versions(db, user_id, query, include)
+    )
+
+
+def get_invoice(
+    db: Session,
+    user_id: int,
+    invoice_id: int,
+    include: Sequence[str] = ("items",),
+    fields: Optional[Sequence[str]] = None,
+) -> Invoice:
+    """
+    Get an invoice by ID with the relationships named in include loaded, and
+    only the columns of fields when given
+    """
+    invoice = db.query(Invoice).filter(
+        Invoice.id == invoice_id, Invoice.user_id == user_id
+    ).options(*_load_options(include, fields)).first()
+
+    if not invoice:
+        raise NotFoundError("Invoice not found")
+    return invoice
+
+
+def invoice_version(
+    db: Session, user_id: int, invoice_id: int, include: Sequence[str] = ("items",)
+) -> Version:
+    """
+    Version of an invoice and of what include embeds in it; item changes
+    bump the invoice's updated_at
+    """
+    query = db.query(Invoice).filter(Invoice.id == invoice_id, Invoice.user_id == user_id)
+    return combine_versions(
+        query_version(query, Invoice), *_include_versions(db, user_id, query, include)
+    )
+
+
+def _reload(db: Session, invoice: Invoice) -> Invoice:
+    """
+    Refresh an invoice and its items after a commit so it can be
+    serialized outside the session
+    """
+    return db.query(Invoice).filter(Invoice.id == invoice.id).options(
+        selectinload(Invoice.items)
+    ).populate_existing().one()
+
+
+def _flush_number(db: Session, user_id: int, number: Optional[str]) -> None:
+    """
+    Flush, turning a clash with another invoice's number into a BadRequestError
+    """
+    try:
+        db.flush()
+    except IntegrityError:
+        db.rollback()
+        if number is not None and db.scalar(
+            select(Invoice.id).where(Invoice.user_id == user_id, Invoice.number == number)
+        ):
+            raise BadRequestError(f"Invoice number {number} is already in use")
+        raise
+
+
+def create_invoice(db: Session, user_id: int, invoice_in: InvoiceCreate) -> Invoice:
+    """
+    Create a new invoice with its items, numbered from the user's invoice
+    settings unless it comes with a number
+    """
+    invoice_data = invoice_in.model_dump(exclude={"items"})
+    if invoice_data["number"] is None:
+        invoice_data["number"] = reserve_block(db, user_id)[0]
+    invoice = Invoice(**invoice_data, user_id=user_id, balance_due=invoice_in.total)
+    db.add(invoice)
+    _flush_number(db, user_id, invoice.number)  # Get the invoice ID without committing
+    reports.record(db, invoices_added=[reports.invoice_figures(invoice)])
+
+    if invoice_in.items:
+        db.execute(
+            insert(InvoiceItem),
+            [{**item.model_dump(), "invoice_id": invoice.id} for item in invoice_in.items],
+        )
+
+    db.commit()
+    return _reload(db, invoice)
+
+
+def _row_error(index: int, msg: str, loc: Optional[List[Any]] = None) -> Dict[str, Any]:
+    return {"index": index, "errors": [{"loc": loc or [], "msg": msg}]}
+
+
+def _insert_rows(
+    db: Session, user_id: int, rows: List[Tuple[int, InvoiceCreate]]
+) -> List[Dict[str, int]]:
+    """
+    Insert invoices with one multi-row INSERT ... RETURNING, then their items
+    """
+    invoice_rows = [
+        {
+            **invoice_in.model_dump(exclude={"items"}),
+            "status": invoice_in.status or InvoiceStatus.DRAFT,
+            "amount_paid": 0.0,
+            "balance_due": invoice_in.total,
+            "user_id": user_id,
+        }
+        for _, invoice_in in rows
+    ]
+    ids = db.scalars(
+        insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True), invoice_rows
+    ).all()
+    items = [
+        {**item.model_dump(), "invoice_id": invoice_id}
+        for (_, invoice_in), invoice_id in zip(rows, ids)
+        for item in invoice_in.items
+    ]
+    if items:
+        db.execute(insert(InvoiceItem), items)
+    reports.record(db, invoices_added=[
+        reports.InvoiceFigures(**{field: row[field] for field in reports.InvoiceFigures._fields})
+        for row in invoice_rows
+    ])
+    return [{"index": index, "id": invoice_id} for (index, _), invoice_id in zip(rows, ids)]
+
+
+def _insert_chunk(
+    db: Session,
+    user_id: int,
+    rows: List[Tuple[int, InvoiceCreate]],
+    errors: List[Dict[str, Any]],
+) -> List[Dict[str, int]]:
+    """
+    Insert a chunk in a savepoint; if the database rejects it, retry row by
+    row to find the rows at fault
+    """
+    try:
+        with db.begin_nested():
+            return _insert_rows(db, user_id, rows)
+    except SQLAlchemyError as exc:
+        if len(rows) > 1:
+            created = []
+            for row in rows:
+                created += _insert_chunk(db, user_id, [row], errors)
+            return created
+        reason = type(getattr(exc, "orig", None) or exc).__name__
+        errors.append(_row_error(rows[0][0], f"Rejected by the database ({reason})"))
+        return []
+
+
+def bulk_create_invoices(
+    db: Session,
+    user_id: int,
+    payloads: List[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Create many invoices with their items in one transaction
+
+    Every payload is validated as an InvoiceCreate and its client and number
+    checked, one query each per chunk; rows without a number share one block
+    reserved from the user's invoice settings. Valid rows are inserted
+    chunk_size invoices per statement; rejected rows are reported by index
+    and don't stop the rest.
+    """
+    if len(payloads) > settings.BULK_INVOICE_MAX_ROWS:
+        raise BadRequestError(
+            f"At most {settings.BULK_INVOICE_MAX_ROWS} invoices per request"
+        )
+    chunk_size = chunk_size or settings.BULK_INVOICE_CHUNK_SIZE
+
+    created: List[Dict[str, Any]] = []
+    errors: List[Dict[str, Any]] = []
+    valid: List[Tuple[int, InvoiceCreate]] = []
+    for index, payload in enumerate(payloads):
+        try:
+            valid.append((index, InvoiceCreate.model_validate(payload)))
+        except ValidationError as exc:
+            errors.append({
+                "index": index,
+                "errors": [{"loc": list(e["loc"]), "msg": e["msg"]} for e in exc.errors()],
+            })
+
+    unnumbered = [index for index, (_, invoice_in) in enumerate(valid) if invoice_in.number is None]
+    if unnumbered:
+        numbers = reserve_block(db, user_id, len(unnumbered))
+        for index, number in zip(unnumbered, numbers):
+            row_index, invoice_in = valid[index]
+            valid[index] = (row_index, invoice_in.model_copy(update={"number": number}))
+
+    # Numbers taken by existing invoices or earlier rows
+    used: Set[str] = set()
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        client_ids = {invoice_in.client_id for _, invoice_in in chunk}
+        owned = set(db.scalars(
+            select(Client.id).where(Client.user_id == user_id, Client.id.in_(client_ids))
+        ))
+        used.update(db.scalars(
+            select(Invoice.number).where(
+                Invoice.user_id == user_id,
+                Invoice.number.in_({invoice_in.number for _, invoice_in in chunk}),
+            )
+        ))
+        rows = []
+        for index, invoice_in in chunk:
+            if invoice_in.client_id not in owned:
+                errors.append(_row_error(index, "Client not found", ["client_id"]))
+            elif invoice_in.number in used:
+                errors.append(_row_error(index, "Invoice number already in use", ["number"]))
+            else:
+                used.add(invoice_in.number)
+                rows.append((index, invoice_in))
+        if rows:
+            created += _insert_chunk(db, user_id, rows, errors)
+
+    db.commit()
+    errors.sort(key=lambda error: error["index"])
+    return {"created": created, "errors": errors}
+
+
+# Item columns an update can change
+ITEM_FIELDS = ("description", "quantity", "unit_price", "amount")
+
+
+def _sync_items(db: Session, invoice_id: int, items_in: List[InvoiceItemUpsert]) -> None:
+    """
+    Make the invoice's items match items_in with as few writes as possible
+
+    Items with an id are updated only if a field changed, items without one
+    are inserted and existing items missing from items_in are deleted; each
+    kind of change is a single statement.
+    """
+    existing = {
+        row.id: row
+        for row in db.execute(
+            select(InvoiceItem.id, *[getattr(InvoiceItem, f) for f in ITEM_FIELDS])
+            .where(InvoiceItem.invoice_id == invoice_id)
+        )
+    }
+
+    seen = set()
+    to_insert, to_update = [], []
+    for item_in in items_in:
+        values = item_in.model_dump(include=set(ITEM_FIELDS))
+        if item_in.id is None:
+            to_insert.append({**values, "invoice_id": invoice_id})
+            continue
+        if item_in.id not in existing:
+            raise BadRequestError(f"Item {item_in.id} doesn't belong to this invoice")
+        if item_in.id in seen:
+            raise BadRequestError(f"Item {item_in.id} is listed more than once")
+        seen.add(item_in.id)
+        current = existing[item_in.id]
+        if any(getattr(current, field) != value for field, value in values.items()):
+            to_update.append({**values, "id": item_in.id})
+
+    to_delete = [item_id for item_id in existing if item_id not in seen]
+    if to_delete:
+        db.execute(delete(InvoiceItem).where(InvoiceItem.id.in_(to_delete)))
+    if to_update:
+        db.execute(update(InvoiceItem), to_update)
+    if to_insert:
+        db.execute(insert(InvoiceItem), to_insert)
+
+
+def update_invoice(
+    db: Session, user_id: int, invoice_id: int, invoice_in: InvoiceUpdate
+) -> Invoice:
+    """
+    Update an invoice, syncing its items if they are provided
+    """
+    invoice = db.query(Invoice).filter(
+        Invoice.id == invoice_id, Invoice.user_id == user_id
+    ).with_for_update().first()
+
+    if not invoice:
+        raise NotFoundError("Invoice not found")
+    before = reports.invoice_figures(invoice)
+
+    # Update invoice fields
+    update_data = invoice_in.model_dump(exclude={"items"}, exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(invoice, field, value)
+    if "total" in update_data:
+        # The row is locked, so amount_paid is current; settled as by
+        # payments.settled_status
+        invoice.balance_due = round(invoice.total - invoice.amount_paid, 2)
+        if "status" not in update_data:
+            if invoice.balance_due <= 0:
+                invoice.status = InvoiceStatus.PAID
+            elif invoice.status == InvoiceStatus.PAID:
+                invoice.status = InvoiceStatus.PENDING
+
+    # Update items if provided
+    if invoice_in.items is not None:
+        _sync_items(db, invoice.id, invoice_in.items)
+        # Items are part of the invoice's representation, and so of its version
+        invoice.updated_at = datetime.utcnow()
+
+    db.add(invoice)
+    _flush_number(db, user_id, update_data.get("number"))
+    reports.record(
+        db,
+        invoices_removed=[before],
+        invoices_added=[reports.invoice_figures(invoice)],
+    )
+    db.commit()
+    return _reload(db, invoice)
+
+
+def delete_invoice(db: Session, user_id: int, invoice_id: int) -> Invoice:
+    """
+    Delete an invoice with its items and payments
+    """
+    # Load what the delete cascades to up front, rather than lazily per relationship
+    invoice = get_invoice(db, user_id, invoice_id, include=("items", "payments"))
+    reports.record(
+        db,
+        invoices_removed=[reports.invoice_figures(invoice)],
+        payments_removed=[reports.payment_figures(payment) for payment in invoice.payments],
+    )
+    db.delete(invoice)
+    db.commit()
+    return invoice
+
+
+def _mark_overdue_batch(db: Session, today: date, batch_size: int) -> List[int]:
+    """
+    Mark up to batch_size pending invoices due before today overdue, in one
+    UPDATE, and carry the change over to the rollups; returns their ids
+    """
+    due = (
+        select(Invoice.id)
+        .where(Invoice.status == InvoiceStatus.PENDING, Invoice.due_date < today)
+        # Oldest first, in ix_invoice_status_due_date order, so no sort
+        .order_by(Invoice.due_date, Invoice.id)
+        .limit(batch_size)
+        # Concurrent sweeps (one per worker) take disjoint batches
+        .with_for_update(skip_locked=True)
+    )
+    rows = db.execute(
+        update(Invoice)
+        .where(Invoice.id.in_(due.scalar_subquery()), Invoice.status == InvoiceStatus.PENDING)
+        .values(status=InvoiceStatus.OVERDUE)
+        .returning(Invoice.id, *reports.INVOICE_FIGURES)
+        .execution_options(synchronize_session=False)
+    ).all()
+    after = [reports.InvoiceFigures(*row[1:]) for row in rows]
+    reports.record(
+        db,
+        invoices_removed=[figures._replace(status=InvoiceStatus.PENDING) for figures in after],
+        invoices_added=after,
+    )
+    db.commit()
+    return [row[0] for row in rows]
+
+
+def mark_overdue(
+    db: Session, today: Optional[date] = None, batch_size: Optional[int] = None
+) -> List[int]:
+    """
+    Mark every pending invoice due before today (UTC) overdue; returns the
+    ids of the invoices that changed
+
+    Each batch of OVERDUE_SWEEP_BATCH_SIZE is its own transaction, so no
+    lock is held for the whole sweep. The UPDATE bumps updated_at, which
+    invalidates ETags.
+    """
+    today = today or datetime.utcnow().date()
+    batch_size = batch_size or settings.OVERDUE_SWEEP_BATCH_SIZE
+    marked: List[int] = []
+    while True:
+        ids = _mark_overdue_batch(db, today, batch_size)
+        marked.extend(ids)
+        if len(ids) < batch_size:
+            return marked
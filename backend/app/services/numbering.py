@@ -0,0 +1,104 @@
+from typing import Any, Dict, List, NamedTuple
+from sqlalchemy import case, select, tuple_, update
+from sqlalchemy.orm import Session
+from app.db.upsert import dialect_insert
+from app.models.invoice import Invoice
+from app.models.invoice_settings import InvoiceSettings
+
+# (user_id, number) pairs per lookup of numbers already in use, within the
+# bind parameter limits of SQLite and asyncpg
+TAKEN_CHECK_SIZE = 10000
+
+
+class Reservation(NamedTuple):
+    """Invoice numbers reserved for a user, with the user's due date default"""
+    numbers: List[str]
+    default_due_days: int
+
+
+def _update(db: Session, counts: Dict[int, int]) -> List[Any]:
+    locked = (
+        select(InvoiceSettings.id)
+        .where(InvoiceSettings.user_id.in_(counts))
+        .order_by(InvoiceSettings.user_id)
+        .with_for_update()
+    )
+    return db.execute(
+        update(InvoiceSettings)
+        .where(InvoiceSettings.id.in_(locked.scalar_subquery()))
+        .values(
+            next_invoice_number=InvoiceSettings.next_invoice_number
+            + case(counts, value=InvoiceSettings.user_id)
+        )
+        .returning(
+            InvoiceSettings.user_id,
+            InvoiceSettings.invoice_prefix,
+            InvoiceSettings.next_invoice_number,
+            InvoiceSettings.default_due_days,
+        )
+        .execution_options(synchronize_session=False)
+    ).all()
+
+
+def _reserve(db: Session, counts: Dict[int, int]) -> Dict[int, Reservation]:
+    """
+    Move each user's next_invoice_number on by counts[user_id] with one
+    UPDATE ... RETURNING, creating default settings for users without any
+
+    Settings rows are locked in user order, so concurrent reservations for
+    overlapping users queue up rather than deadlock.
+    """
+    rows = _update(db, counts)
+    missing = counts.keys() - {row.user_id for row in rows}
+    if missing:
+        insert_ = dialect_insert(db)
+        db.execute(
+            insert_(InvoiceSettings).on_conflict_do_nothing(index_elements=["user_id"]),
+            [{"user_id": user_id} for user_id in sorted(missing)],
+        )
+        rows += _update(db, {user_id: counts[user_id] for user_id in missing})
+    return {
+        user_id: Reservation(
+            [f"{prefix}{number}" for number in range(next_number - counts[user_id], next_number)],
+            due_days,
+        )
+        for user_id, prefix, next_number, due_days in rows
+    }
+
+
+def reserve_numbers(db: Session, counts: Dict[int, int]) -> Dict[int, Reservation]:
+    """
+    Reserve counts[user_id] invoice numbers for each user, formatted with the
+    user's invoice_prefix
+
+    The reservation is part of the caller's transaction: the settings rows
+    stay locked until it ends, and a rollback hands the numbers back.
+    Numbers already on an invoice (typed in by hand) are skipped.
+    """
+    reserved = _reserve(db, counts)
+    fresh = reserved
+    while True:
+        pairs = [(user_id, number) for user_id, block in fresh.items() for number in block.numbers]
+        taken = set()
+        for start in range(0, len(pairs), TAKEN_CHECK_SIZE):
+            taken.update(db.execute(
+                select(Invoice.user_id, Invoice.number).where(
+                    tuple_(Invoice.user_id, Invoice.number).in_(pairs[start:start + TAKEN_CHECK_SIZE])
+                )
+            ).all())
+        if not taken:
+            return reserved
+        missing: Dict[int, int] = {}
+        for user_id, number in taken:
+            reserved[user_id].numbers.remove(number)
+            missing[user_id] = missing.get(user_id, 0) + 1
+        fresh = _reserve(db, missing)
+        for user_id, block in fresh.items():
+            reserved[user_id].numbers.extend(block.numbers)
+
+
+def reserve_block(db: Session, user_id: int, count: int = 1) -> List[str]:
+    """
+    Reserve the next count invoice numbers of one user
+    """
+    return reserve_numbers(db, {user_id: count})[user_id].numbers
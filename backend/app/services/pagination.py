@@ -0,0 +1,99 @@
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, Dict, List, NamedTuple, Optional
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+from app.services.errors import BadRequestError
+
+
+class Page(NamedTuple):
+    """One page of rows and the cursor of the page after it, if any"""
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    return value
+
+
+def _load_value(column: Any, value: Any) -> Any:
+    python_type = column.type.python_type
+    if python_type is datetime.datetime:
+        return datetime.datetime.fromisoformat(value)
+    if python_type is datetime.date:
+        return datetime.date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(sort: str, order: str, value: Any, row_id: int) -> str:
+    """
+    Encode the position after a row as an opaque URL-safe string
+    """
+    payload = json.dumps([sort, order, _dump_value(value), row_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """
+    Decode a cursor into [sort, order, value, id]
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        sort, order, value, row_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise BadRequestError("Invalid cursor")
+    return [sort, order, value, row_id]
+
+
+def paginate(
+    query: Query,
+    model: Any,
+    sort_columns: Dict[str, Any],
+    sort: str = "created_at",
+    order: str = "asc",
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+) -> Page:
+    """
+    Order query by (sort, id) and return one page of it
+
+    With a cursor the page starts right after the cursor's row (keyset
+    pagination, which stays fast on deep pages and doesn't shift when rows
+    are inserted); otherwise skip rows are skipped as before. next_cursor is
+    set whenever more rows follow.
+    """
+    if sort not in sort_columns:
+        raise BadRequestError(f"Unsupported sort key: {sort}")
+    column = sort_columns[sort]
+    descending = order == "desc"
+
+    if cursor:
+        cursor_sort, cursor_order, value, row_id = decode_cursor(cursor)
+        if cursor_sort != sort or cursor_order != order:
+            raise BadRequestError("Cursor doesn't match the requested sort")
+        try:
+            value = _load_value(column, value)
+        except (TypeError, ValueError):
+            raise BadRequestError("Invalid cursor")
+        position = tuple_(column, model.id)
+        after = tuple_(value, row_id)
+        query = query.filter(position < after if descending else position > after)
+        skip = 0
+
+    if descending:
+        query = query.order_by(column.desc(), model.id.desc())
+    else:
+        query = query.order_by(column.asc(), model.id.asc())
+
+    rows = query.offset(skip).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return Page(rows, None)
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return Page(rows, encode_cursor(sort, order, getattr(last, column.key), last.id))
@@ -0,0 +1,269 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+from sqlalchemy import Float, Numeric, and_, case, cast, func, literal, or_, select, update
+from sqlalchemy.orm import Session
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.payment import Payment
+from app.schemas.payment import Payment as PaymentSchema, PaymentCreate, PaymentUpdate
+from app.services import reports
+from app.services.errors import NotFoundError
+from app.services.fields import field_columns, load_fields
+from app.services.pagination import Page, paginate
+from app.services.versions import Version, query_version
+
+# Sort keys accepted by list_payments
+SORT_COLUMNS = {
+    "created_at": Payment.created_at,
+    "date": Payment.date,
+    "amount": Payment.amount,
+}
+
+# Columns behind the fields of the payment response, for fields=
+FIELD_COLUMNS = field_columns(PaymentSchema, Payment)
+
+
+def _get_user_invoice(db: Session, user_id: int, invoice_id: int) -> Invoice:
+    # Lock the invoice so concurrent payments against it queue up
+    invoice = db.query(Invoice).filter(
+        Invoice.id == invoice_id, Invoice.user_id == user_id
+    ).with_for_update().first()
+    if not invoice:
+        raise NotFoundError("Invoice not found")
+    return invoice
+
+
+def cents(amount: Any) -> Any:
+    """
+    A money expression rounded to cents, so sums of Float amounts such as
+    0.1 + 0.7 compare equal to the 0.8 they add up to
+    """
+    # PostgreSQL only rounds numeric to a number of places
+    return cast(func.round(cast(amount, Numeric), 2), Float)
+
+
+def settled_status(balance_due: Any) -> Any:
+    """
+    Status once the balance is known: paid when covered, back to pending
+    when a paid invoice no longer is
+    """
+    paid = literal(InvoiceStatus.PAID, Invoice.status.type)
+    pending = literal(InvoiceStatus.PENDING, Invoice.status.type)
+    return case(
+        (cents(balance_due) <= 0, paid),
+        (Invoice.status == InvoiceStatus.PAID, pending),
+        else_=Invoice.status,
+    )
+
+
+def _apply_payments(
+    db: Session,
+    deltas: Dict[int, float],
+    payments_removed: Iterable[reports.PaymentFigures] = (),
+    payments_added: Iterable[reports.PaymentFigures] = (),
+) -> None:
+    """
+    Move the amount_paid of invoices by their delta, with balance_due and
+    status, in one UPDATE so concurrent writers can't lose each other's
+    change, and carry the change over to the rollups along with that of
+    the payments
+    """
+    deltas = {invoice_id: delta for invoice_id, delta in deltas.items() if delta}
+    before: List[reports.InvoiceFigures] = []
+    after: List[reports.InvoiceFigures] = []
+    if deltas:
+        before = reports.load_invoices_figures(db, deltas, for_update=True)
+        amount_paid = cents(Invoice.amount_paid + case(deltas, value=Invoice.id))
+        balance_due = cents(Invoice.total - amount_paid)
+        after = [
+            reports.InvoiceFigures(*row)
+            for row in db.execute(
+                update(Invoice)
+                .where(Invoice.id.in_(list(deltas)))
+                .values(
+                    amount_paid=amount_paid,
+                    balance_due=balance_due,
+                    status=settled_status(balance_due),
+                )
+                .returning(*reports.INVOICE_FIGURES)
+                .execution_options(synchronize_session=False)
+            )
+        ]
+    reports.record(
+        db,
+        invoices_removed=before,
+        invoices_added=after,
+        payments_removed=payments_removed,
+        payments_added=payments_added,
+    )
+
+
+def _payments_query(db: Session, user_id: int, invoice_id: Optional[int] = None) -> Any:
+    query = db.query(Payment).filter(Payment.user_id == user_id)
+
+    if invoice_id:
+        query = query.filter(Payment.invoice_id == invoice_id)
+    return query
+
+
+def list_payments(
+    db: Session,
+    user_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    invoice_id: Optional[int] = None,
+    sort: str = "created_at",
+    order: str = "asc",
+    cursor: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+) -> Page:
+    """
+    Retrieve a page of payments for a user, with only the columns of fields
+    loaded when given
+    """
+    query = _payments_query(db, user_id, invoice_id)
+    if fields:
+        query = query.options(load_fields(FIELD_COLUMNS, fields, SORT_COLUMNS.get(sort, Payment.id)))
+    return paginate(query, Payment, SORT_COLUMNS, sort, order, skip, limit, cursor)
+
+
+def payments_version(db: Session, user_id: int, invoice_id: Optional[int] = None) -> Version:
+    """
+    Version of the payments list_payments pages through
+    """
+    return query_version(_payments_query(db, user_id, invoice_id), Payment)
+
+
+def get_payment(
+    db: Session,
+    user_id: int,
+    payment_id: int,
+    for_update: bool = False,
+    fields: Optional[Sequence[str]] = None,
+) -> Payment:
+    """
+    Get a payment by ID, with only the columns of fields loaded when given
+    """
+    query = db.query(Payment).filter(
+        Payment.id == payment_id, Payment.user_id == user_id
+    )
+    if fields:
+        query = query.options(load_fields(FIELD_COLUMNS, fields))
+    payment = (query.with_for_update() if for_update else query).first()
+
+    if not payment:
+        raise NotFoundError("Payment not found")
+    return payment
+
+
+def payment_version(db: Session, user_id: int, payment_id: int) -> Version:
+    """
+    Version of a payment
+    """
+    return query_version(
+        db.query(Payment).filter(Payment.id == payment_id, Payment.user_id == user_id), Payment
+    )
+
+
+def create_payment(db: Session, user_id: int, payment_in: PaymentCreate) -> Payment:
+    """
+    Record a payment, marking the invoice paid once it is covered
+    """
+    # Check if invoice exists and belongs to user
+    invoice = _get_user_invoice(db, user_id, payment_in.invoice_id)
+
+    payment = Payment(**payment_in.model_dump(), user_id=user_id)
+    db.add(payment)
+    _apply_payments(
+        db, {invoice.id: payment_in.amount}, payments_added=[reports.payment_figures(payment)]
+    )
+
+    db.commit()
+    db.refresh(payment)
+    return payment
+
+
+def update_payment(
+    db: Session, user_id: int, payment_id: int, payment_in: PaymentUpdate
+) -> Payment:
+    """
+    Update a payment, moving its amount between invoice balances as needed
+    """
+    payment = get_payment(db, user_id, payment_id, for_update=True)
+    old_invoice_id, old_amount = payment.invoice_id, payment.amount
+    before = reports.payment_figures(payment)
+
+    update_data = payment_in.model_dump(exclude_unset=True)
+
+    # If invoice_id is being changed, verify the new invoice exists and belongs to user
+    if "invoice_id" in update_data and update_data["invoice_id"] != payment.invoice_id:
+        _get_user_invoice(db, user_id, update_data["invoice_id"])
+
+    for field, value in update_data.items():
+        setattr(payment, field, value)
+
+    # Moving a payment settles both invoices in the same statements
+    deltas = defaultdict(float)
+    deltas[old_invoice_id] -= old_amount
+    deltas[payment.invoice_id] += payment.amount
+    _apply_payments(
+        db, deltas, payments_removed=[before], payments_added=[reports.payment_figures(payment)]
+    )
+
+    db.add(payment)
+    db.commit()
+    db.refresh(payment)
+    return payment
+
+
+def delete_payment(db: Session, user_id: int, payment_id: int) -> Payment:
+    """
+    Delete a payment, reopening the invoice if it is no longer covered
+    """
+    payment = get_payment(db, user_id, payment_id, for_update=True)
+
+    db.delete(payment)
+    _apply_payments(
+        db,
+        {payment.invoice_id: -payment.amount},
+        payments_removed=[reports.payment_figures(payment)],
+    )
+    db.commit()
+
+    return payment
+
+
+def repair_balances(db: Session) -> int:
+    """
+    Recompute amount_paid, balance_due and status of every invoice from its
+    payments in one UPDATE, then the rollups; returns how many invoices were off
+    """
+    totals = (
+        select(
+            Invoice.id.label("invoice_id"),
+            cents(func.coalesce(func.sum(Payment.amount), 0)).label("amount_paid"),
+        )
+        .outerjoin(Payment, Payment.invoice_id == Invoice.id)
+        .group_by(Invoice.id)
+        .subquery()
+    )
+    balance_due = cents(Invoice.total - totals.c.amount_paid)
+    status = settled_status(balance_due)
+    result = db.execute(
+        update(Invoice)
+        .where(
+            and_(
+                Invoice.id == totals.c.invoice_id,
+                or_(
+                    cents(Invoice.amount_paid) != totals.c.amount_paid,
+                    cents(Invoice.balance_due) != balance_due,
+                    Invoice.status != status,
+                ),
+            )
+        )
+        .values(amount_paid=totals.c.amount_paid, balance_due=balance_due, status=status)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        reports.rebuild(db)
+    db.commit()
+    return result.rowcount
@@ -0,0 +1,187 @@
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import case, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.db.upsert import dialect_insert
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.invoice_item import InvoiceItem
+from app.models.recurring_invoice import RecurringFrequency, RecurringInvoice
+from app.services import reports
+from app.services.numbering import reserve_numbers
+
+# Months between periods, for the frequencies that aren't weekly
+FREQUENCY_MONTHS = {
+    RecurringFrequency.MONTHLY: 1,
+    RecurringFrequency.QUARTERLY: 3,
+    RecurringFrequency.YEARLY: 12,
+}
+
+# Template columns a batch works from
+TEMPLATE_COLUMNS = (
+    RecurringInvoice.id,
+    RecurringInvoice.user_id,
+    RecurringInvoice.client_id,
+    RecurringInvoice.frequency,
+    RecurringInvoice.next_date,
+    RecurringInvoice.anchor_day,
+    RecurringInvoice.template,
+)
+
+
+def next_period(day: date, frequency: RecurringFrequency, anchor_day: Optional[int] = None) -> date:
+    """
+    The period after day, on anchor_day (by default day's own) clamped to
+    the month's length, so a Jan 31 schedule runs on Feb 28 and then Mar 31
+    """
+    if frequency == RecurringFrequency.WEEKLY:
+        return day + timedelta(weeks=1)
+    months = day.month - 1 + FREQUENCY_MONTHS[frequency]
+    year, month = day.year + months // 12, months % 12 + 1
+    anchor_day = anchor_day or day.day
+    return date(year, month, min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def _invoice_row(template: Any, number: str, due_days: int) -> Dict[str, Any]:
+    body = template.template
+    return {
+        "number": number,
+        "status": InvoiceStatus.DRAFT,
+        "issued_date": template.next_date,
+        "due_date": template.next_date + timedelta(days=due_days),
+        "subtotal": body["subtotal"],
+        "tax": body.get("tax") or 0.0,
+        "discount": body.get("discount") or 0.0,
+        "total": body["total"],
+        "amount_paid": 0.0,
+        "balance_due": body["total"],
+        "notes": body.get("notes"),
+        "client_id": template.client_id,
+        "user_id": template.user_id,
+        "recurring_invoice_id": template.id,
+        "recurring_period": template.next_date,
+    }
+
+
+def _insert_invoices(db: Session, templates: Sequence[Any]) -> List[int]:
+    """
+    Insert one draft invoice per template for its next_date, with items,
+    skipping periods that already have one; returns the new invoice ids
+    """
+    if not templates:
+        return []
+    counts: Dict[int, int] = {}
+    for template in templates:
+        counts[template.user_id] = counts.get(template.user_id, 0) + 1
+    reserved = {
+        user_id: (iter(block.numbers), block.default_due_days)
+        for user_id, block in reserve_numbers(db, counts).items()
+    }
+    rows = []
+    for template in templates:
+        numbers, due_days = reserved[template.user_id]
+        rows.append(_invoice_row(template, next(numbers), due_days))
+
+    insert_ = dialect_insert(db)
+    created = db.execute(
+        insert_(Invoice)
+        # Another run got there first; its invoice stands
+        .on_conflict_do_nothing(index_elements=["recurring_invoice_id", "recurring_period"])
+        .returning(Invoice.id, Invoice.recurring_invoice_id),
+        rows,
+    ).all()
+    by_template = {template.id: template for template in templates}
+    items = [
+        {
+            "description": item["description"],
+            "quantity": item["quantity"],
+            "unit_price": item["unit_price"],
+            "amount": item["amount"],
+            "invoice_id": invoice_id,
+        }
+        for invoice_id, template_id in created
+        for item in by_template[template_id].template.get("items") or []
+    ]
+    if items:
+        db.execute(insert(InvoiceItem), items)
+    inserted = {template_id for _, template_id in created}
+    reports.record(db, invoices_added=[
+        reports.InvoiceFigures(**{field: row[field] for field in reports.InvoiceFigures._fields})
+        for row in rows
+        if row["recurring_invoice_id"] in inserted
+    ])
+    return [invoice_id for invoice_id, _ in created]
+
+
+def _generate_batch(db: Session, today: date, batch_size: int) -> Tuple[int, List[int]]:
+    """
+    Generate the current period's invoice for up to batch_size due
+    templates and move them on to their next period, in one transaction;
+    returns how many templates it took and the new invoice ids
+    """
+    templates = db.execute(
+        select(*TEMPLATE_COLUMNS)
+        .where(RecurringInvoice.active.is_(True), RecurringInvoice.next_date <= today)
+        .order_by(RecurringInvoice.next_date, RecurringInvoice.id)
+        .limit(batch_size)
+        # Concurrent runs take disjoint batches
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not templates:
+        db.rollback()
+        return 0, []
+
+    # Periods that already have their invoice (say next_date was moved back
+    # by hand) are only advanced
+    done = set(db.execute(
+        select(Invoice.recurring_invoice_id, Invoice.recurring_period).where(
+            tuple_(Invoice.recurring_invoice_id, Invoice.recurring_period).in_(
+                [(template.id, template.next_date) for template in templates]
+            )
+        )
+    ).all())
+    created = _insert_invoices(
+        db, [template for template in templates if (template.id, template.next_date) not in done]
+    )
+    # Templates not yet anchored keep the day of the period just generated
+    anchors = {template.id: template.anchor_day or template.next_date.day for template in templates}
+    db.execute(
+        update(RecurringInvoice)
+        .where(RecurringInvoice.id.in_([template.id for template in templates]))
+        .values(
+            next_date=case(
+                {
+                    template.id: next_period(template.next_date, template.frequency, anchors[template.id])
+                    for template in templates
+                },
+                value=RecurringInvoice.id,
+            ),
+            anchor_day=case(anchors, value=RecurringInvoice.id),
+            last_sent=today,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(templates), created
+
+
+def generate_recurring(
+    db: Session, today: Optional[date] = None, batch_size: Optional[int] = None
+) -> List[int]:
+    """
+    Generate the invoices of every active recurring template due by today
+    (UTC); returns the ids of the invoices created
+
+    Each batch of RECURRING_BATCH_SIZE templates is its own transaction.
+    Templates more than one period behind get an invoice per missed period,
+    issued on the period's date.
+    """
+    today = today or datetime.utcnow().date()
+    batch_size = batch_size or settings.RECURRING_BATCH_SIZE
+    created: List[int] = []
+    while True:
+        taken, ids = _generate_batch(db, today, batch_size)
+        created.extend(ids)
+        if not taken:
+            return created
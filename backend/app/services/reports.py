@@ -0,0 +1,287 @@
+import datetime
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+from sqlalchemy import Date, Float, cast, delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+from app.db.upsert import dialect_insert
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.payment import Payment, PaymentMethod
+from app.models.report import ClientTotal, MonthlyTotal, PaymentMethodTotal, StatusTotal
+
+ROLLUPS = (MonthlyTotal, StatusTotal, ClientTotal, PaymentMethodTotal)
+
+
+class InvoiceFigures(NamedTuple):
+    """The parts of an invoice the rollups are made of"""
+    user_id: int
+    client_id: int
+    status: InvoiceStatus
+    issued_date: datetime.date
+    total: float
+    amount_paid: float
+    balance_due: float
+
+
+class PaymentFigures(NamedTuple):
+    """The parts of a payment the rollups are made of"""
+    user_id: int
+    date: datetime.date
+    method: PaymentMethod
+    amount: float
+
+
+INVOICE_FIGURES = tuple(getattr(Invoice, field) for field in InvoiceFigures._fields)
+PAYMENT_FIGURES = tuple(getattr(Payment, field) for field in PaymentFigures._fields)
+
+
+def invoice_figures(invoice: Any) -> InvoiceFigures:
+    return InvoiceFigures(*(getattr(invoice, field) for field in InvoiceFigures._fields))
+
+
+def payment_figures(payment: Any) -> PaymentFigures:
+    return PaymentFigures(*(getattr(payment, field) for field in PaymentFigures._fields))
+
+
+def load_invoices_figures(
+    db: Session, invoice_ids: Iterable[int], for_update: bool = False
+) -> List[InvoiceFigures]:
+    # In id order, so concurrent writers lock the invoices the same way
+    query = select(*INVOICE_FIGURES).where(Invoice.id.in_(list(invoice_ids))).order_by(Invoice.id)
+    rows = db.execute(query.with_for_update() if for_update else query)
+    return [InvoiceFigures(*row) for row in rows]
+
+
+def _month(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def _add(deltas: Dict, model: Any, key: Dict[str, Any], **values: float) -> None:
+    bucket = deltas.setdefault((model, tuple(key.items())), defaultdict(int))
+    for column, value in values.items():
+        bucket[column] += value
+
+
+def _add_invoice(deltas: Dict, figures: InvoiceFigures, sign: int) -> None:
+    user = {"user_id": figures.user_id}
+    _add(
+        deltas, StatusTotal, {**user, "status": figures.status},
+        invoices=sign,
+        total=sign * figures.total,
+        balance_due=sign * figures.balance_due,
+    )
+    _add(
+        deltas, ClientTotal, {**user, "client_id": figures.client_id},
+        invoices=sign,
+        invoiced=sign * figures.total,
+        paid=sign * figures.amount_paid,
+        balance_due=sign * figures.balance_due,
+    )
+    _add(
+        deltas, MonthlyTotal, {**user, "month": _month(figures.issued_date)},
+        invoiced=sign * figures.total,
+    )
+
+
+def _add_payment(deltas: Dict, figures: PaymentFigures, sign: int) -> None:
+    user = {"user_id": figures.user_id}
+    _add(
+        deltas, MonthlyTotal, {**user, "month": _month(figures.date)},
+        received=sign * figures.amount,
+    )
+    _add(
+        deltas, PaymentMethodTotal, {**user, "method": figures.method},
+        payments=sign,
+        amount=sign * figures.amount,
+    )
+
+
+def record(
+    db: Session,
+    invoices_removed: Iterable[InvoiceFigures] = (),
+    invoices_added: Iterable[InvoiceFigures] = (),
+    payments_removed: Iterable[PaymentFigures] = (),
+    payments_added: Iterable[PaymentFigures] = (),
+) -> None:
+    """
+    Move the rollups from what invoices and payments contributed before a
+    write to what they contribute after it
+
+    Pass the figures of rows as they were before the write as removed and as
+    they are after it as added. The rollup rows that change are upserted with
+    one executemany per table, in a fixed order so concurrent writers lock
+    rows the same way.
+    """
+    deltas: Dict = {}
+    for figures in invoices_removed:
+        _add_invoice(deltas, figures, -1)
+    for figures in invoices_added:
+        _add_invoice(deltas, figures, 1)
+    for figures in payments_removed:
+        _add_payment(deltas, figures, -1)
+    for figures in payments_added:
+        _add_payment(deltas, figures, 1)
+
+    insert_ = dialect_insert(db)
+    ordered = sorted(
+        deltas.items(),
+        key=lambda item: (item[0][0].__tablename__, [str(value) for _, value in item[0][1]]),
+    )
+    rows: Dict = {}
+    for (model, key), values in ordered:
+        if any(values.values()):
+            # Every row of a table sets all its totals, so one statement fits all
+            totals = {column.key: values.get(column.key, 0) for column in _totals(model)}
+            rows.setdefault(model, []).append({**dict(key), **totals})
+    for model, params in rows.items():
+        statement = insert_(model)
+        db.execute(
+            statement.on_conflict_do_update(
+                index_elements=[column.key for column in model.__table__.primary_key],
+                set_={
+                    column.key: column + statement.excluded[column.key]
+                    for column in _totals(model)
+                },
+            ),
+            params,
+        )
+
+
+def _totals(model: Any) -> List[Any]:
+    return [column for column in model.__table__.columns if not column.primary_key]
+
+
+def _month_of(db: Session, column: Any) -> Any:
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(func.date_trunc("month", column), Date)
+    return func.date(column, "start of month")
+
+
+def rebuild(db: Session, user_id: Optional[int] = None) -> None:
+    """
+    Recompute the rollups of one user, or of everyone, from invoices and
+    payments with one INSERT ... SELECT per rollup
+    """
+    def scoped(query: Any, model: Any) -> Any:
+        return query if user_id is None else query.where(model.user_id == user_id)
+
+    for model in ROLLUPS:
+        db.execute(scoped(delete(model), model))
+
+    zero = literal(0.0, Float)
+    months = union_all(
+        scoped(select(
+            Invoice.user_id,
+            _month_of(db, Invoice.issued_date).label("month"),
+            Invoice.total.label("invoiced"),
+            zero.label("received"),
+        ), Invoice),
+        scoped(select(
+            Payment.user_id, _month_of(db, Payment.date), zero, Payment.amount,
+        ), Payment),
+    ).subquery()
+    db.execute(insert(MonthlyTotal).from_select(
+        ["user_id", "month", "invoiced", "received"],
+        select(
+            months.c.user_id, months.c.month,
+            func.sum(months.c.invoiced), func.sum(months.c.received),
+        ).group_by(months.c.user_id, months.c.month),
+    ))
+    db.execute(insert(StatusTotal).from_select(
+        ["user_id", "status", "invoices", "total", "balance_due"],
+        scoped(select(
+            Invoice.user_id, Invoice.status,
+            func.count(), func.sum(Invoice.total), func.sum(Invoice.balance_due),
+        ), Invoice).group_by(Invoice.user_id, Invoice.status),
+    ))
+    db.execute(insert(ClientTotal).from_select(
+        ["user_id", "client_id", "invoices", "invoiced", "paid", "balance_due"],
+        scoped(select(
+            Invoice.user_id, Invoice.client_id, func.count(), func.sum(Invoice.total),
+            func.sum(Invoice.amount_paid), func.sum(Invoice.balance_due),
+        ), Invoice).group_by(Invoice.user_id, Invoice.client_id),
+    ))
+    db.execute(insert(PaymentMethodTotal).from_select(
+        ["user_id", "method", "payments", "amount"],
+        scoped(select(
+            Payment.user_id, Payment.method, func.count(), func.sum(Payment.amount),
+        ), Payment).group_by(Payment.user_id, Payment.method),
+    ))
+
+
+def _months_back(day: datetime.date, count: int) -> datetime.date:
+    index = day.year * 12 + day.month - 1 - count
+    return datetime.date(index // 12, index % 12 + 1, 1)
+
+
+def get_summary(
+    db: Session, user_id: int, months: int = 12, top_clients: int = 5
+) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Dashboard figures of a user, read from the rollups only
+    """
+    this_month = _month(datetime.date.today())
+    since = _months_back(this_month, months - 1)
+    monthly = {
+        row.month: row
+        for row in db.execute(
+            select(MonthlyTotal).where(
+                MonthlyTotal.user_id == user_id, MonthlyTotal.month >= since
+            )
+        ).scalars()
+    }
+    revenue_by_month = []
+    for offset in range(months - 1, -1, -1):
+        month = _months_back(this_month, offset)
+        row = monthly.get(month)
+        revenue_by_month.append({
+            "month": month,
+            "invoiced": round(row.invoiced, 2) if row else 0.0,
+            "received": round(row.received, 2) if row else 0.0,
+        })
+
+    statuses = db.execute(
+        select(StatusTotal)
+        .where(StatusTotal.user_id == user_id, StatusTotal.invoices > 0)
+        .order_by(StatusTotal.status)
+    ).scalars()
+    clients = db.execute(
+        select(ClientTotal, Client.name)
+        .join(Client, Client.id == ClientTotal.client_id)
+        .where(ClientTotal.user_id == user_id, ClientTotal.invoices > 0)
+        .order_by(ClientTotal.paid.desc(), ClientTotal.client_id)
+        .limit(top_clients)
+    )
+    methods = db.execute(
+        select(PaymentMethodTotal)
+        .where(PaymentMethodTotal.user_id == user_id, PaymentMethodTotal.payments > 0)
+        .order_by(PaymentMethodTotal.amount.desc())
+    ).scalars()
+
+    return {
+        "revenue_by_month": revenue_by_month,
+        "outstanding_by_status": [
+            {
+                "status": row.status,
+                "invoices": row.invoices,
+                "total": round(row.total, 2),
+                "balance_due": round(row.balance_due, 2),
+            }
+            for row in statuses
+        ],
+        "top_clients": [
+            {
+                "client_id": row.client_id,
+                "name": name,
+                "invoices": row.invoices,
+                "invoiced": round(row.invoiced, 2),
+                "paid": round(row.paid, 2),
+                "balance_due": round(row.balance_due, 2),
+            }
+            for row, name in clients
+        ],
+        "payment_methods": [
+            {"method": row.method, "payments": row.payments, "amount": round(row.amount, 2)}
+            for row in methods
+        ],
+    }
@@ -0,0 +1,188 @@
+import asyncio
+import hashlib
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+from jose import jwt, JWTError
+
+from app.core import http
+from app.core.config import settings
+from app.core.supabase import supabase_request
+from app.utils.cache import TTLCache
+
+# Algorithms accepted for locally verified tokens
+HMAC_ALGORITHMS = {"HS256"}
+ASYMMETRIC_ALGORITHMS = {"RS256", "ES256"}
+
+# Don't refetch the JWKS more often than this when an unknown key id shows up
+JWKS_MIN_REFRESH_SECONDS = 30
+
+# Verified Supabase users keyed by the SHA-256 of the access token
+claims_cache = TTLCache(
+    maxsize=settings.AUTH_CLAIMS_CACHE_SIZE,
+    ttl=settings.AUTH_CLAIMS_CACHE_TTL_SECONDS,
+)
+
+# Verifications under way by token hash, awaited by concurrent requests
+# for the same token instead of verifying it again
+_in_flight: Dict[str, "asyncio.Future[Optional[Dict[str, Any]]]"] = {}
+
+_jwks: Dict[str, Any] = {"keys": {}, "fetched_at": None}
+
+
+class KeyNotAvailable(Exception):
+    """Raised when a token can't be verified locally for lack of a key"""
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _user_from_claims(claims: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Shape verified JWT claims like the /auth/v1/user response
+    """
+    return {
+        "id": claims["sub"],
+        "email": claims.get("email"),
+        "role": claims.get("role"),
+        "app_metadata": claims.get("app_metadata") or {},
+        "user_metadata": claims.get("user_metadata") or {},
+    }
+
+
+async def get_jwks(force: bool = False) -> Dict[str, dict]:
+    """
+    Get the project signing keys by key id, refreshing the cached copy
+    when it is older than SUPABASE_JWKS_CACHE_SECONDS
+    """
+    now = time.monotonic()
+    fetched_at = _jwks["fetched_at"]
+    if fetched_at is not None:
+        age = now - fetched_at
+        if age < settings.SUPABASE_JWKS_CACHE_SECONDS and not force:
+            return _jwks["keys"]
+        if force and age < JWKS_MIN_REFRESH_SECONDS:
+            return _jwks["keys"]
+
+    keys = {}
+    try:
+        response = await http.request(
+            "GET", settings.JWKS_URL, headers={"apikey": settings.SUPABASE_ANON_KEY}
+        )
+        if response.status_code == 200:
+            keys = {
+                key["kid"]: key
+                for key in response.json().get("keys", [])
+                if "kid" in key
+            }
+    except (httpx.HTTPError, ValueError):
+        keys = _jwks["keys"]
+
+    _jwks["keys"] = keys
+    _jwks["fetched_at"] = now
+    return keys
+
+
+async def verify_token_locally(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Check the token signature, audience and expiry without calling Supabase
+
+    Returns the claims, or None if the token is invalid. Raises
+    KeyNotAvailable if no secret or published key matches the token.
+    """
+    try:
+        header = jwt.get_unverified_header(token)
+    except JWTError:
+        return None
+
+    algorithm = header.get("alg")
+    if algorithm in HMAC_ALGORITHMS:
+        if not settings.SUPABASE_JWT_SECRET:
+            raise KeyNotAvailable(algorithm)
+        key = settings.SUPABASE_JWT_SECRET
+    elif algorithm in ASYMMETRIC_ALGORITHMS:
+        kid = header.get("kid")
+        key = (await get_jwks()).get(kid)
+        if key is None:
+            key = (await get_jwks(force=True)).get(kid)
+        if key is None:
+            raise KeyNotAvailable(kid)
+        if key.get("alg", algorithm) != algorithm:
+            return None
+    else:
+        return None
+
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=settings.SUPABASE_JWT_AUDIENCE,
+            # A token for no user is as invalid as a badly signed one
+            options={"require_sub": True},
+        )
+    except JWTError:
+        return None
+
+
+async def fetch_remote_user(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify a token by asking Supabase Auth for the user it belongs to
+    """
+    response = await supabase_request("GET", "/auth/v1/user", token=token)
+    if response.status_code == 200:
+        return response.json()
+    return None
+
+
+async def get_supabase_user(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify a Supabase JWT token and get user information
+
+    Results are cached by token hash for at most AUTH_CLAIMS_CACHE_TTL_SECONDS
+    and never past the token expiry. Concurrent misses for the same token
+    share one verification.
+    """
+    cache_key = _token_hash(token)
+    user = claims_cache.get(cache_key)
+    if user is not None:
+        return user
+
+    verification = _in_flight.get(cache_key)
+    if verification is None:
+        verification = asyncio.ensure_future(_verify(token, cache_key))
+        _in_flight[cache_key] = verification
+        verification.add_done_callback(lambda _: _in_flight.pop(cache_key, None))
+    # A cancelled request must not cancel the others waiting on it
+    return await asyncio.shield(verification)
+
+
+async def _verify(token: str, cache_key: str) -> Optional[Dict[str, Any]]:
+    claims = None
+    if settings.AUTH_VERIFY_MODE == "local":
+        try:
+            claims = await verify_token_locally(token)
+        except KeyNotAvailable:
+            user = await fetch_remote_user(token)
+        else:
+            if claims is None:
+                return None
+            user = _user_from_claims(claims)
+    else:
+        user = await fetch_remote_user(token)
+
+    if not user:
+        return None
+
+    if claims is None:
+        # Supabase accepted the token, so reading its expiry unverified is safe
+        try:
+            claims = jwt.get_unverified_claims(token)
+        except JWTError:
+            claims = {}
+    expires_at = claims.get("exp")
+    ttl = expires_at - time.time() if expires_at else None
+    claims_cache.set(cache_key, user, ttl=ttl)
+    return user
@@ -0,0 +1,314 @@
+import math
+import random
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+from app.db.bulk import load_rows
+from app.models.client import Client
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.invoice_item import InvoiceItem
+from app.models.invoice_settings import InvoiceSettings
+from app.models.payment import Payment, PaymentMethod
+from app.models.user import User
+from app.services.reports import rebuild
+
+# Tables in foreign key order, the order a flush loads them in
+TABLES = (User, InvoiceSettings, Client, Invoice, InvoiceItem, Payment)
+
+# Spread of the skewed counts (sigma of the log-normal); with 1.0 about one
+# tenant in twenty has four times the mean
+SKEW = 1.0
+MAX_ITEMS = 200
+
+# Share of sent invoices by how they end up paid; the rest are unpaid
+PAID_IN_FULL = 0.60
+PARTLY_PAID = 0.15
+OVERPAID = 0.02
+# Share of all invoices that are drafts (the most recent) or cancelled
+DRAFTS = 0.04
+CANCELLED = 0.03
+
+PAYMENT_TERMS_DAYS = (14, 30, 30, 30, 45, 60)
+TAX_RATES = (0.0, 0.0, 0.05, 0.1, 0.2)
+METHODS = (
+    [PaymentMethod.BANK_TRANSFER] * 5
+    + [PaymentMethod.CREDIT_CARD] * 3
+    + [PaymentMethod.CHECK, PaymentMethod.CASH, PaymentMethod.OTHER]
+)
+SERVICES = (
+    "Consulting", "Design", "Development", "Support", "Hosting", "Training",
+    "Licence", "Maintenance", "Audit", "Travel", "Materials", "Installation",
+)
+COMPANIES = (
+    "Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Wonka", "Hooli",
+    "Vandelay", "Soylent", "Cyberdyne", "Tyrell", "Aperture", "Monarch", "Nakatomi",
+)
+KINDS = ("Industries", "Labs", "Holdings", "Systems", "Logistics", "Partners", "Media")
+
+
+class Scale(NamedTuple):
+    """Mean counts of a generated dataset"""
+    users: int
+    clients_per_user: float
+    invoices_per_client: float
+    items_per_invoice: float
+    days: int
+
+
+def skewed(rng: random.Random, mean: float, minimum: int = 0, maximum: Optional[int] = None) -> int:
+    """
+    A log-normal count with the given mean: most near it, a long tail above
+    """
+    if mean <= 0:
+        return minimum
+    value = round(rng.lognormvariate(math.log(mean) - SKEW ** 2 / 2, SKEW))
+    value = max(minimum, value)
+    return value if maximum is None else min(maximum, value)
+
+
+class _Ids:
+    """Next id per table, continuing after the rows already there"""
+
+    def __init__(self, db: Session):
+        self._next = {
+            model: (db.scalar(select(func.max(model.id))) or 0) + 1 for model in TABLES
+        }
+
+    def __call__(self, model: Any) -> int:
+        value = self._next[model]
+        self._next[model] = value + 1
+        return value
+
+
+def _stamp(day: date, rng: random.Random) -> datetime:
+    return datetime.combine(day, time()) + timedelta(seconds=rng.randrange(8 * 3600, 18 * 3600))
+
+
+def _payments(
+    rng: random.Random, total: float, issued: date, due: date, today: date
+) -> List[Tuple[date, float]]:
+    """
+    Dates and amounts of an invoice's payments: none, some, all or more
+    than the total, in one to three instalments
+    """
+    outcome = rng.random()
+    late = rng.choice((0, 0, 0, 15, 45))
+    overdue_days = (today - due).days
+    if outcome >= PAID_IN_FULL + PARTLY_PAID + OVERPAID and overdue_days > 0:
+        # Unpaid invoices get chased: the older, the likelier paid by now,
+        # which leaves a long tail of overdue ones
+        if rng.random() < min(0.9, overdue_days / 120):
+            outcome, late = 0.0, rng.randint(1, overdue_days)
+    if outcome < PAID_IN_FULL:
+        paid = total
+    elif outcome < PAID_IN_FULL + PARTLY_PAID:
+        paid = round(total * rng.uniform(0.1, 0.9), 2)
+    elif outcome < PAID_IN_FULL + PARTLY_PAID + OVERPAID:
+        paid = round(total * rng.uniform(1.01, 1.2), 2)
+    else:
+        return []
+    instalments = 1 if rng.random() < 0.8 else rng.randint(2, 3)
+    # Mostly by the due date, some late
+    last = min(today, due + timedelta(days=late))
+    if last < issued:
+        return []
+    payments = []
+    remaining = paid
+    for index in range(instalments):
+        amount = remaining if index == instalments - 1 else round(paid / instalments, 2)
+        remaining = round(remaining - amount, 2)
+        day = issued + timedelta(days=rng.randint(0, (last - issued).days))
+        payments.append((day, amount))
+    return sorted(payments)
+
+
+def _tenant(
+    rng: random.Random, ids: _Ids, scale: Scale, today: date
+) -> Iterator[Tuple[Any, Dict[str, Any]]]:
+    """
+    The rows of one user with their clients, invoices, items and payments,
+    parents before children
+    """
+    user_id = ids(User)
+    joined = today - timedelta(days=scale.days)
+    signed_up = _stamp(joined, rng)
+    yield User, {
+        "id": user_id,
+        "email": f"synthetic{user_id}@example.com",
+        "full_name": f"Synthetic User {user_id}",
+        "hashed_password": "",
+        "is_active": True,
+        "is_superuser": False,
+        "created_at": signed_up,
+        "updated_at": signed_up,
+    }
+
+    invoices = 0
+    for _ in range(skewed(rng, scale.clients_per_user, minimum=1)):
+        client_id = ids(Client)
+        company = f"{rng.choice(COMPANIES)} {rng.choice(KINDS)}"
+        since = joined + timedelta(days=rng.randrange(scale.days))
+        added = _stamp(since, rng)
+        yield Client, {
+            "id": client_id,
+            "name": f"{company} {client_id}",
+            "email": f"billing{client_id}@{company.split()[0].lower()}.example.com",
+            "phone": f"+1-555-{rng.randrange(10000):04d}",
+            "address": None,
+            "company": company,
+            "notes": None,
+            "user_id": user_id,
+            "created_at": added,
+            "updated_at": added,
+        }
+
+        for _ in range(skewed(rng, scale.invoices_per_client)):
+            invoices += 1
+            invoice_id = ids(Invoice)
+            issued = since + timedelta(days=rng.randint(0, (today - since).days))
+            due = issued + timedelta(days=rng.choice(PAYMENT_TERMS_DAYS))
+            created = _stamp(issued, rng)
+
+            # Held back until the invoice row, which sums them, is out
+            items = []
+            for _ in range(skewed(rng, scale.items_per_invoice, minimum=1, maximum=MAX_ITEMS)):
+                quantity = float(rng.choice((1, 1, 1, 2, 3, 5, 10)))
+                unit_price = round(rng.uniform(5, 2000), 2)
+                items.append({
+                    "id": ids(InvoiceItem),
+                    "description": rng.choice(SERVICES),
+                    "quantity": quantity,
+                    "unit_price": unit_price,
+                    "amount": round(quantity * unit_price, 2),
+                    "invoice_id": invoice_id,
+                    "created_at": created,
+                    "updated_at": created,
+                })
+            subtotal = round(sum(item["amount"] for item in items), 2)
+            tax = round(subtotal * rng.choice(TAX_RATES), 2)
+            discount = round(subtotal * 0.1, 2) if rng.random() < 0.05 else 0.0
+            total = round(subtotal + tax - discount, 2)
+
+            kind = rng.random()
+            payments: List[Tuple[date, float]] = []
+            if kind < CANCELLED:
+                status = InvoiceStatus.CANCELLED
+            elif kind < CANCELLED + DRAFTS and (today - issued).days < 30:
+                status = InvoiceStatus.DRAFT
+            else:
+                payments = _payments(rng, total, issued, due, today)
+                paid = round(sum(amount for _, amount in payments), 2)
+                if paid >= total:
+                    status = InvoiceStatus.PAID
+                elif due < today:
+                    status = InvoiceStatus.OVERDUE
+                else:
+                    status = InvoiceStatus.PENDING
+            amount_paid = round(sum(amount for _, amount in payments), 2)
+
+            yield Invoice, {
+                "id": invoice_id,
+                "number": f"INV-{1000 + invoices}",
+                "status": status,
+                "issued_date": issued,
+                "due_date": due,
+                "subtotal": subtotal,
+                "tax": tax,
+                "discount": discount,
+                "total": total,
+                "amount_paid": amount_paid,
+                "balance_due": round(total - amount_paid, 2),
+                "notes": None,
+                "client_id": client_id,
+                "user_id": user_id,
+                "recurring_invoice_id": None,
+                "recurring_period": None,
+                "created_at": created,
+                "updated_at": _stamp(payments[-1][0], rng) if payments else created,
+            }
+            for item in items:
+                yield InvoiceItem, item
+            for day, amount in payments:
+                paid_at = _stamp(day, rng)
+                yield Payment, {
+                    "id": ids(Payment),
+                    "amount": amount,
+                    "date": day,
+                    "method": rng.choice(METHODS),
+                    "reference": f"PAY-{rng.randrange(10 ** 8):08d}",
+                    "notes": None,
+                    "invoice_id": invoice_id,
+                    "user_id": user_id,
+                    "created_at": paid_at,
+                    "updated_at": paid_at,
+                }
+
+    # Numbering carries on after the generated invoices
+    yield InvoiceSettings, {
+        "id": ids(InvoiceSettings),
+        "user_id": user_id,
+        "invoice_prefix": "INV-",
+        "next_invoice_number": 1001 + invoices,
+        "default_due_days": 30,
+        "created_at": signed_up,
+        "updated_at": _stamp(today, rng),
+    }
+
+
+def generate(
+    db: Session,
+    scale: Scale,
+    seed: int = 0,
+    chunk_size: int = 10000,
+    today: Optional[date] = None,
+    progress: Optional[Any] = None,
+) -> Dict[str, int]:
+    """
+    Add scale.users synthetic users with clients, invoices, items and
+    payments, and rebuild the rollups; returns the rows added per table
+
+    The same seed, scale and today give the same rows, with ids continuing
+    after the rows already there. Rows are generated as they are loaded and
+    committed chunk_size at a time, every table's pending rows together in
+    foreign key order, so memory stays flat however many are asked for.
+    """
+    rng = random.Random(seed)
+    today = today or datetime.utcnow().date()
+    ids = _Ids(db)
+    pending: Dict[Any, List[Dict[str, Any]]] = {model: [] for model in TABLES}
+    counts = {model.__tablename__: 0 for model in TABLES}
+    buffered = 0
+
+    def flush() -> None:
+        nonlocal buffered
+        connection = db.connection()
+        for model, rows in pending.items():
+            load_rows(connection, model.__table__, rows)
+            counts[model.__tablename__] += len(rows)
+            rows.clear()
+        db.commit()
+        buffered = 0
+        if progress is not None:
+            progress(counts)
+
+    for _ in range(scale.users):
+        for model, row in _tenant(rng, ids, scale, today):
+            pending[model].append(row)
+            buffered += 1
+            if buffered >= chunk_size:
+                flush()
+    flush()
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Ids were given explicitly; move the sequences past them
+        for model in TABLES:
+            table = f'"{model.__tablename__}"'
+            db.execute(select(func.setval(
+                func.pg_get_serial_sequence(table, "id"),
+                select(func.coalesce(func.max(model.id), 0) + 1).scalar_subquery(),
+                False,
+            )))
+    rebuild(db)
+    db.commit()
+    return counts
@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.db.upsert import dialect_insert
+from app.models.user import User
+from app.schemas.user import UserUpdate
+from app.services.errors import BadRequestError, ForbiddenError, NotFoundError
+from app.utils.cache import TTLCache
+
+# Records of authenticated users keyed by Supabase id. Changes made through
+# the ORM invalidate entries on commit in this process; other workers see
+# them within USER_CACHE_TTL_SECONDS.
+user_cache = TTLCache(
+    maxsize=settings.USER_CACHE_SIZE,
+    ttl=settings.USER_CACHE_TTL_SECONDS,
+)
+
+
+def _snapshot(user: User) -> Dict[str, Any]:
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns}
+
+
+def user_from_record(record: Dict[str, Any]) -> User:
+    """
+    Build a detached User from a cached record
+
+    Every request gets its own instance, so cached state is never shared
+    between sessions; adding it to a session updates the existing row.
+    """
+    user = User(**record)
+    make_transient_to_detached(user)
+    return user
+
+
+def get_cached_user(supabase_id: Any) -> Optional[User]:
+    """
+    Get the user from the cache, or None on a miss
+    """
+    record = user_cache.get(str(supabase_id))
+    return user_from_record(record) if record is not None else None
+
+
+def cache_user(record: Dict[str, Any]) -> None:
+    user_cache.set(str(record["id"]), record)
+
+
+def invalidate_user(user_id: Any) -> None:
+    """
+    Drop a user from the cache; call after changing it outside the ORM
+    """
+    user_cache.pop(str(user_id))
+
+
+def load_user_record(db: Session, supabase_user: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the record of a verified Supabase user, creating it on first sight
+
+    Creation is a single INSERT ... ON CONFLICT DO NOTHING RETURNING, so
+    concurrent first requests don't race; the loser reads the winner's row.
+    """
+    user = db.query(User).filter(User.id == supabase_user["id"]).first()
+    if user:
+        return _snapshot(user)
+
+    # If user doesn't exist in our database but exists in Supabase,
+    # create a new user record
+    now = datetime.utcnow()
+    statement = dialect_insert(db)(User).values(
+        id=supabase_user["id"],
+        email=supabase_user["email"],
+        full_name=supabase_user.get("user_metadata", {}).get("full_name", ""),
+        hashed_password="",  # We don't store the password, Supabase handles that
+        is_active=True,
+        is_superuser=False,
+        created_at=now,
+        updated_at=now,
+    ).on_conflict_do_nothing(index_elements=[User.id]).returning(User)
+    user = db.scalars(statement).first()
+    if user is None:
+        user = db.query(User).filter(User.id == supabase_user["id"]).one()
+    record = _snapshot(user)
+    db.commit()
+    return record
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changed_users(session: Session, flush_context: Any) -> None:
+    changed = [
+        obj.id for obj in list(session.dirty) + list(session.deleted)
+        if isinstance(obj, User)
+    ]
+    if changed:
+        session.info.setdefault("changed_user_ids", set()).update(changed)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_changed_users(session: Session) -> None:
+    # Invalidate after commit so a concurrent request can't re-cache the old row
+    for user_id in session.info.pop("changed_user_ids", ()):
+        invalidate_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed_users(session: Session) -> None:
+    session.info.pop("changed_user_ids", None)
+
+
+def update_user(db: Session, user: User, user_in: UserUpdate) -> User:
+    """
+    Update a user's profile
+    """
+    db.add(user)
+    if user_in.email is not None:
+        # Check if email is already taken
+        existing = db.query(User).filter(User.email == user_in.email).first()
+        if existing and existing.id != user.id:
+            raise BadRequestError("Email already registered")
+        user.email = user_in.email
+
+    if user_in.full_name is not None:
+        user.full_name = user_in.full_name
+
+    if user_in.password is not None:
+        user.hashed_password = get_password_hash(user_in.password)
+
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+def list_users(db: Session, skip: int = 0, limit: int = 100) -> List[User]:
+    """
+    Retrieve users
+    """
+    return db.query(User).offset(skip).limit(limit).all()
+
+
+def get_user(db: Session, current_user: User, user_id: int) -> User:
+    """
+    Get a user by ID; users may only see themselves unless superuser
+    """
+    user = db.query(User).filter(User.id == user_id).first()
+    if not user:
+        raise NotFoundError("User not found")
+    if user.id != current_user.id and not current_user.is_superuser:
+        raise ForbiddenError("Not enough permissions")
+    return user
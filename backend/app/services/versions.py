@@ -0,0 +1,32 @@
+import datetime
+from typing import Any, NamedTuple, Optional
+from sqlalchemy import func
+from sqlalchemy.orm import Query
+
+
+class Version(NamedTuple):
+    """Latest updated_at and row count of the rows behind a response"""
+    updated_at: Optional[datetime.datetime]
+    count: int
+
+
+def query_version(query: Query, model: Any) -> Version:
+    """
+    Version of the rows a query selects, from one aggregate that loads none
+    of them
+
+    Any insert, update or delete among the rows moves the latest updated_at
+    or the count, so equal versions mean equal rows.
+    """
+    updated_at, count = query.with_entities(
+        func.max(model.updated_at), func.count(model.id)
+    ).order_by(None).one()
+    return Version(updated_at, count)
+
+
+def combine_versions(*versions: Version) -> Version:
+    """
+    Version of a response built from several sets of rows
+    """
+    stamps = [version.updated_at for version in versions if version.updated_at]
+    return Version(max(stamps, default=None), sum(version.count for version in versions))
@@ -0,0 +1,362 @@
+"""
+Drive every API router under concurrent load and compare with a baseline
+
+Seeds users x clients x invoices x items (rollups included) and starts the
+API with a fake GoTrue server answering /auth/v1/user. Each endpoint gets
+--requests requests from --concurrency connections, spread over the seeded
+users: reads first, then the writes, which update and finally delete what
+they created. Reports p50/p95/p99 latency and RPS per endpoint. --save
+writes the run as a JSON baseline; --baseline compares a run with one and
+exits non-zero if any endpoint got more than --tolerance slower:
+
+    python -m benchmarks.bench_api --users 20 --clients 50 --invoices 10 --save baseline.json
+    python -m benchmarks.bench_api --users 20 --clients 50 --invoices 10 --baseline baseline.json
+    python -m benchmarks.bench_api --users 1000 --clients 10 --invoices 25 --items 4 --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+import httpx
+
+from benchmarks.common import (
+    BENCHMARK_ENV,
+    ApiServer,
+    configure_env,
+    free_port,
+    print_table,
+    summarize,
+)
+from benchmarks.fake_auth import FAKE_JWT_SECRET, FakeAuthServer, mint_token
+from benchmarks.seed import seed
+
+
+class Endpoint(NamedTuple):
+    """
+    A request to time: {client}, {invoice} and {payment} in path are
+    replaced with a seeded row of the user, {new_client}, {new_invoice} and
+    {new_payment} with one created during the run (DELETE takes it out)
+    """
+    method: str
+    path: str
+    body: Optional[str] = None
+
+
+ENDPOINTS = [
+    Endpoint("GET", "/api/auth/me"),
+    Endpoint("GET", "/api/users/me"),
+    Endpoint("PUT", "/api/users/me", "user"),
+    Endpoint("GET", "/api/clients?limit=50"),
+    Endpoint("GET", "/api/clients/search?q=acme"),
+    Endpoint("GET", "/api/clients/{client}"),
+    Endpoint("GET", "/api/invoices?limit=50"),
+    Endpoint("GET", "/api/invoices?limit=50&include=items,payments,client"),
+    Endpoint("GET", "/api/invoices?limit=50&status=overdue&sort=due_date"),
+    Endpoint("GET", "/api/invoices/{invoice}"),
+    Endpoint("GET", "/api/payments?limit=50"),
+    Endpoint("GET", "/api/payments/{payment}"),
+    Endpoint("GET", "/api/reports/summary"),
+    Endpoint("GET", "/api/export/invoices?client_id={client}"),
+    Endpoint("GET", "/api/internal/caches"),
+    Endpoint("GET", "/api/metrics"),
+    Endpoint("POST", "/api/clients", "client"),
+    Endpoint("PUT", "/api/clients/{new_client}", "client"),
+    Endpoint("POST", "/api/invoices", "invoice"),
+    Endpoint("POST", "/api/invoices/bulk", "bulk"),
+    Endpoint("PUT", "/api/invoices/{new_invoice}", "invoice_update"),
+    Endpoint("POST", "/api/payments", "payment"),
+    Endpoint("PUT", "/api/payments/{new_payment}", "payment_update"),
+    Endpoint("DELETE", "/api/payments/{new_payment}"),
+    Endpoint("DELETE", "/api/invoices/{new_invoice}"),
+    Endpoint("DELETE", "/api/clients/{new_client}"),
+]
+
+# Endpoints that take METRICS_TOKEN instead of a user's token
+METRICS_PATHS = ("/api/internal/", "/api/metrics")
+METRICS_TOKEN = BENCHMARK_ENV["METRICS_TOKEN"]
+
+# Path placeholders, filled in per request
+PLACEHOLDERS = ("client", "invoice", "payment", "new_client", "new_invoice", "new_payment")
+
+# Invoices per POST /api/invoices/bulk request
+BULK_ROWS = 20
+
+# Figures compared with a baseline, higher is worse for all but rps; p99
+# is shown but too noisy over a few hundred requests to fail a run on
+COMPARED = ("p50_ms", "p95_ms", "p99_ms", "rps")
+GATED = ("p50_ms", "p95_ms", "rps")
+
+
+class Dataset:
+    """
+    Seeded row ids by user, and the rows created during the run
+    """
+
+    def __init__(self, database_url: str, user_ids: List[int], rng: random.Random):
+        from sqlalchemy import create_engine, select
+        from app.models import Client, Invoice, Payment
+
+        self.user_ids = user_ids
+        self.rng = rng
+        self.seeded: Dict[str, Dict[int, List[int]]] = {}
+        engine = create_engine(database_url)
+        with engine.connect() as connection:
+            for name, model in (("client", Client), ("invoice", Invoice), ("payment", Payment)):
+                rows = defaultdict(list)
+                for user_id, row_id in connection.execute(select(model.user_id, model.id)):
+                    rows[user_id].append(row_id)
+                self.seeded[name] = rows
+        engine.dispose()
+        self.created: Dict[str, Dict[int, List[int]]] = {
+            name: defaultdict(list) for name in ("client", "invoice", "payment")
+        }
+
+    def user(self, endpoint: Endpoint) -> int:
+        """
+        A user with rows for every placeholder of the endpoint
+        """
+        needs = [
+            (self.created if kind.startswith("new_") else self.seeded)[kind.removeprefix("new_")]
+            for kind in PLACEHOLDERS
+            if f"{{{kind}}}" in endpoint.path
+        ]
+        if endpoint.body == "payment":
+            needs.append(self.created["invoice"])
+        users = [user_id for user_id in self.user_ids if all(rows[user_id] for rows in needs)]
+        if not users:
+            raise RuntimeError(f"no user has the rows {endpoint.method} {endpoint.path} needs")
+        return self.rng.choice(users)
+
+    def pick(self, kind: str, user_id: int, take: bool = False) -> int:
+        if kind.startswith("new_"):
+            rows = self.created[kind.removeprefix("new_")][user_id]
+            if take:
+                return rows.pop(self.rng.randrange(len(rows)))
+            return self.rng.choice(rows)
+        return self.rng.choice(self.seeded[kind][user_id])
+
+    def request(self, endpoint: Endpoint) -> Tuple[int, str, Optional[Any]]:
+        """
+        The user, path and JSON body of one request to endpoint
+        """
+        user_id = self.user(endpoint)
+        path = endpoint.path
+        for kind in PLACEHOLDERS:
+            if f"{{{kind}}}" in path:
+                row_id = self.pick(kind, user_id, take=endpoint.method == "DELETE")
+                path = path.replace(f"{{{kind}}}", str(row_id))
+        return user_id, path, self.body(endpoint.body, user_id)
+
+    def body(self, kind: Optional[str], user_id: int) -> Optional[Any]:
+        today = datetime.date.today()
+        suffix = self.rng.randrange(10 ** 9)
+        if kind is None:
+            return None
+        if kind == "user":
+            return {"full_name": f"User {user_id} {suffix}"}
+        if kind == "client":
+            return {"name": f"Benchmark Client {suffix}", "email": f"client{suffix}@example.com"}
+        if kind == "invoice_update":
+            return {"notes": f"Updated {suffix}", "status": "pending"}
+        if kind == "payment":
+            return {
+                "amount": 1.0,
+                "date": today.isoformat(),
+                "method": "bank_transfer",
+                "invoice_id": self.pick("new_invoice", user_id),
+            }
+        if kind == "payment_update":
+            return {"amount": 2.0, "reference": f"REF-{suffix}"}
+        invoice = {
+            "status": "pending",
+            "issued_date": today.isoformat(),
+            "due_date": (today + datetime.timedelta(days=30)).isoformat(),
+            "subtotal": 100.0,
+            "total": 100.0,
+            "client_id": self.pick("client", user_id),
+            "items": [
+                {"description": "Consulting", "quantity": 2, "unit_price": 40.0, "amount": 80.0},
+                {"description": "Expenses", "quantity": 1, "unit_price": 20.0, "amount": 20.0},
+            ],
+        }
+        if kind == "bulk":
+            return [invoice] * BULK_ROWS
+        return invoice
+
+    def record(self, endpoint: Endpoint, user_id: int, response: httpx.Response) -> None:
+        """
+        Remember what a POST created, for the updates and deletes after it
+        """
+        if endpoint.method == "POST" and endpoint.body in self.created:
+            self.created[endpoint.body][user_id].append(response.json()["id"])
+
+
+async def run_endpoint(
+    base_url: str,
+    endpoint: Endpoint,
+    data: Dataset,
+    tokens: Dict[int, str],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """
+    Send requests to one endpoint from concurrency connections and
+    summarize the latencies of the successful ones
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+
+        async def one() -> None:
+            nonlocal errors
+            async with semaphore:
+                user_id, path, body = data.request(endpoint)
+                token = METRICS_TOKEN if path.startswith(METRICS_PATHS) else tokens[user_id]
+                headers = {"Authorization": f"Bearer {token}"}
+                started = time.perf_counter()
+                try:
+                    response = await client.request(endpoint.method, path, headers=headers, json=body)
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                if response.status_code >= 400:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+                data.record(endpoint, user_id, response)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies, elapsed)
+    summary["errors"] = errors
+    return summary
+
+
+def compare(
+    results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]], tolerance: float
+) -> List[str]:
+    """
+    Print each endpoint's change against the baseline; returns the endpoints
+    that got worse by more than tolerance (a fraction) on a gated figure
+    """
+    regressed = []
+    width = max(len(name) for name in results)
+    print(f"\n{'vs baseline':<{width}}  " + "  ".join(f"{figure:>10}" for figure in COMPARED))
+    for name, row in results.items():
+        before = baseline.get(name)
+        if before is None:
+            print(f"{name:<{width}}  (not in baseline)")
+            continue
+        cells, worse = [], False
+        for figure in COMPARED:
+            change = (row[figure] - before[figure]) / before[figure] if before[figure] else 0.0
+            if figure in GATED:
+                worse |= (-change if figure == "rps" else change) > tolerance
+            cells.append(f"{change * 100:>+9.1f}%")
+        if worse:
+            regressed.append(name)
+        print(f"{name:<{width}}  " + "  ".join(cells) + ("  REGRESSED" if worse else ""))
+    return regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=50, help="clients per user")
+    parser.add_argument("--invoices", type=int, default=10, help="invoices per client")
+    parser.add_argument("--items", type=int, default=3, help="items per invoice")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--auth-latency-ms", type=float, default=0.0, help="fake GoTrue latency")
+    parser.add_argument(
+        "--local-auth", action="store_true", help="verify tokens with the JWT secret, not GoTrue"
+    )
+    parser.add_argument("--save", help="write the run to this JSON baseline file")
+    parser.add_argument("--baseline", help="compare the run with this JSON baseline file")
+    parser.add_argument("--tolerance", type=float, default=15.0, help="allowed regression, percent")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url, SUPABASE_JWT_SECRET=FAKE_JWT_SECRET)
+    started = time.perf_counter()
+    user_ids = seed(
+        args.database_url,
+        users=args.users,
+        clients_per_user=args.clients,
+        invoices_per_client=args.invoices,
+        items_per_invoice=args.items,
+    )
+    seed_seconds = time.perf_counter() - started
+    data = Dataset(args.database_url, user_ids, random.Random(42))
+    tokens = {
+        user_id: mint_token(sub=str(user_id), email=f"user{user_id}@example.com")
+        for user_id in user_ids
+    }
+
+    results: Dict[str, Dict[str, float]] = {}
+    with FakeAuthServer(port=free_port(), latency=args.auth_latency_ms / 1000) as auth_server:
+        env = {
+            "DATABASE_URL": args.database_url,
+            "SUPABASE_URL": auth_server.url,
+            "SUPABASE_JWT_SECRET": FAKE_JWT_SECRET,
+            # Remote sends each new token to the fake GoTrue's /auth/v1/user
+            "AUTH_VERIFY_MODE": "local" if args.local_auth else "remote",
+        }
+        with ApiServer(env, workers=args.workers) as server:
+            for endpoint in ENDPOINTS:
+                results[f"{endpoint.method} {endpoint.path}"] = asyncio.run(
+                    run_endpoint(server.url, endpoint, data, tokens, args.requests, args.concurrency)
+                )
+
+    run = {
+        "config": {
+            "database": args.database_url.split(":", 1)[0],
+            "users": args.users,
+            "clients_per_user": args.clients,
+            "invoices_per_client": args.invoices,
+            "items_per_invoice": args.items,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "workers": args.workers,
+            "local_auth": args.local_auth,
+            "seed_seconds": seed_seconds,
+        },
+        "results": results,
+    }
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(run, file, indent=2)
+
+    if args.json:
+        print(json.dumps(run, indent=2))
+    else:
+        print_table(results)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        changed = [
+            key for key, value in run["config"].items()
+            if key != "seed_seconds" and baseline["config"].get(key) != value
+        ]
+        if changed:
+            print(f"\nbaseline was run with different {', '.join(changed)}")
+        regressed = compare(results, baseline["results"], args.tolerance / 100)
+        if regressed:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Compare remote and local Supabase token verification
+
+Runs get_supabase_user against a local fake GoTrue server:
+
+    python -m benchmarks.bench_auth --requests 2000 --concurrency 50 --latency-ms 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from benchmarks.common import configure_env, free_port, print_table, summarize
+from benchmarks.fake_auth import FAKE_JWT_SECRET, FakeAuthServer, mint_token
+
+
+async def run_scenario(get_supabase_user, close_http_client, tokens, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(token):
+        async with semaphore:
+            started = time.perf_counter()
+            user = await get_supabase_user(token)
+            latencies.append(time.perf_counter() - started)
+            assert user is not None, "token was rejected"
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(tokens[i % len(tokens)]) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    # The pooled client is bound to this event loop
+    await close_http_client()
+    return summarize(latencies, elapsed)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=200, help="distinct tokens")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="fake GoTrue latency")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with FakeAuthServer(port=free_port(), latency=args.latency_ms / 1000) as server:
+        configure_env(SUPABASE_URL=server.url, SUPABASE_JWT_SECRET=FAKE_JWT_SECRET)
+        from app.core.config import settings
+        from app.core.http import close_http_client
+        from app.services import supabase_auth
+
+        tokens = [mint_token() for _ in range(args.users)]
+        scenarios = [
+            ("remote", "remote", False),
+            ("remote+cache", "remote", True),
+            ("local", "local", False),
+            ("local+cache", "local", True),
+        ]
+        results = {}
+        for name, mode, cached in scenarios:
+            settings.AUTH_VERIFY_MODE = mode
+            supabase_auth.claims_cache.clear()
+            supabase_auth.claims_cache.maxsize = settings.AUTH_CLAIMS_CACHE_SIZE if cached else 0
+            before = server.requests
+            results[name] = asyncio.run(
+                run_scenario(
+                    supabase_auth.get_supabase_user,
+                    close_http_client,
+                    tokens,
+                    args.requests,
+                    args.concurrency,
+                )
+            )
+            results[name]["upstream_calls"] = server.requests - before
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
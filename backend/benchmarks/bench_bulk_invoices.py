@@ -0,0 +1,93 @@
+"""
+Compare importing invoices one create_invoice call at a time with the bulk path
+
+Seeds clients only, then imports the same invoices through both paths; they
+come without numbers, so each one gets the next from the user's settings:
+
+    python -m benchmarks.bench_bulk_invoices --invoices 20000 --chunk-sizes 100,500,1000
+    python -m benchmarks.bench_bulk_invoices --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import json
+import random
+import time
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_env
+from benchmarks.seed import seed
+
+
+def payloads(count: int, client_ids: List[int], items: int, seed_value: int = 42) -> List[Dict[str, Any]]:
+    rng = random.Random(seed_value)
+    rows = []
+    for _ in range(count):
+        lines = [
+            {"description": f"Item {i}", "quantity": 1, "unit_price": 10.0 + i, "amount": 10.0 + i}
+            for i in range(items)
+        ]
+        total = sum(line["amount"] for line in lines)
+        rows.append({
+            "status": "pending",
+            "issued_date": "2026-01-01",
+            "due_date": "2026-01-31",
+            "subtotal": total,
+            "total": total,
+            "client_id": rng.choice(client_ids),
+            "items": lines,
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--invoices", type=int, default=20000)
+    parser.add_argument("--items", type=int, default=3, help="items per invoice")
+    parser.add_argument("--single", type=int, default=2000, help="invoices imported one at a time")
+    parser.add_argument("--chunk-sizes", default="100,500,1000")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.schemas.invoice import InvoiceCreate
+    from app.services.invoices import bulk_create_invoices, create_invoice
+
+    clients = 50
+    user_id = seed(args.database_url, clients_per_user=clients, invoices_per_client=0)[0]
+    rows = payloads(args.invoices, list(range(1, clients + 1)), args.items)
+    engine = create_engine(args.database_url)
+
+    results = {}
+    started = time.perf_counter()
+    for payload in rows[:args.single]:
+        with Session(engine) as db:
+            create_invoice(db, user_id, InvoiceCreate.model_validate(payload))
+    elapsed = time.perf_counter() - started
+    results["create_invoice"] = {"invoices": args.single, "seconds": elapsed, "invoices_per_s": args.single / elapsed}
+
+    for chunk_size in [int(size) for size in args.chunk_sizes.split(",")]:
+        started = time.perf_counter()
+        with Session(engine) as db:
+            result = bulk_create_invoices(db, user_id, rows, chunk_size=chunk_size)
+        elapsed = time.perf_counter() - started
+        assert not result["errors"], result["errors"][:3]
+        results[f"bulk chunk={chunk_size}"] = {
+            "invoices": len(result["created"]),
+            "seconds": elapsed,
+            "invoices_per_s": len(result["created"]) / elapsed,
+        }
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results)
+    print(f"{'scenario':<{width}}  {'invoices':>10}  {'seconds':>10}  {'invoices/s':>12}")
+    for name, row in results.items():
+        print(f"{name:<{width}}  {row['invoices']:>10}  {row['seconds']:>10.2f}  {row['invoices_per_s']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
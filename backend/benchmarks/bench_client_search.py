@@ -0,0 +1,91 @@
+"""
+Compare indexed client search against the previous leading-wildcard ILIKE
+
+Seeds one tenant with many clients, then times the old ILIKE filter, ranked
+search and prefix autocomplete for a few typical terms:
+
+    python -m benchmarks.bench_client_search --clients 100000
+    python -m benchmarks.bench_client_search --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict
+
+from benchmarks.common import configure_env, print_table, summarize
+from benchmarks.seed import seed
+
+TERMS = {
+    "search": ["robotic", "nakatomi sup", "12345", "ac"],
+    "prefix": ["stark", "tyrell en", "ac"],
+}
+
+
+def legacy_search(db: Any, user_id: int, term: str, limit: int) -> Any:
+    """
+    The client filter as it was: ILIKE '%term%' on name or email
+    """
+    from app.models import Client
+
+    pattern = f"%{term}%"
+    return db.query(Client).filter(
+        Client.user_id == user_id,
+        (Client.name.ilike(pattern)) | (Client.email.ilike(pattern)),
+    ).order_by(Client.name, Client.id).limit(limit).all()
+
+
+def time_query(engine: Any, run: Callable[[Any], Any], repeat: int) -> Dict[str, float]:
+    from sqlalchemy.orm import Session
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with Session(engine) as db:
+            begin = time.perf_counter()
+            rows = run(db)
+            latencies.append(time.perf_counter() - begin)
+    summary = summarize(latencies, time.perf_counter() - started)
+    summary["rows"] = len(rows)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--clients", type=int, default=100000, help="clients in the tenant")
+    parser.add_argument("--limit", type=int, default=10, help="results per query")
+    parser.add_argument("--repeat", type=int, default=50, help="runs of each query")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+    from app.services.clients import search_clients
+
+    user_id = seed(args.database_url, clients_per_user=args.clients, invoices_per_client=0)[0]
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+    results = {}
+    for mode, terms in TERMS.items():
+        for term in terms:
+            if f"ilike   {term!r}" not in results:
+                results[f"ilike   {term!r}"] = time_query(
+                    engine, lambda db: legacy_search(db, user_id, term, args.limit), args.repeat
+                )
+            results[f"{mode:<7} {term!r}"] = time_query(
+                engine,
+                lambda db: search_clients(db, user_id, term, mode=mode, limit=args.limit),
+                args.repeat,
+            )
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Compare throughput of the sync (threadpool) and async database paths
+
+Starts the API once per mode against a seeded database and a fake Supabase
+Auth server, then drives one endpoint at each concurrency level:
+
+    python -m benchmarks.bench_concurrency --levels 50,200,1000 --requests 2000
+    python -m benchmarks.bench_concurrency --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import asyncio
+import json
+
+from benchmarks.common import ApiServer, configure_env, drive, free_port, print_table
+from benchmarks.fake_auth import FAKE_JWT_SECRET, FakeAuthServer, mint_token
+from benchmarks.seed import seed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--levels", default="50,200,1000", help="comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per level")
+    parser.add_argument("--path", default="/api/invoices?limit=20")
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url, SUPABASE_JWT_SECRET=FAKE_JWT_SECRET)
+    user_id = seed(args.database_url)[0]
+    headers = {"Authorization": f"Bearer {mint_token(sub=str(user_id), email=f'user{user_id}@example.com')}"}
+    levels = [int(level) for level in args.levels.split(",")]
+
+    results = {}
+    with FakeAuthServer(port=free_port()) as auth_server:
+        for mode in args.modes.split(","):
+            env = {
+                "DATABASE_URL": args.database_url,
+                "DATABASE_ASYNC": "true" if mode == "async" else "false",
+                "SUPABASE_URL": auth_server.url,
+                "SUPABASE_JWT_SECRET": FAKE_JWT_SECRET,
+            }
+            with ApiServer(env) as server:
+                for level in levels:
+                    results[f"{mode} c={level}"] = asyncio.run(
+                        drive(server.url + args.path, headers, args.requests, level)
+                    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
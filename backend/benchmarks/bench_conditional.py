@@ -0,0 +1,68 @@
+"""
+Compare full reads with conditional reads answered 304 Not Modified
+
+Seeds one tenant, then drives each path with and without the If-None-Match
+its first response carried, the way a client revalidating on focus would:
+
+    python -m benchmarks.bench_conditional --requests 2000 --concurrency 20
+    python -m benchmarks.bench_conditional --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.common import ApiServer, configure_env, drive, free_port, print_table
+from benchmarks.fake_auth import FAKE_JWT_SECRET, FakeAuthServer, mint_token
+from benchmarks.seed import seed
+
+PATHS = [
+    "/api/invoices?limit=100",
+    "/api/invoices/1",
+    "/api/clients?limit=100",
+    "/api/payments?limit=100",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--clients", type=int, default=250, help="clients in the tenant")
+    parser.add_argument("--invoices", type=int, default=10, help="invoices per client")
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url, SUPABASE_JWT_SECRET=FAKE_JWT_SECRET)
+    user_id = seed(
+        args.database_url, clients_per_user=args.clients, invoices_per_client=args.invoices
+    )[0]
+    headers = {"Authorization": f"Bearer {mint_token(sub=str(user_id), email=f'user{user_id}@example.com')}"}
+
+    results = {}
+    with FakeAuthServer(port=free_port()) as auth_server:
+        env = {
+            "DATABASE_URL": args.database_url,
+            "SUPABASE_URL": auth_server.url,
+            "SUPABASE_JWT_SECRET": FAKE_JWT_SECRET,
+        }
+        with ApiServer(env) as server:
+            for path in PATHS:
+                first = httpx.get(server.url + path, headers=headers)
+                first.raise_for_status()
+                revalidate = {**headers, "If-None-Match": first.headers["ETag"]}
+                for name, request_headers in (("200", headers), ("304", revalidate)):
+                    results[f"{path} {name}"] = asyncio.run(
+                        drive(server.url + path, request_headers, args.requests, args.concurrency)
+                    )
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
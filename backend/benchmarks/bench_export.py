@@ -0,0 +1,95 @@
+"""
+Measure streamed exports against paging through the list endpoint
+
+Seeds one tenant, then exports its invoices in every format through
+stream_export, timing it and then measuring peak Python memory in a second
+pass, and times reading the same invoices 100 at a time through the service
+behind the list endpoint, the way the frontend export did (without the 2,000
+HTTP round trips that adds):
+
+    python -m benchmarks.bench_export --clients 1000 --invoices 200
+    python -m benchmarks.bench_export --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from typing import Any, Dict
+
+from benchmarks.common import configure_env
+from benchmarks.seed import seed
+
+
+def run_export(entity: str, fmt: str, user_id: int) -> Dict[str, Any]:
+    from app.services.exports import stream_export
+
+    size = 0
+    started = time.perf_counter()
+    for chunk in stream_export(entity, fmt, user_id):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+
+    # tracemalloc slows allocation down, so it gets a pass of its own
+    tracemalloc.start()
+    for chunk in stream_export(entity, fmt, user_id):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"seconds": elapsed, "mb": size / 2**20, "peak_mb": peak / 2**20}
+
+
+def run_paged(user_id: int, limit: int = 100) -> Dict[str, Any]:
+    from app.db.session import SessionLocal
+    from app.services.invoices import list_invoices
+
+    rows, pages, cursor = 0, 0, None
+    started = time.perf_counter()
+    while True:
+        with SessionLocal() as db:
+            page = list_invoices(db, user_id, limit=limit, cursor=cursor)
+        rows += len(page.items)
+        pages += 1
+        cursor = page.next_cursor
+        if not cursor:
+            break
+    return {"seconds": time.perf_counter() - started, "rows": rows, "pages": pages}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--clients", type=int, default=1000, help="clients in the tenant")
+    parser.add_argument("--invoices", type=int, default=200, help="invoices per client")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    user_id = seed(
+        args.database_url,
+        clients_per_user=args.clients,
+        invoices_per_client=args.invoices,
+        items_per_invoice=1,
+    )[0]
+    rows = args.clients * args.invoices
+
+    results = {}
+    for fmt in ("csv", "ndjson", "xlsx"):
+        result = run_export("invoices", fmt, user_id)
+        result["rows_per_s"] = rows / result["seconds"]
+        results[f"export {fmt}"] = result
+    paged = run_paged(user_id)
+    paged["rows_per_s"] = paged["rows"] / paged["seconds"]
+    results[f"list pages x{paged['pages']}"] = paged
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results)
+    print(f"{'scenario':<{width}}  {'seconds':>8}  {'rows/s':>10}  {'MB':>8}  {'peak MB':>8}")
+    for name, row in results.items():
+        mb = f"{row['mb']:>8.1f}  {row['peak_mb']:>8.1f}" if "mb" in row else f"{'':>8}  {'':>8}"
+        print(f"{name:<{width}}  {row['seconds']:>8.2f}  {row['rows_per_s']:>10.0f}  {mb}")
+
+
+if __name__ == "__main__":
+    main()
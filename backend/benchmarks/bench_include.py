@@ -0,0 +1,105 @@
+"""
+Compare loading invoice pages with a joined eager load against selectinload
+
+Seeds one tenant, then times a page of list_invoices at a shallow and a deep
+offset the way it used to load items (joinedload, which repeats every invoice
+once per item and wraps the LIMIT in a subquery), with each include set, and
+with only the fields of a table view, counting the statements each page takes:
+
+    python -m benchmarks.bench_include --clients 200 --invoices 25 --items 20
+    python -m benchmarks.bench_include --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import configure_env, print_table, summarize
+from benchmarks.seed import seed
+
+# Columns the invoice list screen shows
+TABLE_VIEW = ("id", "number", "status", "due_date", "total", "client_id")
+
+
+def time_case(engine: Any, run: Callable[[Any], Any], repeat: int) -> Dict[str, float]:
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    statements: List[str] = []
+
+    def count(*args: Any) -> None:
+        statements.append(args[2])
+
+    event.listen(engine, "before_cursor_execute", count)
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with Session(engine) as db:
+            begin = time.perf_counter()
+            run(db)
+            latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", count)
+    return {**summarize(latencies, elapsed), "statements": len(statements) / repeat}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--clients", type=int, default=200, help="clients in the tenant")
+    parser.add_argument("--invoices", type=int, default=25, help="invoices per client")
+    parser.add_argument("--items", type=int, default=20, help="items per invoice")
+    parser.add_argument("--limit", type=int, default=100, help="invoices per page")
+    parser.add_argument("--repeat", type=int, default=30, help="runs of each case")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import joinedload
+    from app.models import Invoice
+    from app.services.invoices import SORT_COLUMNS, _invoices_query, list_invoices
+    from app.services.pagination import paginate
+
+    user_id = seed(
+        args.database_url,
+        clients_per_user=args.clients,
+        invoices_per_client=args.invoices,
+        items_per_invoice=args.items,
+    )[0]
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+    def joined(skip: int) -> Callable[[Any], Any]:
+        return lambda db: paginate(
+            _invoices_query(db, user_id).options(joinedload(Invoice.items)),
+            Invoice, SORT_COLUMNS, skip=skip, limit=args.limit,
+        )
+
+    def included(skip: int, include: List[str], fields: Any = None) -> Callable[[Any], Any]:
+        return lambda db: list_invoices(
+            db, user_id, skip=skip, limit=args.limit, include=include, fields=fields
+        )
+
+    results = {}
+    for label, skip in [("first page", 0), ("deep page", args.clients * args.invoices // 2)]:
+        results[f"{label}, joinedload items"] = time_case(engine, joined(skip), args.repeat)
+        for include in [[], ["items"], ["items", "payments", "client"]]:
+            name = ",".join(include) or "none"
+            results[f"{label}, include={name}"] = time_case(
+                engine, included(skip, include), args.repeat
+            )
+        results[f"{label}, table view fields"] = time_case(
+            engine, included(skip, [], TABLE_VIEW), args.repeat
+        )
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compare handing out invoice numbers by read-modify-write with reservations
+
+Every worker takes numbers for the same user, the contended case: by reading
+next_invoice_number and writing it back plus one (what the frontend and the
+Node recurring script do), by reserve_block one number at a time, and by
+reserve_block in blocks. Duplicates are numbers handed out more than once.
+Concurrent workers run on PostgreSQL only (SQLite allows one writer at a
+time):
+
+    python -m benchmarks.bench_numbering --numbers 2000 --block 100
+    python -m benchmarks.bench_numbering --workers 1,8 --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import configure_env
+from benchmarks.seed import seed
+
+
+def read_modify_write(db: Any, user_id: int) -> List[str]:
+    from sqlalchemy import select, update
+    from app.models import InvoiceSettings
+
+    prefix, number = db.execute(
+        select(InvoiceSettings.invoice_prefix, InvoiceSettings.next_invoice_number)
+        .where(InvoiceSettings.user_id == user_id)
+    ).one()
+    db.execute(
+        update(InvoiceSettings)
+        .where(InvoiceSettings.user_id == user_id)
+        .values(next_invoice_number=number + 1)
+    )
+    return [f"{prefix}{number}"]
+
+
+def run_case(
+    engine: Any, take: Callable[[Any], List[str]], numbers: int, workers: int
+) -> Dict[str, Any]:
+    """
+    Take numbers from workers threads, a transaction per call, until each has
+    its share
+    """
+    from sqlalchemy import delete
+    from sqlalchemy.orm import Session
+    from app.models import InvoiceSettings
+
+    with Session(engine) as db:
+        db.execute(delete(InvoiceSettings))
+        db.add(InvoiceSettings(user_id=1))
+        db.commit()
+
+    taken: List[str] = []
+
+    def work() -> None:
+        mine: List[str] = []
+        with Session(engine) as db:
+            while len(mine) < numbers // workers:
+                mine.extend(take(db))
+                db.commit()
+        taken.extend(mine)
+
+    threads = [threading.Thread(target=work) for _ in range(workers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "numbers": len(taken),
+        "seconds": elapsed,
+        "numbers_per_s": len(taken) / elapsed,
+        "duplicates": len(taken) - len(set(taken)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--numbers", type=int, default=2000, help="numbers taken per case")
+    parser.add_argument("--block", type=int, default=100, help="numbers per reservation")
+    parser.add_argument("--workers", default="1,8", help="concurrent workers (PostgreSQL)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+    from app.services.numbering import reserve_block
+
+    seed(args.database_url, clients_per_user=1, invoices_per_client=0)
+    levels = [int(level) for level in args.workers.split(",")]
+    engine = create_engine(args.database_url, pool_size=max(levels))
+    if engine.dialect.name != "postgresql":
+        levels = [1]
+
+    cases = {
+        "read-modify-write": lambda db: read_modify_write(db, 1),
+        "reserve 1": lambda db: reserve_block(db, 1),
+        f"reserve {args.block}": lambda db: reserve_block(db, 1, args.block),
+    }
+    results = {}
+    for workers in levels:
+        for name, take in cases.items():
+            results[f"{name}, {workers} workers"] = run_case(engine, take, args.numbers, workers)
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results)
+    print(f"{'scenario':<{width}}  {'numbers':>8}  {'seconds':>8}  {'numbers/s':>10}  duplicates")
+    for name, row in results.items():
+        print(
+            f"{name:<{width}}  {row['numbers']:>8}  {row['seconds']:>8.2f}"
+            f"  {row['numbers_per_s']:>10.0f}  {row['duplicates']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+Time the overdue sweep at several batch sizes
+
+Seeds invoices across users, then for each batch size puts every overdue
+invoice back to pending and sweeps them again, reporting the whole sweep
+and its longest batch (how long row locks are held). On PostgreSQL a final run
+splits the sweep between concurrent workers, as when every app process runs
+one, and checks no invoice is counted twice in the rollups (SQLite allows
+one writer at a time):
+
+    python -m benchmarks.bench_overdue --users 20 --clients 100 --invoices 50
+    python -m benchmarks.bench_overdue --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import json
+import threading
+import time
+from typing import Any, Dict, List
+
+from benchmarks.common import configure_env
+from benchmarks.seed import seed
+
+
+def reset(engine: Any) -> int:
+    """
+    Put every overdue invoice back to pending, rollups included; returns how
+    many pending invoices are past due
+    """
+    import datetime
+    from sqlalchemy import func, select, update
+    from sqlalchemy.orm import Session
+    from app.models import Invoice, InvoiceStatus
+    from app.services.reports import rebuild
+
+    with Session(engine) as db:
+        db.execute(
+            update(Invoice)
+            .where(Invoice.status == InvoiceStatus.OVERDUE)
+            .values(status=InvoiceStatus.PENDING)
+        )
+        rebuild(db)
+        db.commit()
+        return db.scalar(
+            select(func.count()).where(
+                Invoice.status == InvoiceStatus.PENDING,
+                Invoice.due_date < datetime.datetime.utcnow().date(),
+            )
+        )
+
+
+def sweep(engine: Any, batch_size: int, batches: List[float]) -> List[int]:
+    """
+    mark_overdue's loop, timing each batch
+    """
+    import datetime
+    from sqlalchemy.orm import Session
+    from app.services.invoices import _mark_overdue_batch
+
+    today = datetime.datetime.utcnow().date()
+    marked: List[int] = []
+    with Session(engine) as db:
+        while True:
+            started = time.perf_counter()
+            ids = _mark_overdue_batch(db, today, batch_size)
+            batches.append(time.perf_counter() - started)
+            marked.extend(ids)
+            if len(ids) < batch_size:
+                return marked
+
+
+def rollups_consistent(engine: Any) -> bool:
+    """
+    Whether the status rollups agree with the invoices
+    """
+    from sqlalchemy import func, select
+    from sqlalchemy.orm import Session
+    from app.models import Invoice, StatusTotal
+
+    with Session(engine) as db:
+        live = db.execute(
+            select(Invoice.user_id, Invoice.status, func.count())
+            .group_by(Invoice.user_id, Invoice.status)
+        ).all()
+        rollups = db.execute(
+            select(StatusTotal.user_id, StatusTotal.status, StatusTotal.invoices)
+            .where(StatusTotal.invoices != 0)
+        ).all()
+    return sorted(live) == sorted(rollups)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=100, help="clients per user")
+    parser.add_argument("--invoices", type=int, default=50, help="invoices per client")
+    parser.add_argument("--batch-sizes", default="100,500,5000,1000000")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent sweeps in the last run")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+
+    seed(
+        args.database_url,
+        users=args.users,
+        clients_per_user=args.clients,
+        invoices_per_client=args.invoices,
+        items_per_invoice=1,
+    )
+    engine = create_engine(args.database_url, pool_size=args.workers)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+        due = reset(engine)
+        batches: List[float] = []
+        started = time.perf_counter()
+        marked = sweep(engine, batch_size, batches)
+        results[f"batch {batch_size}"] = {
+            "seconds": time.perf_counter() - started,
+            "marked": len(marked),
+            "expected": due,
+            "batches": len(batches),
+            "max_batch_ms": max(batches) * 1000,
+            "consistent": rollups_consistent(engine),
+        }
+
+    if engine.dialect.name == "postgresql":
+        batch_size = int(args.batch_sizes.split(",")[0])
+        due = reset(engine)
+        marked_by_worker: List[List[int]] = [[] for _ in range(args.workers)]
+        batches = []
+        threads = [
+            threading.Thread(target=lambda out=out: out.extend(sweep(engine, batch_size, batches)))
+            for out in marked_by_worker
+        ]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        marked = [invoice_id for ids in marked_by_worker for invoice_id in ids]
+        results[f"{args.workers} workers, batch {batch_size}"] = {
+            "seconds": time.perf_counter() - started,
+            "marked": len(set(marked)),
+            "expected": due,
+            "batches": len(batches),
+            "max_batch_ms": max(batches) * 1000,
+            "consistent": rollups_consistent(engine) and len(marked) == len(set(marked)),
+        }
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results)
+    print(
+        f"{'scenario':<{width}}  {'seconds':>8}  {'marked':>8}  {'expected':>8}"
+        f"  {'batches':>8}  {'max batch ms':>12}  consistent"
+    )
+    for name, row in results.items():
+        print(
+            f"{name:<{width}}  {row['seconds']:>8.2f}  {row['marked']:>8}  {row['expected']:>8}"
+            f"  {row['batches']:>8}  {row['max_batch_ms']:>12.1f}  {row['consistent']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
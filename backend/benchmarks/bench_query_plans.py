@@ -0,0 +1,164 @@
+"""
+Show how the composite and foreign key indexes change the plans of hot queries
+
+Seeds a large database, then runs the real service queries with the indexes
+added by migration 0002 dropped and again with them restored, printing the
+query plan and latency of each:
+
+    python -m benchmarks.bench_query_plans --users 20 --clients 250 --invoices 10
+    python -m benchmarks.bench_query_plans --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.common import configure_env, print_table, summarize
+from benchmarks.seed import seed
+
+# Indexes this benchmark toggles; the pagination indexes stay in place
+INDEX_NAMES = [
+    "ix_invoice_user_id_status_due_date",
+    "ix_invoice_user_id_client_id",
+    "ix_payment_invoice_id",
+    "ix_invoiceitem_invoice_id",
+]
+
+
+def query_cases(user_id: int, client_id: int, invoice_id: int) -> Dict[str, Callable[[Any], Any]]:
+    from sqlalchemy import func
+    from app.models import InvoiceStatus, Payment
+    from app.services import invoices, payments
+
+    return {
+        "invoices by status": lambda db: invoices.list_invoices(
+            db, user_id, limit=20, status=InvoiceStatus.PENDING, sort="due_date"
+        ),
+        "invoices by client": lambda db: invoices.list_invoices(
+            db, user_id, limit=20, client_id=client_id
+        ),
+        "invoice with items": lambda db: invoices.get_invoice(db, user_id, invoice_id),
+        "payment total": lambda db: db.query(func.sum(Payment.amount)).filter(
+            Payment.invoice_id == invoice_id
+        ).scalar(),
+        "payments by invoice": lambda db: payments.list_payments(
+            db, user_id, limit=20, invoice_id=invoice_id
+        ),
+    }
+
+
+def explain(connection: Any, statement: str, parameters: Any) -> List[str]:
+    """
+    Return the scan/search lines of the plan of one captured statement
+    """
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters)
+        return [row[-1] for row in rows]
+    rows = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+    lines = [row[0].split("  (cost=")[0].strip(" ->") for row in rows]
+    return [line for line in lines if "Scan" in line]
+
+
+def run_phase(
+    engine: Any,
+    cases: Dict[str, Callable[[Any], Any]],
+    repeat: int,
+) -> Tuple[Dict[str, Dict[str, float]], Dict[str, List[str]]]:
+    from sqlalchemy import event
+    from sqlalchemy.orm import Session
+
+    captured: List[Tuple[str, Any]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    results, plans = {}, {}
+    for name, case in cases.items():
+        event.listen(engine, "before_cursor_execute", capture)
+        with Session(engine) as db:
+            case(db)
+        event.remove(engine, "before_cursor_execute", capture)
+        with engine.connect() as connection:
+            plans[name] = [
+                line for statement, parameters in captured
+                for line in explain(connection, statement, parameters)
+            ]
+        captured.clear()
+
+        latencies = []
+        started = time.perf_counter()
+        for _ in range(repeat):
+            with Session(engine) as db:
+                begin = time.perf_counter()
+                case(db)
+                latencies.append(time.perf_counter() - begin)
+        results[name] = summarize(latencies, time.perf_counter() - started)
+    return results, plans
+
+
+def set_indexes(engine: Any, present: bool) -> None:
+    from app.db.session import Base
+
+    indexes = [
+        index for table in Base.metadata.sorted_tables
+        for index in table.indexes if index.name in INDEX_NAMES
+    ]
+    with engine.begin() as connection:
+        for index in indexes:
+            if present:
+                index.create(connection, checkfirst=True)
+            else:
+                index.drop(connection, checkfirst=True)
+        connection.exec_driver_sql("ANALYZE")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=250, help="clients per user")
+    parser.add_argument("--invoices", type=int, default=10, help="invoices per client")
+    parser.add_argument("--items", type=int, default=3, help="items per invoice")
+    parser.add_argument("--repeat", type=int, default=200, help="runs of each query per phase")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+
+    user_ids = seed(
+        args.database_url,
+        users=args.users,
+        clients_per_user=args.clients,
+        invoices_per_client=args.invoices,
+        items_per_invoice=args.items,
+    )
+    # Rows of the last user sit at the end of every table
+    user_id = user_ids[-1]
+    client_id = args.users * args.clients
+    invoice_id = client_id * args.invoices
+    cases = query_cases(user_id, client_id, invoice_id)
+
+    engine = create_engine(args.database_url)
+    results, plans = {}, {}
+    for phase, present in (("without", False), ("with", True)):
+        set_indexes(engine, present)
+        phase_results, phase_plans = run_phase(engine, cases, args.repeat)
+        for name in cases:
+            results[f"{name} ({phase})"] = phase_results[name]
+            plans[f"{name} ({phase})"] = phase_plans[name]
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps({"results": results, "plans": plans}, indent=2))
+        return
+    print_table(results)
+    print()
+    for name, lines in plans.items():
+        print(f"{name}:")
+        for line in lines:
+            print(f"    {line}")
+
+
+if __name__ == "__main__":
+    main()
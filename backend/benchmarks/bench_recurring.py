@@ -0,0 +1,251 @@
+"""
+Time generating recurring invoices one template at a time against in batches
+
+Seeds users with clients and recurring templates, each due once, then times
+a port of scripts/generate_recurring_invoices.js (settings read, invoice,
+items, template and settings writes per template, each its own commit)
+and generate_recurring at several batch sizes, resetting in between. On
+PostgreSQL a final run splits the work between concurrent runs and checks
+every template got exactly one invoice and no number was handed out twice:
+
+    python -m benchmarks.bench_recurring --users 20 --clients 20 --templates 100
+    python -m benchmarks.bench_recurring --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import datetime
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+from benchmarks.bench_overdue import rollups_consistent
+from benchmarks.common import configure_env
+from benchmarks.seed import seed
+
+TEMPLATE = {
+    "subtotal": 1000.0,
+    "tax": 100.0,
+    "discount": 0.0,
+    "total": 1100.0,
+    "notes": "Monthly retainer",
+    "items": [
+        {"description": "Retainer", "quantity": 1, "unit_price": 800.0, "amount": 800.0},
+        {"description": "Support hours", "quantity": 4, "unit_price": 50.0, "amount": 200.0},
+    ],
+}
+
+
+def add_templates(engine: Any, users: int, clients: int, templates: int) -> List[Dict[str, Any]]:
+    """
+    Insert templates per user, each due once within the last week; returns
+    their ids and due dates for reset
+    """
+    from sqlalchemy import insert
+    from app.models import RecurringFrequency, RecurringInvoice
+
+    rng = random.Random(42)
+    today = datetime.datetime.utcnow().date()
+    now = datetime.datetime.utcnow()
+    rows = []
+    for user_id in range(1, users + 1):
+        for index in range(templates):
+            rows.append({
+                "id": len(rows) + 1,
+                "name": f"Template {index + 1}",
+                "frequency": rng.choice(list(RecurringFrequency)),
+                "next_date": today - datetime.timedelta(days=rng.randrange(7)),
+                "template": TEMPLATE,
+                "active": True,
+                "client_id": (user_id - 1) * clients + rng.randrange(clients) + 1,
+                "user_id": user_id,
+                "created_at": now,
+                "updated_at": now,
+            })
+    with engine.begin() as connection:
+        connection.execute(insert(RecurringInvoice), rows)
+    return [{"b_id": row["id"], "b_next_date": row["next_date"]} for row in rows]
+
+
+def reset(engine: Any, schedule: List[Dict[str, Any]]) -> None:
+    """
+    Drop generated invoices and numbering, and put templates back on their dates
+    """
+    from sqlalchemy import bindparam, delete, select, update
+    from sqlalchemy.orm import Session
+    from app.models import Invoice, InvoiceItem, InvoiceSettings, RecurringInvoice
+    from app.services.reports import rebuild
+
+    generated = select(Invoice.id).where(Invoice.recurring_invoice_id.isnot(None))
+    table = RecurringInvoice.__table__
+    with Session(engine) as db:
+        db.execute(delete(InvoiceItem).where(InvoiceItem.invoice_id.in_(generated)))
+        db.execute(delete(Invoice).where(Invoice.recurring_invoice_id.isnot(None)))
+        db.execute(delete(InvoiceSettings))
+        db.execute(
+            update(table)
+            .where(table.c.id == bindparam("b_id"))
+            .values(next_date=bindparam("b_next_date"), last_sent=None),
+            schedule,
+        )
+        rebuild(db)
+        db.commit()
+
+
+def one_at_a_time(engine: Any) -> List[int]:
+    """
+    The Node script's loop: a handful of round trips and a commit per template
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from app.models import Invoice, InvoiceItem, InvoiceSettings, InvoiceStatus, RecurringInvoice
+    from app.services import reports
+    from app.services.recurring import next_period
+
+    today = datetime.datetime.utcnow().date()
+    created = []
+    with Session(engine) as db:
+        templates = db.scalars(
+            select(RecurringInvoice)
+            .where(RecurringInvoice.active.is_(True), RecurringInvoice.next_date <= today)
+        ).all()
+        for template in templates:
+            numbering = db.scalar(
+                select(InvoiceSettings).where(InvoiceSettings.user_id == template.user_id)
+            )
+            if numbering is None:
+                numbering = InvoiceSettings(user_id=template.user_id)
+                db.add(numbering)
+                db.flush()
+            invoice = Invoice(
+                number=f"{numbering.invoice_prefix}{numbering.next_invoice_number}",
+                status=InvoiceStatus.DRAFT,
+                issued_date=today,
+                due_date=today + datetime.timedelta(days=30),
+                subtotal=template.template["subtotal"],
+                tax=template.template["tax"],
+                discount=template.template["discount"],
+                total=template.template["total"],
+                amount_paid=0.0,
+                balance_due=template.template["total"],
+                notes=template.template["notes"],
+                client_id=template.client_id,
+                user_id=template.user_id,
+                recurring_invoice_id=template.id,
+                recurring_period=template.next_date,
+            )
+            db.add(invoice)
+            db.flush()
+            reports.record(db, invoices_added=[reports.invoice_figures(invoice)])
+            db.commit()
+            db.add_all(InvoiceItem(**item, invoice_id=invoice.id) for item in template.template["items"])
+            db.commit()
+            template.next_date = next_period(template.next_date, template.frequency)
+            template.last_sent = today
+            db.commit()
+            numbering.next_invoice_number += 1
+            db.commit()
+            created.append(invoice.id)
+    return created
+
+
+def generated_consistent(engine: Any, templates: int) -> bool:
+    """
+    Whether every template has one invoice, numbers are unique per user and
+    the rollups agree with the invoices
+    """
+    from sqlalchemy import select
+    from sqlalchemy.orm import Session
+    from app.models import Invoice
+
+    with Session(engine) as db:
+        rows = db.execute(
+            select(Invoice.recurring_invoice_id, Invoice.user_id, Invoice.number)
+            .where(Invoice.recurring_invoice_id.isnot(None))
+        ).all()
+    invoices = {template_id for template_id, _, _ in rows}
+    numbers = {(user_id, number) for _, user_id, number in rows}
+    return len(rows) == len(invoices) == len(numbers) == templates and rollups_consistent(engine)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--clients", type=int, default=20, help="clients per user")
+    parser.add_argument("--templates", type=int, default=100, help="templates per user")
+    parser.add_argument("--batch-sizes", default="50,500,5000")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent runs in the last case")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.services.recurring import generate_recurring
+
+    seed(
+        args.database_url,
+        users=args.users,
+        clients_per_user=args.clients,
+        invoices_per_client=1,
+        items_per_invoice=1,
+    )
+    engine = create_engine(args.database_url, pool_size=args.workers)
+    schedule = add_templates(engine, args.users, args.clients, args.templates)
+    total = len(schedule)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+    def run(label: str, generate: Any) -> None:
+        reset(engine, schedule)
+        started = time.perf_counter()
+        created = generate()
+        results[label] = {
+            "seconds": time.perf_counter() - started,
+            "created": len(created),
+            "templates": total,
+            "consistent": generated_consistent(engine, total),
+        }
+
+    def batched(batch_size: int) -> List[int]:
+        with Session(engine) as db:
+            return generate_recurring(db, batch_size=batch_size)
+
+    results: Dict[str, Dict[str, Any]] = {}
+    run("one at a time", lambda: one_at_a_time(engine))
+    for batch_size in [int(size) for size in args.batch_sizes.split(",")]:
+        run(f"batch {batch_size}", lambda: batched(batch_size))
+
+    if engine.dialect.name == "postgresql":
+        batch_size = int(args.batch_sizes.split(",")[0])
+
+        def concurrent() -> List[int]:
+            created: List[int] = []
+            threads = [
+                threading.Thread(target=lambda: created.extend(batched(batch_size)))
+                for _ in range(args.workers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            return created
+
+        run(f"{args.workers} workers, batch {batch_size}", concurrent)
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    width = max(len(name) for name in results)
+    print(f"{'scenario':<{width}}  {'seconds':>8}  {'created':>8}  {'templates':>9}  consistent")
+    for name, row in results.items():
+        print(
+            f"{name:<{width}}  {row['seconds']:>8.2f}  {row['created']:>8}"
+            f"  {row['templates']:>9}  {row['consistent']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Compare the rollup-backed dashboard summary with aggregating invoices live
+
+Seeds one tenant, then times get_summary against the same figures computed
+with GROUP BY over invoices and payments, plus the cost a payment write now
+pays to keep the rollups current:
+
+    python -m benchmarks.bench_report_summary --clients 1000 --invoices 50
+    python -m benchmarks.bench_report_summary --database-url postgresql://bench@localhost/bench
+"""
+import argparse
+import datetime
+import itertools
+import json
+import time
+from typing import Any, Callable, Dict
+
+from benchmarks.common import configure_env, print_table, summarize
+from benchmarks.seed import seed
+
+
+def live_summary(db: Any, user_id: int, months: int = 12, top_clients: int = 5) -> Dict[str, Any]:
+    """
+    The summary computed straight from invoices and payments
+    """
+    from sqlalchemy import func, select
+    from app.models import Client, Invoice, Payment
+    from app.services.reports import _month_of, _months_back
+
+    since = _months_back(datetime.date.today().replace(day=1), months - 1)
+    month = _month_of(db, Invoice.issued_date)
+    paid_month = _month_of(db, Payment.date)
+    return {
+        "invoiced": db.execute(
+            select(month, func.sum(Invoice.total))
+            .where(Invoice.user_id == user_id, Invoice.issued_date >= since)
+            .group_by(month)
+        ).all(),
+        "received": db.execute(
+            select(paid_month, func.sum(Payment.amount))
+            .where(Payment.user_id == user_id, Payment.date >= since)
+            .group_by(paid_month)
+        ).all(),
+        "statuses": db.execute(
+            select(Invoice.status, func.count(), func.sum(Invoice.total), func.sum(Invoice.balance_due))
+            .where(Invoice.user_id == user_id)
+            .group_by(Invoice.status)
+        ).all(),
+        "clients": db.execute(
+            select(Client.id, Client.name, func.sum(Invoice.amount_paid).label("paid"))
+            .join(Invoice, Invoice.client_id == Client.id)
+            .where(Invoice.user_id == user_id)
+            .group_by(Client.id, Client.name)
+            .order_by(func.sum(Invoice.amount_paid).desc())
+            .limit(top_clients)
+        ).all(),
+        "methods": db.execute(
+            select(Payment.method, func.count(), func.sum(Payment.amount))
+            .where(Payment.user_id == user_id)
+            .group_by(Payment.method)
+        ).all(),
+    }
+
+
+def time_case(engine: Any, run: Callable[[Any], Any], repeat: int) -> Dict[str, float]:
+    from sqlalchemy.orm import Session
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        with Session(engine) as db:
+            begin = time.perf_counter()
+            run(db)
+            latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database-url", default="sqlite:///./benchmark.db")
+    parser.add_argument("--clients", type=int, default=1000, help="clients in the tenant")
+    parser.add_argument("--invoices", type=int, default=50, help="invoices per client")
+    parser.add_argument("--repeat", type=int, default=50, help="runs of each case")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env(DATABASE_URL=args.database_url)
+    from sqlalchemy import create_engine
+    from app.models import PaymentMethod
+    from app.schemas.payment import PaymentCreate, PaymentUpdate
+    from app.services import payments
+    from app.services.reports import get_summary
+
+    user_id = seed(
+        args.database_url,
+        clients_per_user=args.clients,
+        invoices_per_client=args.invoices,
+        items_per_invoice=1,
+    )[0]
+    engine = create_engine(args.database_url)
+    with engine.begin() as connection:
+        connection.exec_driver_sql("ANALYZE")
+
+    payment = PaymentCreate(
+        amount=1.0, date=datetime.date.today(), method=PaymentMethod.CASH, invoice_id=1
+    )
+    created, amounts = [], itertools.count(2)
+    results = {
+        "summary (rollups)": time_case(engine, lambda db: get_summary(db, user_id), args.repeat),
+        "summary (live)": time_case(engine, lambda db: live_summary(db, user_id), args.repeat),
+        "create payment": time_case(
+            engine,
+            lambda db: created.append(payments.create_payment(db, user_id, payment).id),
+            args.repeat,
+        ),
+        "update payment": time_case(
+            engine,
+            lambda db: payments.update_payment(
+                db, user_id, created[0], PaymentUpdate(amount=float(next(amounts)))
+            ),
+            args.repeat,
+        ),
+    }
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Time turning a large invoice list into a response body
+
+Builds 1,000 invoices with 20 items each in memory, then times the steps
+FastAPI takes for a List[Invoice] response_model: validating the ORM objects
+and dumping them to JSON-ready data in pydantic-core, then rendering that
+with the stdlib encoder (JSONResponse) or orjson (ORJSONResponse, the
+default response class). No database is involved:
+
+    python -m benchmarks.bench_serialization --invoices 1000 --items 20
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.common import configure_env, print_table, summarize
+
+
+def build_invoices(count: int, items: int) -> List[Any]:
+    """
+    Transient invoices shaped like what list_invoices returns
+    """
+    from app.models import Invoice, InvoiceItem, InvoiceStatus
+
+    now = datetime.datetime(2024, 1, 1, 12, 30, 15, 123456)
+    statuses = list(InvoiceStatus)
+    invoices = []
+    for index in range(count):
+        issued = datetime.date(2024, 1, 1) + datetime.timedelta(days=index % 365)
+        invoices.append(
+            Invoice(
+                id=index + 1,
+                number=f"INV-{index + 1:06d}",
+                status=statuses[index % len(statuses)],
+                issued_date=issued,
+                due_date=issued + datetime.timedelta(days=30),
+                subtotal=2000.0,
+                tax=200.0,
+                discount=0.0,
+                total=2200.0,
+                amount_paid=0.0,
+                balance_due=2200.0,
+                notes="Thank you for your business",
+                client_id=index % 100 + 1,
+                user_id=1,
+                created_at=now,
+                updated_at=now,
+                items=[
+                    InvoiceItem(
+                        id=index * items + line + 1,
+                        invoice_id=index + 1,
+                        description=f"Consulting, line {line + 1}",
+                        quantity=2.0,
+                        unit_price=50.0,
+                        amount=100.0,
+                    )
+                    for line in range(items)
+                ],
+            )
+        )
+    return invoices
+
+
+def time_case(run: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        run()
+        latencies.append(time.perf_counter() - begin)
+    return summarize(latencies, time.perf_counter() - started)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--invoices", type=int, default=1000, help="invoices in the response")
+    parser.add_argument("--items", type=int, default=20, help="items per invoice")
+    parser.add_argument("--repeat", type=int, default=20, help="runs of each case")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    configure_env()
+    from fastapi.responses import JSONResponse, ORJSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_response_field
+    from app.schemas.invoice import Invoice as InvoiceSchema
+
+    invoices = build_invoices(args.invoices, args.items)
+    field = create_response_field(name="Response", type_=List[InvoiceSchema])
+    loop = asyncio.new_event_loop()
+
+    def dump() -> Any:
+        return loop.run_until_complete(
+            serialize_response(field=field, response_content=invoices)
+        )
+
+    content = dump()
+    results = {
+        "validate + dump": time_case(dump, args.repeat),
+        "render (json)": time_case(lambda: JSONResponse(content), args.repeat),
+        "render (orjson)": time_case(lambda: ORJSONResponse(content), args.repeat),
+        "response (json)": time_case(lambda: JSONResponse(dump()), args.repeat),
+        "response (orjson)": time_case(lambda: ORJSONResponse(dump()), args.repeat),
+    }
+    loop.close()
+    size = len(ORJSONResponse(content).body) / 2**20
+    for summary in results.values():
+        summary["mb"] = size
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Settings the app refuses to start without; benchmarks never use the real values
+BENCHMARK_ENV = {
+    "DATABASE_URL": "sqlite:///./benchmark.db",
+    "SUPABASE_URL": "http://127.0.0.1:9999",
+    "SUPABASE_ANON_KEY": "benchmark.anon.key",
+    "SECRET_KEY": "benchmark-secret-key",
+    # Lets benchmarks read the internal metrics endpoints
+    "METRICS_TOKEN": "benchmark-metrics-token",
+    # Keep the seeded statuses as they are while a server is being measured
+    "OVERDUE_SWEEP_INTERVAL_SECONDS": "0",
+}
+
+
+def configure_env(**overrides: str) -> None:
+    """
+    Populate the environment before app.core.config is imported
+    """
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+    os.environ.update(overrides)
+
+
+def free_port() -> int:
+    """
+    Ask the OS for an unused local TCP port
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict[str, float]:
+    """
+    Summarize per-request latencies (seconds) into milliseconds and RPS
+    """
+    values = sorted(latencies)
+    return {
+        "requests": len(values),
+        "rps": len(values) / elapsed if elapsed else 0.0,
+        "mean_ms": statistics.fmean(values) * 1000 if values else 0.0,
+        "p50_ms": percentile(values, 0.50) * 1000,
+        "p95_ms": percentile(values, 0.95) * 1000,
+        "p99_ms": percentile(values, 0.99) * 1000,
+    }
+
+
+def print_table(rows: Dict[str, Dict[str, float]]) -> None:
+    """
+    Print summaries keyed by scenario name as an aligned table
+    """
+    columns = ["requests", "rps", "mean_ms", "p50_ms", "p95_ms", "p99_ms"]
+    for summary in rows.values():
+        columns += [key for key in summary if key not in columns]
+    width = max([len(name) for name in rows] + [8])
+    print(f"{'scenario':<{width}}  " + "  ".join(f"{c:>10}" for c in columns))
+    for name, summary in rows.items():
+        cells = "  ".join(f"{summary.get(c, 0):>10.1f}" for c in columns)
+        print(f"{name:<{width}}  {cells}")
+
+
+class ApiServer:
+    """
+    Run the API with uvicorn in a subprocess so settings read at import
+    (DATABASE_ASYNC, pool sizes, ...) can differ between runs
+
+        with ApiServer({"DATABASE_ASYNC": "true"}) as server:
+            ... server.url ...
+    """
+
+    def __init__(self, env: Dict[str, str], port: Optional[int] = None, workers: int = 1):
+        self.port = port or free_port()
+        self.env = {**os.environ, **env}
+        self.workers = workers
+        self._process: Optional[subprocess.Popen] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "ApiServer":
+        self._process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1",
+                "--port", str(self.port),
+                "--workers", str(self.workers),
+                "--log-level", "warning",
+                "--no-access-log",
+            ],
+            cwd=BACKEND_DIR,
+            env=self.env,
+        )
+        deadline = time.monotonic() + 30
+        while True:
+            if self._process.poll() is not None:
+                raise RuntimeError("API server exited during startup")
+            try:
+                if httpx.get(f"{self.url}/api/health").status_code == 200:
+                    return self
+            except httpx.TransportError:
+                pass
+            if time.monotonic() > deadline:
+                self.__exit__()
+                raise RuntimeError("API server did not start")
+            time.sleep(0.1)
+
+    def __exit__(self, *exc_info) -> None:
+        if self._process is not None:
+            self._process.terminate()
+            self._process.wait(timeout=30)
+            self._process = None
+
+
+async def drive(
+    url: str,
+    headers: Dict[str, str],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """
+    Send GET requests to url from concurrency simultaneous connections and
+    summarize the latencies of successful responses
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    errors = 0
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+
+        async def one() -> None:
+            nonlocal errors
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=headers)
+                except httpx.HTTPError:
+                    errors += 1
+                    return
+                if response.status_code >= 400:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    summary = summarize(latencies, elapsed)
+    summary["errors"] = errors
+    return summary
@@ -0,0 +1,116 @@
+"""
+Local stand-in for the Supabase GoTrue endpoints the backend calls
+"""
+import asyncio
+import threading
+import time
+import uuid
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Header, HTTPException, status
+from jose import jwt, JWTError
+
+FAKE_JWT_SECRET = "benchmark-jwt-secret-with-at-least-32-chars"
+FAKE_AUDIENCE = "authenticated"
+
+
+def mint_token(
+    sub: Optional[str] = None,
+    email: Optional[str] = None,
+    secret: str = FAKE_JWT_SECRET,
+    expires_in: int = 3600,
+) -> str:
+    """
+    Create an HS256 access token shaped like the ones Supabase issues
+    """
+    sub = sub or str(uuid.uuid4())
+    now = int(time.time())
+    claims = {
+        "sub": sub,
+        "email": email or f"{sub}@example.com",
+        "aud": FAKE_AUDIENCE,
+        "role": "authenticated",
+        "iat": now,
+        "exp": now + expires_in,
+        "user_metadata": {"full_name": "Benchmark User"},
+    }
+    return jwt.encode(claims, secret, algorithm="HS256")
+
+
+def create_app(secret: str = FAKE_JWT_SECRET, latency: float = 0.0) -> FastAPI:
+    """
+    Build the fake auth app; latency (seconds) is added to every user lookup
+    """
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/auth/v1/user")
+    async def get_user(authorization: str = Header("")):
+        app.state.requests += 1
+        if latency:
+            await asyncio.sleep(latency)
+        token = authorization.partition(" ")[2]
+        try:
+            claims = jwt.decode(token, secret, algorithms=["HS256"], audience=FAKE_AUDIENCE)
+        except JWTError:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="invalid token")
+        return {
+            "id": claims["sub"],
+            "aud": claims["aud"],
+            "role": claims.get("role"),
+            "email": claims.get("email"),
+            "app_metadata": {},
+            "user_metadata": claims.get("user_metadata", {}),
+        }
+
+    @app.get("/auth/v1/.well-known/jwks.json")
+    async def get_jwks():
+        return {"keys": []}
+
+    return app
+
+
+class FakeAuthServer:
+    """
+    Run the fake auth app with uvicorn on a background thread
+
+        with FakeAuthServer(port=free_port(), latency=0.02) as server:
+            ... server.url ...
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 9999,
+        secret: str = FAKE_JWT_SECRET,
+        latency: float = 0.0,
+    ):
+        self.host = host
+        self.port = port
+        self.app = create_app(secret=secret, latency=latency)
+        self._server = uvicorn.Server(
+            uvicorn.Config(self.app, host=host, port=port, log_level="warning")
+        )
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def requests(self) -> int:
+        return self.app.state.requests
+
+    def __enter__(self) -> "FakeAuthServer":
+        self._thread.start()
+        deadline = time.monotonic() + 10
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("fake auth server did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
@@ -0,0 +1,156 @@
+"""
+Seed a benchmark database with users, clients, invoices, items and payments
+
+Drops and recreates every table: never point it at a database you care about.
+"""
+import datetime
+import random
+from typing import List
+
+from sqlalchemy import create_engine, insert
+
+# Parts of generated client names, so search benchmarks see realistic spread
+NAME_PREFIXES = [
+    "Acme", "Globex", "Initech", "Umbrella", "Stark", "Wayne", "Wonka", "Hooli",
+    "Vandelay", "Soylent", "Cyberdyne", "Tyrell", "Aperture", "Monarch", "Gringotts",
+    "Oceanic", "Pied", "Massive", "Dunder", "Sterling", "Nakatomi", "Virtucon",
+]
+NAME_SUFFIXES = [
+    "Industries", "Labs", "Holdings", "Systems", "Logistics", "Partners", "Foods",
+    "Consulting", "Media", "Robotics", "Energy", "Dynamics", "Studios", "Supply",
+]
+
+
+def client_name(rng: random.Random, client_id: int) -> str:
+    return f"{rng.choice(NAME_PREFIXES)} {rng.choice(NAME_SUFFIXES)} {client_id}"
+
+
+def seed(
+    database_url: str,
+    users: int = 1,
+    clients_per_user: int = 50,
+    invoices_per_client: int = 4,
+    items_per_invoice: int = 3,
+    seed_value: int = 42,
+) -> List[int]:
+    """
+    Recreate the schema and fill it, rollups included; returns the seeded user ids
+    """
+    from sqlalchemy.orm import Session
+    from app.db.session import Base
+    from app.models import Client, Invoice, InvoiceItem, InvoiceStatus, Payment, PaymentMethod, User
+    from app.services.reports import rebuild
+
+    rng = random.Random(seed_value)
+    engine = create_engine(database_url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    now = datetime.datetime.utcnow()
+    today = datetime.date.today()
+    statuses = list(InvoiceStatus)
+    user_ids = list(range(1, users + 1))
+
+    with engine.begin() as connection:
+        connection.execute(insert(User), [
+            {
+                "id": user_id,
+                "email": f"user{user_id}@example.com",
+                "full_name": f"User {user_id}",
+                "hashed_password": "",
+                "is_active": True,
+                "is_superuser": False,
+                "created_at": now,
+                "updated_at": now,
+            }
+            for user_id in user_ids
+        ])
+
+        client_id = invoice_id = item_id = payment_id = 0
+        for user_id in user_ids:
+            clients, invoices, items, payments = [], [], [], []
+            for _ in range(clients_per_user):
+                client_id += 1
+                name = client_name(rng, client_id)
+                clients.append({
+                    "id": client_id,
+                    "name": name,
+                    "email": name.lower().replace(" ", ".") + "@example.com",
+                    "company": f"Company {client_id}",
+                    "user_id": user_id,
+                    "created_at": now,
+                    "updated_at": now,
+                })
+                for _ in range(invoices_per_client):
+                    invoice_id += 1
+                    issued = today - datetime.timedelta(days=rng.randint(0, 365))
+                    subtotal = 0.0
+                    for _ in range(items_per_invoice):
+                        item_id += 1
+                        quantity = float(rng.randint(1, 10))
+                        unit_price = round(rng.uniform(5, 500), 2)
+                        amount = round(quantity * unit_price, 2)
+                        subtotal += amount
+                        items.append({
+                            "id": item_id,
+                            "description": f"Item {item_id}",
+                            "quantity": quantity,
+                            "unit_price": unit_price,
+                            "amount": amount,
+                            "invoice_id": invoice_id,
+                            "created_at": now,
+                            "updated_at": now,
+                        })
+                    status = rng.choice(statuses)
+                    amount_paid = round(subtotal, 2) if status == InvoiceStatus.PAID else 0.0
+                    invoices.append({
+                        "id": invoice_id,
+                        "number": f"INV-{invoice_id:07d}",
+                        "status": status,
+                        "issued_date": issued,
+                        "due_date": issued + datetime.timedelta(days=30),
+                        "subtotal": round(subtotal, 2),
+                        "tax": 0.0,
+                        "discount": 0.0,
+                        "total": round(subtotal, 2),
+                        "amount_paid": amount_paid,
+                        "balance_due": round(subtotal, 2) - amount_paid,
+                        "client_id": client_id,
+                        "user_id": user_id,
+                        "created_at": now,
+                        "updated_at": now,
+                    })
+                    if status == InvoiceStatus.PAID:
+                        payment_id += 1
+                        payments.append({
+                            "id": payment_id,
+                            "amount": round(subtotal, 2),
+                            "date": issued + datetime.timedelta(days=rng.randint(1, 30)),
+                            "method": rng.choice(list(PaymentMethod)),
+                            "invoice_id": invoice_id,
+                            "user_id": user_id,
+                            "created_at": now,
+                            "updated_at": now,
+                        })
+            connection.execute(insert(Client), clients)
+            if invoices:
+                connection.execute(insert(Invoice), invoices)
+            if items:
+                connection.execute(insert(InvoiceItem), items)
+            if payments:
+                connection.execute(insert(Payment), payments)
+
+        if connection.dialect.name == "postgresql":
+            # Ids were given explicitly; move the sequences past them for later writes
+            for model in (User, Client, Invoice, InvoiceItem, Payment):
+                table = f'"{model.__tablename__}"'
+                connection.exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                    f"COALESCE(MAX(id), 0) + 1, false) FROM {table}"
+                )
+
+    with Session(engine) as db:
+        rebuild(db)
+        db.commit()
+    engine.dispose()
+    return user_ids
@@ -0,0 +1,127 @@
+"""
+Maintenance commands
+
+    python manage.py repair-balances
+    python manage.py rebuild-reports [--user-id ID]
+    python manage.py mark-overdue [--date YYYY-MM-DD] [--batch-size N]
+    python manage.py generate-recurring [--date YYYY-MM-DD] [--batch-size N]
+    python manage.py generate-data --users N [--clients N] [--invoices N] [--items N] [--seed N]
+"""
+import argparse
+import datetime
+import time
+from typing import Dict
+
+from app.db.session import SessionLocal
+
+
+def repair_balances(args: argparse.Namespace) -> None:
+    """Recompute invoice amount_paid, balance_due and status from payments"""
+    from app.services.payments import repair_balances
+
+    with SessionLocal() as db:
+        repaired = repair_balances(db)
+    print(f"Repaired {repaired} invoices")
+
+
+def rebuild_reports(args: argparse.Namespace) -> None:
+    """Recompute the dashboard rollups from invoices and payments"""
+    from app.services.reports import rebuild
+
+    with SessionLocal() as db:
+        rebuild(db, user_id=args.user_id)
+        db.commit()
+    print("Rebuilt reports for " + (f"user {args.user_id}" if args.user_id else "all users"))
+
+
+def mark_overdue(args: argparse.Namespace) -> None:
+    """Mark pending invoices past their due date overdue"""
+    from app.services.invoices import mark_overdue
+
+    with SessionLocal() as db:
+        marked = mark_overdue(db, today=args.date, batch_size=args.batch_size)
+    print(f"Marked {len(marked)} invoices overdue")
+    if args.verbose and marked:
+        print(" ".join(str(invoice_id) for invoice_id in marked))
+
+
+def generate_recurring(args: argparse.Namespace) -> None:
+    """Generate the invoices of recurring templates that are due"""
+    from app.services.recurring import generate_recurring
+
+    with SessionLocal() as db:
+        created = generate_recurring(db, today=args.date, batch_size=args.batch_size)
+    print(f"Generated {len(created)} invoices")
+    if args.verbose and created:
+        print(" ".join(str(invoice_id) for invoice_id in created))
+
+
+def generate_data(args: argparse.Namespace) -> None:
+    """Add synthetic users with clients, invoices, items and payments"""
+    from app.services.synthetic import Scale, generate
+
+    scale = Scale(args.users, args.clients, args.invoices, args.items, args.days)
+    started = time.perf_counter()
+
+    def progress(counts: Dict[str, int]) -> None:
+        if args.verbose:
+            rows = sum(counts.values())
+            print(f"{rows} rows, {rows / (time.perf_counter() - started):.0f}/s", flush=True)
+
+    with SessionLocal() as db:
+        counts = generate(
+            db, scale, seed=args.seed, chunk_size=args.chunk_size, today=args.date, progress=progress
+        )
+    print(
+        ", ".join(f"{count} {table}" for table, count in counts.items())
+        + f" in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("repair-balances", help=repair_balances.__doc__)
+    command.set_defaults(func=repair_balances)
+
+    command = commands.add_parser("rebuild-reports", help=rebuild_reports.__doc__)
+    command.add_argument("--user-id", type=int, help="only this user's rollups")
+    command.set_defaults(func=rebuild_reports)
+
+    command = commands.add_parser("mark-overdue", help=mark_overdue.__doc__)
+    command.add_argument(
+        "--date", type=datetime.date.fromisoformat, help="sweep as of this date (default today, UTC)"
+    )
+    command.add_argument("--batch-size", type=int, help="invoices per transaction")
+    command.add_argument("--verbose", action="store_true", help="list the ids of the marked invoices")
+    command.set_defaults(func=mark_overdue)
+
+    command = commands.add_parser("generate-recurring", help=generate_recurring.__doc__)
+    command.add_argument(
+        "--date", type=datetime.date.fromisoformat, help="generate as of this date (default today, UTC)"
+    )
+    command.add_argument("--batch-size", type=int, help="templates per transaction")
+    command.add_argument("--verbose", action="store_true", help="list the ids of the new invoices")
+    command.set_defaults(func=generate_recurring)
+
+    command = commands.add_parser("generate-data", help=generate_data.__doc__)
+    command.add_argument("--users", type=int, required=True)
+    command.add_argument("--clients", type=float, default=50, help="mean clients per user")
+    command.add_argument("--invoices", type=float, default=20, help="mean invoices per client")
+    command.add_argument("--items", type=float, default=4, help="mean items per invoice")
+    command.add_argument("--days", type=int, default=730, help="history to spread invoices over")
+    command.add_argument("--seed", type=int, default=0, help="same seed, same data")
+    command.add_argument(
+        "--date", type=datetime.date.fromisoformat, help="generate as of this date (default today, UTC)"
+    )
+    command.add_argument("--chunk-size", type=int, default=10000, help="rows per commit")
+    command.add_argument("--verbose", action="store_true", help="report progress every chunk")
+    command.set_defaults(func=generate_data)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
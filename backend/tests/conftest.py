@@ -0,0 +1,54 @@
+import os
+import tempfile
+from typing import Dict, Iterator
+
+import pytest
+
+from benchmarks.common import configure_env
+from benchmarks.fake_auth import FAKE_JWT_SECRET, mint_token
+
+# Settings are read once, on the first import of app.core.config
+configure_env(
+    DATABASE_URL=f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'test.db')}",
+    SUPABASE_JWT_SECRET=FAKE_JWT_SECRET,
+    AUTH_VERIFY_MODE="local",
+    STATEMENT_BUDGET_MODE="strict",
+    RESPONSE_CACHE="off",
+)
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.models  # noqa: E402,F401
+from app.db.session import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services.supabase_auth import claims_cache  # noqa: E402
+from app.services.users import user_cache  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def tables() -> Iterator[None]:
+    """
+    Fresh tables, and caches that know nothing of the last test's rows
+    """
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    claims_cache.clear()
+    user_cache.clear()
+    yield
+
+
+@pytest.fixture
+def client() -> Iterator[TestClient]:
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db() -> Iterator:
+    with SessionLocal() as session:
+        yield session
+
+
+@pytest.fixture
+def headers() -> Dict[str, str]:
+    return {"Authorization": "Bearer " + mint_token(sub="1", email="owner@example.com")}
@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from jose import jwt
+
+from app.core.config import settings
+from app.services import supabase_auth
+from benchmarks.fake_auth import FAKE_AUDIENCE, FAKE_JWT_SECRET, mint_token
+
+
+def test_concurrent_misses_share_one_remote_call(monkeypatch):
+    monkeypatch.setattr(settings, "AUTH_VERIFY_MODE", "remote")
+    calls = []
+
+    async def fetch_remote_user(token):
+        calls.append(token)
+        await asyncio.sleep(0.01)
+        return {"id": "1", "email": "owner@example.com"}
+
+    monkeypatch.setattr(supabase_auth, "fetch_remote_user", fetch_remote_user)
+    token = mint_token(sub="1")
+
+    async def verify_concurrently():
+        return await asyncio.gather(*(supabase_auth.get_supabase_user(token) for _ in range(10)))
+
+    users = asyncio.run(verify_concurrently())
+    assert len(calls) == 1
+    assert all(user["id"] == "1" for user in users)
+    assert not supabase_auth._in_flight
+
+
+def test_token_without_sub_is_unauthorized(client):
+    now = int(time.time())
+    token = jwt.encode(
+        {"aud": FAKE_AUDIENCE, "role": "authenticated", "iat": now, "exp": now + 3600},
+        FAKE_JWT_SECRET,
+        algorithm="HS256",
+    )
+    response = client.get("/api/users/me", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 401
@@ -0,0 +1,52 @@
+"""
+Every request here runs under STATEMENT_BUDGET_MODE=strict (see conftest),
+so an endpoint over its statement budget answers 500
+"""
+from tests.test_payments import create_invoice, pay
+
+
+def ok(response):
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_invoice_crud_within_budgets(client, headers):
+    invoice_id = create_invoice(client, headers, 100.0)
+    ok(client.get("/api/invoices", headers=headers))
+    ok(client.get("/api/invoices?include=items,payments,client", headers=headers))
+    ok(client.get(f"/api/invoices/{invoice_id}?include=items,payments,client", headers=headers))
+    ok(client.put(f"/api/invoices/{invoice_id}", headers=headers, json={
+        "total": 120.0,
+        "items": [{"description": "More work", "quantity": 2, "unit_price": 60, "amount": 120}],
+    }))
+    pay(client, headers, invoice_id, 50.0)
+    ok(client.delete(f"/api/invoices/{invoice_id}", headers=headers))
+
+
+def test_payment_crud_within_budgets(client, headers):
+    first = create_invoice(client, headers, 100.0)
+    second = create_invoice(client, headers, 80.0)
+    payment_id = pay(client, headers, first, 100.0)
+    ok(client.get("/api/payments", headers=headers))
+    ok(client.get(f"/api/payments/{payment_id}", headers=headers))
+    ok(client.put(f"/api/payments/{payment_id}", headers=headers, json={"amount": 60.0}))
+
+    # Moving a payment settles both invoices again
+    moved = ok(client.put(
+        f"/api/payments/{payment_id}", headers=headers, json={"invoice_id": second, "amount": 80.0}
+    ))
+    assert moved["invoice_id"] == second
+    assert ok(client.get(f"/api/invoices/{first}", headers=headers))["status"] == "pending"
+    assert ok(client.get(f"/api/invoices/{second}", headers=headers))["status"] == "paid"
+
+    ok(client.delete(f"/api/payments/{payment_id}", headers=headers))
+    assert ok(client.get(f"/api/invoices/{second}", headers=headers))["status"] == "pending"
+
+
+def test_client_crud_within_budgets(client, headers):
+    invoice_id = create_invoice(client, headers, 10.0)
+    client_id = ok(client.get(f"/api/invoices/{invoice_id}", headers=headers))["client_id"]
+    ok(client.get("/api/clients", headers=headers))
+    ok(client.get(f"/api/clients/{client_id}", headers=headers))
+    ok(client.put(f"/api/clients/{client_id}", headers=headers, json={"name": "Globex"}))
+    ok(client.delete(f"/api/clients/{client_id}", headers=headers))
@@ -0,0 +1,44 @@
+from sqlalchemy import text
+
+from app.models.invoice import Invoice
+from tests.test_payments import create_client
+
+
+def invoice(client_id, **fields):
+    return {
+        "issued_date": "2026-01-01",
+        "due_date": "2026-02-01",
+        "subtotal": 10.0,
+        "total": 10.0,
+        "client_id": client_id,
+        "items": [{"description": "Work", "quantity": 1, "unit_price": 10.0, "amount": 10.0}],
+        **fields,
+    }
+
+
+def test_rows_the_database_rejects_are_reported_by_index(client, headers, db):
+    client_id = create_client(client, headers)
+    # Fails the chunk's INSERT, so every row is retried in a savepoint of its own
+    db.execute(text(
+        "CREATE TRIGGER reject_invoice BEFORE INSERT ON invoice WHEN NEW.notes = 'reject' "
+        "BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+    ))
+    db.commit()
+
+    response = client.post("/api/invoices/bulk", headers=headers, json=[
+        invoice(client_id),
+        invoice(client_id, notes="reject"),
+        invoice(client_id, total=-1),
+        invoice(client_id),
+    ])
+    assert response.status_code == 200, response.text
+    result = response.json()
+
+    assert [row["index"] for row in result["created"]] == [0, 3]
+    assert [error["index"] for error in result["errors"]] == [1, 2]
+    assert result["errors"][0]["errors"][0]["msg"] == "Rejected by the database (IntegrityError)"
+    assert result["errors"][1]["errors"][0]["loc"] == ["total"]
+
+    created = db.query(Invoice).order_by(Invoice.id).all()
+    assert [row.id for row in created] == [row["id"] for row in result["created"]]
+    assert all(len(row.items) == 1 for row in created)
@@ -0,0 +1,54 @@
+from tests.test_payments import create_invoice
+
+
+def item(description, amount, **fields):
+    return {"description": description, "quantity": 1, "unit_price": amount, "amount": amount, **fields}
+
+
+def put_items(client, headers, invoice_id, items):
+    return client.put(f"/api/invoices/{invoice_id}", headers=headers, json={"items": items})
+
+
+def read_items(client, headers, invoice_id):
+    invoice = client.get(f"/api/invoices/{invoice_id}?include=items", headers=headers).json()
+    return sorted(invoice["items"], key=lambda row: row["id"])
+
+
+def test_update_insert_and_delete_items_in_one_put(client, headers):
+    invoice_id = create_invoice(client, headers, 10.0)
+    response = put_items(client, headers, invoice_id, [
+        item("Work", 10.0), item("Travel", 5.0), item("Hosting", 2.0),
+    ])
+    assert response.status_code == 200, response.text
+    kept, changed, dropped = read_items(client, headers, invoice_id)
+
+    response = put_items(client, headers, invoice_id, [
+        item(kept["description"], kept["amount"], id=kept["id"]),
+        item("Travel and lodging", 8.0, id=changed["id"]),
+        item("Support", 3.0),
+    ])
+    assert response.status_code == 200, response.text
+
+    items = read_items(client, headers, invoice_id)
+    # SQLite may hand the dropped item's id to the inserted one
+    assert [(row["id"], row["description"], row["amount"]) for row in items] == [
+        (kept["id"], "Work", 10.0),
+        (changed["id"], "Travel and lodging", 8.0),
+        (items[2]["id"], "Support", 3.0),
+    ]
+    assert dropped["description"] == "Hosting"
+
+
+def test_items_of_another_invoice_or_listed_twice_are_rejected(client, headers):
+    first = create_invoice(client, headers, 10.0)
+    second = create_invoice(client, headers, 10.0)
+    [other] = read_items(client, headers, second)
+    [own] = read_items(client, headers, first)
+
+    assert put_items(client, headers, first, [item("Work", 10.0, id=other["id"])]).status_code == 400
+    assert put_items(client, headers, first, [
+        item("Work", 10.0, id=own["id"]), item("Work", 10.0, id=own["id"]),
+    ]).status_code == 400
+    # Neither request changed anything
+    assert read_items(client, headers, first) == [own]
+    assert read_items(client, headers, second) == [other]
@@ -0,0 +1,38 @@
+import pytest
+
+from app.core.config import settings
+from app.models.user import User
+
+METRICS_PATHS = ("/api/metrics", "/api/internal/caches", "/api/internal/overdue-sweeper")
+
+
+@pytest.fixture
+def no_metrics_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", None)
+
+
+@pytest.mark.parametrize("path", METRICS_PATHS)
+def test_closed_without_token_configured(client, headers, no_metrics_token, path):
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer anything"}).status_code in (401, 403)
+    # An ordinary user is not enough
+    assert client.get(path, headers=headers).status_code == 403
+
+
+def test_superuser_allowed_without_token_configured(client, headers, db, no_metrics_token):
+    assert client.get("/api/users/me", headers=headers).status_code == 200
+    user = db.query(User).one()
+    user.is_superuser = True
+    db.commit()
+
+    assert client.get("/api/metrics", headers=headers).status_code == 200
+
+
+def test_metrics_token(client, monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scraper-token")
+
+    def status(token):
+        return client.get("/api/metrics", headers={"Authorization": f"Bearer {token}"}).status_code
+
+    assert status("scraper-token") == 200
+    assert status("wrong") in (401, 403)
@@ -0,0 +1,64 @@
+import threading
+
+from app.db.session import SessionLocal
+from app.services.numbering import reserve_block, reserve_numbers
+from benchmarks.fake_auth import mint_token
+from tests.test_payments import create_client
+
+
+def create_numbered(client, headers, client_id, number=None):
+    return client.post("/api/invoices", headers=headers, json={
+        "number": number,
+        "issued_date": "2026-01-01",
+        "due_date": "2026-02-01",
+        "subtotal": 10.0,
+        "total": 10.0,
+        "client_id": client_id,
+        "items": [],
+    })
+
+
+def test_numbers_typed_in_by_hand_are_skipped(client, headers, db):
+    client_id = create_client(client, headers)
+    for number in ("INV-1001", "INV-1003"):
+        assert create_numbered(client, headers, client_id, number).status_code == 200
+
+    assert reserve_block(db, 1, 3) == ["INV-1002", "INV-1004", "INV-1005"]
+    db.commit()
+    assert create_numbered(client, headers, client_id).json()["number"] == "INV-1006"
+    # A number already used is rejected rather than duplicated
+    assert create_numbered(client, headers, client_id, "INV-1004").status_code == 200
+    assert create_numbered(client, headers, client_id, "INV-1004").status_code == 400
+
+
+def test_concurrent_reservations_never_share_a_number(client, headers, db):
+    client.get("/api/users/me", headers=headers)
+    other = client.get(
+        "/api/users/me", headers={"Authorization": "Bearer " + mint_token(sub="2")}
+    ).json()["id"]
+
+    start = threading.Barrier(8)
+    reserved, errors = [], []
+
+    def reserve():
+        start.wait()
+        try:
+            with SessionLocal() as session:
+                blocks = reserve_numbers(session, {1: 5, other: 2})
+                session.commit()
+            reserved.append(blocks)
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    for user_id, count in ((1, 5), (other, 2)):
+        numbers = [number for blocks in reserved for number in blocks[user_id].numbers]
+        assert sorted(numbers, key=lambda number: int(number[4:])) == [
+            f"INV-{number}" for number in range(1001, 1001 + 8 * count)
+        ]
@@ -0,0 +1,41 @@
+import pytest
+
+from app.services.pagination import encode_cursor
+from tests.test_payments import create_invoice
+
+TOTALS = [20.0, 10.0, 10.0, 30.0, 10.0, 20.0, 10.0]
+
+
+def walk(client, headers, **params):
+    """
+    Ids of every invoice, two per page, following X-Next-Cursor
+    """
+    ids, params = [], {**params, "limit": 2}
+    while True:
+        response = client.get("/api/invoices", headers=headers, params=params)
+        assert response.status_code == 200, response.text
+        ids += [invoice["id"] for invoice in response.json()]
+        if "X-Next-Cursor" not in response.headers:
+            return ids
+        params["cursor"] = response.headers["X-Next-Cursor"]
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_through_ties_once_each(client, headers, order):
+    invoices = [(total, create_invoice(client, headers, total)) for total in TOTALS]
+    expected = [invoice_id for _, invoice_id in sorted(invoices, reverse=order == "desc")]
+
+    assert walk(client, headers, sort="total", order=order) == expected
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    encode_cursor("total", "asc", "ten", 1),
+    encode_cursor("issued_date", "asc", "2026-01-01", 1),
+])
+def test_invalid_cursor_is_a_bad_request(client, headers, cursor):
+    create_invoice(client, headers, 10.0)
+    response = client.get(
+        "/api/invoices", headers=headers, params={"sort": "total", "cursor": cursor}
+    )
+    assert response.status_code == 400
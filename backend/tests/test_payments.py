@@ -0,0 +1,75 @@
+from app.models.invoice import Invoice
+from app.services.payments import repair_balances
+
+
+def create_client(client, headers):
+    response = client.post(
+        "/api/clients", headers=headers, json={"name": "Acme", "email": "billing@acme.example.com"}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def create_invoice(client, headers, total):
+    client_id = create_client(client, headers)
+    response = client.post("/api/invoices", headers=headers, json={
+        "status": "pending",
+        "issued_date": "2026-01-01",
+        "due_date": "2026-02-01",
+        "subtotal": total,
+        "total": total,
+        "client_id": client_id,
+        "items": [{"description": "Work", "quantity": 1, "unit_price": total, "amount": total}],
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def pay(client, headers, invoice_id, amount):
+    response = client.post("/api/payments", headers=headers, json={
+        "amount": amount, "date": "2026-01-05", "method": "cash", "invoice_id": invoice_id,
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_fractional_payments_settle_invoice(client, headers, db):
+    invoice_id = create_invoice(client, headers, 0.8)
+    pay(client, headers, invoice_id, 0.1)
+    pay(client, headers, invoice_id, 0.7)
+
+    invoice = client.get(f"/api/invoices/{invoice_id}", headers=headers).json()
+    assert invoice["status"] == "paid"
+    assert invoice["amount_paid"] == 0.8
+    assert invoice["balance_due"] == 0.0
+
+    assert repair_balances(db) == 0
+    assert db.get(Invoice, invoice_id).status.value == "paid"
+
+
+def test_removing_fractional_payment_reopens_invoice(client, headers):
+    invoice_id = create_invoice(client, headers, 0.3)
+    pay(client, headers, invoice_id, 0.1)
+    payment_id = pay(client, headers, invoice_id, 0.2)
+    client.delete(f"/api/payments/{payment_id}", headers=headers)
+
+    invoice = client.get(f"/api/invoices/{invoice_id}", headers=headers).json()
+    assert invoice["status"] == "pending"
+    assert invoice["balance_due"] == 0.2
+
+
+def test_changing_the_total_settles_against_amount_paid(client, headers, db):
+    invoice_id = create_invoice(client, headers, 1.0)
+    pay(client, headers, invoice_id, 0.1)
+    pay(client, headers, invoice_id, 0.7)
+
+    def update_total(total):
+        response = client.put(f"/api/invoices/{invoice_id}", headers=headers, json={"total": total})
+        assert response.status_code == 200, response.text
+        invoice = response.json()
+        return invoice["status"], invoice["balance_due"]
+
+    assert update_total(0.8) == ("paid", 0.0)
+    assert update_total(0.9) == ("pending", 0.1)
+    assert update_total(0.5) == ("paid", -0.3)
+    assert repair_balances(db) == 0
@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+from app.models import Invoice, RecurringFrequency, RecurringInvoice
+from app.services.recurring import generate_recurring, next_period
+from tests.test_payments import create_client
+
+
+def walk(start, frequency, periods):
+    days, anchor_day = [start], start.day
+    for _ in range(periods):
+        days.append(next_period(days[-1], frequency, anchor_day))
+    return days
+
+
+def test_monthly_returns_to_month_end():
+    assert walk(date(2026, 1, 31), RecurringFrequency.MONTHLY, 4) == [
+        date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30), date(2026, 5, 31),
+    ]
+
+
+@pytest.mark.parametrize("frequency, expected", [
+    (RecurringFrequency.QUARTERLY, [date(2024, 5, 29), date(2024, 8, 29), date(2024, 11, 29)]),
+    (RecurringFrequency.YEARLY, [date(2025, 2, 28), date(2026, 2, 28), date(2027, 2, 28), date(2028, 2, 29)]),
+])
+def test_leap_day_runs(frequency, expected):
+    assert walk(date(2024, 2, 29), frequency, len(expected))[1:] == expected
+
+
+def test_generator_keeps_the_anchor_day(client, headers, db):
+    client_id = create_client(client, headers)
+    template = RecurringInvoice(
+        name="Retainer",
+        frequency=RecurringFrequency.MONTHLY,
+        next_date=date(2026, 1, 31),
+        template={"subtotal": 10.0, "total": 10.0, "items": []},
+        client_id=client_id,
+        user_id=1,
+    )
+    db.add(template)
+    db.commit()
+
+    generate_recurring(db, today=date(2026, 4, 30))
+
+    issued = db.query(Invoice.issued_date).order_by(Invoice.issued_date).all()
+    assert [day for day, in issued] == [
+        date(2026, 1, 31), date(2026, 2, 28), date(2026, 3, 31), date(2026, 4, 30),
+    ]
+    db.refresh(template)
+    assert (template.next_date, template.anchor_day) == (date(2026, 5, 31), 31)
@@ -0,0 +1,51 @@
+from app.services import reports
+from tests.test_payments import create_invoice, pay
+
+
+def snapshot(db):
+    """
+    Every rollup row that isn't all zeros, amounts to the cent
+    """
+    rows = set()
+    for model in reports.ROLLUPS:
+        for row in db.query(model):
+            key = tuple(getattr(row, column.key) for column in model.__table__.primary_key)
+            totals = tuple(round(getattr(row, column.key), 2) for column in reports._totals(model))
+            if any(totals):
+                rows.add((model.__tablename__, key, totals))
+    return rows
+
+
+def assert_matches_rebuild(db):
+    db.expire_all()
+    incremental = snapshot(db)
+    reports.rebuild(db)
+    db.flush()
+    assert snapshot(db) == incremental
+    db.rollback()
+
+
+def test_rollups_match_a_rebuild_after_every_write(client, headers, db):
+    def write(method, path, **kwargs):
+        response = client.request(method, path, headers=headers, **kwargs)
+        assert response.status_code == 200, response.text
+        assert_matches_rebuild(db)
+        return response.json()
+
+    first = create_invoice(client, headers, 100.0)
+    second = create_invoice(client, headers, 80.0)
+    assert_matches_rebuild(db)
+
+    payment_id = pay(client, headers, first, 40.0)
+    assert_matches_rebuild(db)
+    write("PUT", f"/api/payments/{payment_id}", json={"amount": 100.0, "method": "credit_card"})
+    write("PUT", f"/api/invoices/{first}", json={"total": 120.0, "issued_date": "2026-03-01"})
+    # Moved to another invoice, month and method at once
+    write("PUT", f"/api/payments/{payment_id}", json={
+        "invoice_id": second, "amount": 80.0, "date": "2026-02-10", "method": "bank_transfer",
+    })
+    write("PUT", f"/api/invoices/{second}", json={"status": "cancelled"})
+    pay(client, headers, first, 120.0)
+    assert_matches_rebuild(db)
+    write("DELETE", f"/api/payments/{payment_id}")
+    write("DELETE", f"/api/invoices/{first}")
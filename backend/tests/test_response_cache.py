@@ -0,0 +1,39 @@
+import pytest
+
+from app.core.response_cache import MemoryBackend, ResponseCacheBackend, response_cache
+from tests.test_payments import create_invoice, pay
+
+
+def test_backend_missing_a_method_fails_on_creation():
+    class NoBump(ResponseCacheBackend):
+        async def generations(self, *names):
+            return (0,) * len(names)
+
+        async def get(self, key):
+            return None
+
+        async def set(self, key, value):
+            pass
+
+    with pytest.raises(TypeError):
+        NoBump()
+
+
+@pytest.fixture
+def memory_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "backend", MemoryBackend(1024 * 1024, 30))
+
+
+def test_writes_invalidate_cached_lists(client, headers, memory_cache):
+    invoice_id = create_invoice(client, headers, 10.0)
+
+    first = client.get("/api/invoices?status=pending", headers=headers)
+    assert first.headers["X-Cache"] == "MISS"
+    second = client.get("/api/invoices?status=pending&order=asc", headers=headers)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.content == first.content
+
+    pay(client, headers, invoice_id, 10.0)
+    after = client.get("/api/invoices?status=pending", headers=headers)
+    assert after.headers["X-Cache"] == "MISS"
+    assert after.json() == []
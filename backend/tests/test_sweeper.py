@@ -0,0 +1,17 @@
+import asyncio
+
+from app.core.config import settings
+from app.core.sweeper import sweep_overdue
+from tests.test_payments import create_invoice
+
+
+def test_sweeper_stats_report_counts_not_ids(client, headers):
+    create_invoice(client, headers, 10.0)
+    assert asyncio.run(sweep_overdue()) == 1
+
+    stats = client.get(
+        "/api/internal/overdue-sweeper",
+        headers={"Authorization": f"Bearer {settings.METRICS_TOKEN}"},
+    ).json()
+    assert stats["last_marked"] == 1
+    assert stats["marked"] >= 1